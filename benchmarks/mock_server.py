@@ -0,0 +1,457 @@
+"""Local stand-in for the Mistral chat completions API.
+
+The server speaks just enough HTTP/1.1 (keep-alive, Content-Length request
+bodies, chunked responses) to serve ``POST /v1/chat/completions`` with and
+without streaming, ``POST /v1/embeddings``, ``GET /v1/models`` and the files
+and batch job endpoints. Latency, streaming speed, rate limiting and failures
+are configurable, so client behaviour can be measured without network access.
+"""
+
+# Modified by Louis Rokitta
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+import hashlib
+import itertools
+import json
+import random
+import time
+from typing import Any
+
+
+@dataclass
+class MockConfig:
+    """Behaviour of the mock server."""
+
+    latency: float = 0.05
+    """Seconds before the response headers (non-streaming: the whole answer)."""
+    connect_latency: float = 0.0
+    """Seconds before a new connection is served, standing in for DNS, TCP
+    and TLS setup."""
+    token_interval: float = 0.005
+    """Seconds between streamed tokens."""
+    completion_tokens: int = 20
+    rate_limit_every: int = 0
+    """Answer every n-th request with 429 (0 disables)."""
+    retry_after: float = 0.2
+    throttled_keys: set[str] = field(default_factory=set)
+    """API keys whose chat requests are always answered with 429."""
+    error_rate: float = 0.0
+    """Share of requests answered with 503."""
+    tool_calls: list[dict[str, Any]] = field(default_factory=list)
+    """Tool calls returned for the first request of a conversation."""
+    batch_duration: float = 0.5
+    """Seconds a batch job stays queued and running before it succeeds."""
+    batch_out_of_order: bool = False
+    """Write batch results in reverse order, the API does not keep the order
+    of the input file."""
+    download_failures: int = 0
+    """Answer the first n file downloads with 503."""
+
+
+@dataclass
+class MockStats:
+    """Counters of the mock server."""
+
+    requests: int = 0
+    rate_limited: int = 0
+    errors: int = 0
+    connections: int = 0
+    request_bytes: int = 0
+    batch_jobs: int = 0
+    batch_polls: int = 0
+
+
+class MockMistralServer:
+    """Minimal asyncio HTTP server imitating the Mistral API."""
+
+    def __init__(self, config: MockConfig | None = None) -> None:
+        self.config = config or MockConfig()
+        self.stats = MockStats()
+        self.routes: dict[tuple[str, str], Any] = {
+            ("POST", "/v1/chat/completions"): self._chat_completions,
+            ("GET", "/v1/models"): self._models,
+            ("GET", "/v1/models/"): self._model,
+            ("POST", "/v1/embeddings"): self._embeddings,
+            ("POST", "/v1/files"): self._upload_file,
+            ("GET", "/v1/files/"): self._download_file,
+            ("POST", "/v1/batch/jobs"): self._create_batch_job,
+            ("GET", "/v1/batch/jobs/"): self._get_batch_job,
+        }
+        self.files: dict[str, bytes] = {}
+        self.jobs: dict[str, dict[str, Any]] = {}
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._server: asyncio.Server | None = None
+        self._counter = itertools.count(1)
+        self._connections: dict[asyncio.Task[None], asyncio.StreamWriter] = {}
+
+    @property
+    def base_url(self) -> str:
+        """Return the API base URL to pass to MistralClient."""
+        assert self._server is not None
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}/v1"
+
+    async def start(self) -> None:
+        """Start listening on a free local port."""
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+
+    async def stop(self) -> None:
+        """Stop the server."""
+        for task in self._tasks:
+            task.cancel()
+        if self._server is not None:
+            self._server.close()
+            # Close idle keep-alive connections so their handlers return.
+            for writer in self._connections.values():
+                writer.close()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+
+    async def __aenter__(self) -> MockMistralServer:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.stop()
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.stats.connections += 1
+        task = asyncio.current_task()
+        assert task is not None
+        self._connections[task] = writer
+        try:
+            await asyncio.sleep(self.config.connect_latency)
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    return
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers: dict[str, str] = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                self.stats.request_bytes += len(body)
+                path = target.split("?", 1)[0]
+                route = self.routes.get((method, path))
+                if route is None:
+                    route = self._match_prefix(method, path)
+                if route is None:
+                    await self._respond(writer, 404, {"message": "Not found"})
+                    continue
+                await route(writer, path, headers, body)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            return
+        finally:
+            del self._connections[task]
+            writer.close()
+
+    def _match_prefix(self, method: str, path: str) -> Any:
+        for (route_method, route_path), handler in self.routes.items():
+            if route_method == method and route_path.endswith("/") and path.startswith(route_path):
+                return handler
+        return None
+
+    async def _respond(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        body: Any,
+        headers: dict[str, str] | None = None,
+        content_type: str = "application/json",
+    ) -> None:
+        data = body if isinstance(body, bytes) else json.dumps(body).encode()
+        head = [f"HTTP/1.1 {status} X", f"Content-Type: {content_type}", f"Content-Length: {len(data)}"]
+        head += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + data)
+        await writer.drain()
+
+    async def _models(
+        self,
+        writer: asyncio.StreamWriter,
+        path: str,
+        headers: dict[str, str],
+        body: bytes,
+    ) -> None:
+        capabilities = {"completion_chat": True, "function_calling": True, "vision": False}
+        await self._respond(
+            writer,
+            200,
+            {
+                "object": "list",
+                "data": [
+                    {
+                        "id": model,
+                        "aliases": [],
+                        "capabilities": capabilities,
+                        "max_context_length": 32768,
+                        "deprecation": None,
+                    }
+                    for model in ("mistral-small-latest", "mistral-medium-latest")
+                ],
+            },
+        )
+
+    async def _model(
+        self,
+        writer: asyncio.StreamWriter,
+        path: str,
+        headers: dict[str, str],
+        body: bytes,
+    ) -> None:
+        await self._respond(
+            writer,
+            200,
+            {
+                "id": path.removeprefix("/v1/models/"),
+                "capabilities": {"completion_chat": True, "function_calling": True},
+                "max_context_length": 32768,
+            },
+        )
+
+    async def _embeddings(
+        self,
+        writer: asyncio.StreamWriter,
+        path: str,
+        headers: dict[str, str],
+        body: bytes,
+    ) -> None:
+        # Bag of words hashed into 64 dimensions: similar sentences share
+        # most of their words and get similar vectors.
+        inputs = json.loads(body)["input"]
+        data = []
+        for index, text in enumerate(inputs):
+            vector = [0.0] * 64
+            for word in text.lower().split():
+                vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % 64] += 1.0
+            data.append({"object": "embedding", "index": index, "embedding": vector})
+        await asyncio.sleep(self.config.latency)
+        await self._respond(
+            writer,
+            200,
+            {
+                "object": "list",
+                "model": "mistral-embed",
+                "data": data,
+                "usage": {"prompt_tokens": len(body) // 4, "total_tokens": len(body) // 4},
+            },
+        )
+
+    async def _upload_file(
+        self,
+        writer: asyncio.StreamWriter,
+        path: str,
+        headers: dict[str, str],
+        body: bytes,
+    ) -> None:
+        boundary = headers["content-type"].partition("boundary=")[2].encode()
+        content = b""
+        for part in body.split(b"--" + boundary):
+            head, _, data = part.partition(b"\r\n\r\n")
+            if b'name="file"' in head:
+                content = data.removesuffix(b"\r\n")
+        file_id = f"file-{len(self.files) + 1}"
+        self.files[file_id] = content
+        await self._respond(
+            writer, 200, {"id": file_id, "object": "file", "bytes": len(content)}
+        )
+
+    async def _download_file(
+        self,
+        writer: asyncio.StreamWriter,
+        path: str,
+        headers: dict[str, str],
+        body: bytes,
+    ) -> None:
+        file_id = path.removeprefix("/v1/files/").removesuffix("/content")
+        if self.config.download_failures > 0:
+            self.config.download_failures -= 1
+            self.stats.errors += 1
+            await self._respond(writer, 503, {"message": "Service unavailable"})
+            return
+        if file_id not in self.files:
+            await self._respond(writer, 404, {"message": "File not found"})
+            return
+        await self._respond(
+            writer, 200, self.files[file_id], content_type="application/octet-stream"
+        )
+
+    async def _create_batch_job(
+        self,
+        writer: asyncio.StreamWriter,
+        path: str,
+        headers: dict[str, str],
+        body: bytes,
+    ) -> None:
+        request = json.loads(body)
+        self.stats.batch_jobs += 1
+        job = {
+            "id": f"job-{self.stats.batch_jobs}",
+            "object": "batch",
+            "model": request["model"],
+            "input_files": request["input_files"],
+            "metadata": request.get("metadata"),
+            "status": "QUEUED",
+            "output_file": None,
+            "error_file": None,
+        }
+        self.jobs[job["id"]] = job
+        task = asyncio.get_running_loop().create_task(self._run_batch_job(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        await self._respond(writer, 200, job)
+
+    async def _get_batch_job(
+        self,
+        writer: asyncio.StreamWriter,
+        path: str,
+        headers: dict[str, str],
+        body: bytes,
+    ) -> None:
+        self.stats.batch_polls += 1
+        job = self.jobs.get(path.removeprefix("/v1/batch/jobs/"))
+        if job is None:
+            await self._respond(writer, 404, {"message": "Job not found"})
+            return
+        await self._respond(writer, 200, job)
+
+    async def _run_batch_job(self, job: dict[str, Any]) -> None:
+        await asyncio.sleep(self.config.batch_duration / 2)
+        job["status"] = "RUNNING"
+        await asyncio.sleep(self.config.batch_duration / 2)
+        lines = []
+        for line in self.files[job["input_files"][0]].splitlines():
+            request = json.loads(line)
+            messages = request["body"]["messages"]
+            lines.append(
+                json.dumps(
+                    {
+                        "id": f"batch-{job['id']}-{request['custom_id']}",
+                        "custom_id": request["custom_id"],
+                        "response": {
+                            "status_code": 200,
+                            "body": {
+                                "model": job["model"],
+                                "choices": [
+                                    {
+                                        "index": 0,
+                                        "message": {
+                                            "role": "assistant",
+                                            "content": f"Answer to: {messages[-1]['content']}",
+                                        },
+                                        "finish_reason": "stop",
+                                    }
+                                ],
+                                "usage": {
+                                    "prompt_tokens": len(line) // 4,
+                                    "completion_tokens": 5,
+                                    "total_tokens": len(line) // 4 + 5,
+                                },
+                            },
+                        },
+                        "error": None,
+                    }
+                )
+            )
+        if self.config.batch_out_of_order:
+            lines.reverse()
+        file_id = f"file-{len(self.files) + 1}"
+        self.files[file_id] = "\n".join(lines).encode()
+        job["output_file"] = file_id
+        job["status"] = "SUCCESS"
+
+    async def _chat_completions(
+        self,
+        writer: asyncio.StreamWriter,
+        path: str,
+        headers: dict[str, str],
+        body: bytes,
+    ) -> None:
+        config = self.config
+        number = next(self._counter)
+        self.stats.requests += 1
+        api_key = headers.get("authorization", "").removeprefix("Bearer ")
+        if api_key in config.throttled_keys or (
+            config.rate_limit_every and number % config.rate_limit_every == 0
+        ):
+            self.stats.rate_limited += 1
+            await self._respond(
+                writer,
+                429,
+                {"message": "Rate limit exceeded"},
+                {"Retry-After": str(config.retry_after)},
+            )
+            return
+        if config.error_rate and random.random() < config.error_rate:
+            self.stats.errors += 1
+            await self._respond(writer, 503, {"message": "Service unavailable"})
+            return
+
+        payload = json.loads(body)
+        prompt_tokens = len(body) // 4
+        tool_calls = (
+            config.tool_calls
+            if config.tool_calls
+            and not any(message.get("role") == "tool" for message in payload["messages"])
+            else []
+        )
+        words = [f"word{index} " for index in range(config.completion_tokens)]
+        words[-1] = "done."
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": config.completion_tokens,
+            "total_tokens": prompt_tokens + config.completion_tokens,
+        }
+        await asyncio.sleep(config.latency)
+
+        if not payload.get("stream"):
+            if not tool_calls:
+                await asyncio.sleep(config.token_interval * config.completion_tokens)
+            message: dict[str, Any] = {"role": "assistant", "content": "" if tool_calls else "".join(words)}
+            if tool_calls:
+                message["tool_calls"] = tool_calls
+            await self._respond(
+                writer,
+                200,
+                {
+                    "id": f"cmpl-{number}",
+                    "model": payload.get("model"),
+                    "created": int(time.time()),
+                    "choices": [{"index": 0, "message": message, "finish_reason": "stop"}],
+                    "usage": usage,
+                },
+            )
+            return
+
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+            b"Transfer-Encoding: chunked\r\n\r\n"
+        )
+
+        async def send_event(data: str) -> None:
+            event = f"data: {data}\n\n".encode()
+            writer.write(f"{len(event):x}\r\n".encode() + event + b"\r\n")
+            await writer.drain()
+
+        if tool_calls:
+            for index, tool_call in enumerate(tool_calls):
+                await send_event(
+                    json.dumps(
+                        {"choices": [{"index": 0, "delta": {"tool_calls": [{**tool_call, "index": index}]}}]}
+                    )
+                )
+        else:
+            for word in words:
+                await send_event(json.dumps({"choices": [{"index": 0, "delta": {"content": word}}]}))
+                await asyncio.sleep(config.token_interval)
+        await send_event(
+            json.dumps({"choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage})
+        )
+        await send_event("[DONE]")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
@@ -0,0 +1,419 @@
+"""Offline benchmarks for the Mistral AI Conversation integration.
+
+Runs the integration against the local mock server in ``mock_server.py``
+and reports throughput, latency percentiles, time to first token, peak
+allocations and event loop blocking per scenario::
+
+    python -m benchmarks.run                 # all scenarios
+    python -m benchmarks.run burst stream    # selected scenarios
+    python -m benchmarks.run --allocations   # also trace allocations
+
+Client scenarios only need ``httpx``. Scenarios that exercise
+``_async_generate_content`` (the generate_content service),
+``MistralConversationEntity._async_handle_chat_log`` and attachments need
+Home Assistant installed and are skipped otherwise.
+"""
+
+# Modified by Louis Rokitta
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+import importlib.util
+from pathlib import Path
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import ModuleType, SimpleNamespace
+from typing import Any
+
+from .mock_server import MockConfig, MockMistralServer
+
+ROOT = Path(__file__).resolve().parent.parent
+PACKAGE = "mistral_conversation"
+HAS_HOMEASSISTANT = importlib.util.find_spec("homeassistant") is not None
+
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+if not HAS_HOMEASSISTANT and PACKAGE not in sys.modules:
+    # Without Home Assistant the package __init__ cannot be imported, but the
+    # client modules do not depend on it.
+    _package = ModuleType(PACKAGE)
+    _package.__path__ = [str(ROOT / PACKAGE)]
+    sys.modules[PACKAGE] = _package
+
+from mistral_conversation.key_pool import KeyPool, PooledKey  # noqa: E402
+from mistral_conversation.metrics import RollingHistogram  # noqa: E402
+from mistral_conversation.mistral_client import (  # noqa: E402
+    MistralClient,
+    create_http_client,
+)
+from mistral_conversation.rate_limit import RateLimiter  # noqa: E402
+
+
+class LoopMonitor:
+    """Measure how long the event loop is blocked between short sleeps."""
+
+    def __init__(self, interval: float = 0.005, threshold: float = 0.01) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.max_lag = 0.0
+        self.blocked = 0.0
+        self._task: asyncio.Task[None] | None = None
+
+    async def _run(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = time.perf_counter() - start - self.interval
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.threshold:
+                self.blocked += lag
+
+    def __enter__(self) -> LoopMonitor:
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        assert self._task is not None
+        self._task.cancel()
+
+
+@dataclass
+class Result:
+    """Measurements of one scenario."""
+
+    name: str
+    requests: int = 0
+    errors: int = 0
+    wall: float = 0.0
+    latency: RollingHistogram = field(default_factory=lambda: RollingHistogram(100000))
+    first_token: RollingHistogram = field(default_factory=lambda: RollingHistogram(100000))
+    upstream: int = 0
+    peak_alloc: int | None = None
+    max_lag: float = 0.0
+    blocked: float = 0.0
+
+    def row(self) -> list[str]:
+        def ms(value: float | None) -> str:
+            return "-" if value is None else f"{value * 1000:.1f}"
+
+        return [
+            self.name,
+            str(self.requests),
+            str(self.errors),
+            str(self.upstream),
+            f"{self.requests / self.wall:.1f}" if self.wall else "-",
+            ms(self.latency.percentile(50)),
+            ms(self.latency.percentile(95)),
+            ms(self.latency.percentile(99)),
+            ms(self.first_token.percentile(50)),
+            "-" if self.peak_alloc is None else f"{self.peak_alloc / 1024:.0f}",
+            ms(self.max_lag),
+            ms(self.blocked),
+        ]
+
+
+HEADER = [
+    "scenario", "requests", "errors", "upstream", "req/s", "p50 ms", "p95 ms",
+    "p99 ms", "ttft p50", "peak KiB", "max lag ms", "blocked ms",
+]
+
+
+async def _timed(result: Result, call: Callable[[], Awaitable[Any]]) -> None:
+    start = time.perf_counter()
+    try:
+        await call()
+    except Exception:  # noqa: BLE001
+        result.errors += 1
+    else:
+        result.latency.add(time.perf_counter() - start)
+    result.requests += 1
+
+
+def _payload(text: str, **extra: Any) -> dict[str, Any]:
+    return {
+        "model": "mistral-small-latest",
+        "messages": [
+            {"role": "system", "content": "You are a benchmark."},
+            {"role": "user", "content": text},
+        ],
+        "max_tokens": 50,
+        **extra,
+    }
+
+
+def _client(server: MockMistralServer, **kwargs: Any) -> MistralClient:
+    return MistralClient(
+        "benchmark",
+        # The mock server speaks plain HTTP, so skip loading CA certificates.
+        create_http_client(verify=False),
+        base_url=server.base_url,
+        **kwargs,
+    )
+
+
+async def scenario_burst(server: MockMistralServer, result: Result, count: int) -> None:
+    """Distinct concurrent service-style calls through one pooled client."""
+    async with _client(server, rate_limiter=RateLimiter(1000, 10**9)) as client:
+        await asyncio.gather(
+            *(
+                _timed(result, lambda i=i: client.chat(_payload(f"burst {i}")))
+                for i in range(count)
+            )
+        )
+
+
+async def scenario_coalesced(server: MockMistralServer, result: Result, count: int) -> None:
+    """Identical concurrent calls that single-flight collapses into one."""
+    async with _client(server) as client:
+        await asyncio.gather(
+            *(_timed(result, lambda: client.chat(_payload("sunset summary"))) for _ in range(count))
+        )
+
+
+async def scenario_stream(server: MockMistralServer, result: Result, count: int) -> None:
+    """Sequential streamed completions, measuring time to first token."""
+    async with _client(server) as client:
+        for i in range(count):
+            start = time.perf_counter()
+
+            async def consume(i: int = i, start: float = start) -> None:
+                first = True
+                async for _chunk in client.chat_stream(_payload(f"stream {i}")):
+                    if first:
+                        result.first_token.add(time.perf_counter() - start)
+                        first = False
+
+            await _timed(result, consume)
+
+
+async def scenario_rate_limited(server: MockMistralServer, result: Result, count: int) -> None:
+    """Concurrent calls against a server that answers every 5th with 429."""
+    server.config.rate_limit_every = 5
+    async with _client(server, rate_limiter=RateLimiter(50, 10**9)) as client:
+        await asyncio.gather(
+            *(
+                _timed(result, lambda i=i: client.chat(_payload(f"limited {i}")))
+                for i in range(count)
+            )
+        )
+
+
+async def _first_request(server: MockMistralServer, result: Result, count: int, warm: bool) -> None:
+    server.config.connect_latency = 0.1
+    for i in range(count):
+        async with _client(server) as client:
+            if warm:
+                await client.warm_up("mistral-small-latest")
+            await _timed(result, lambda i=i: client.chat(_payload(f"first {i}")))
+
+
+async def scenario_cold_start(server: MockMistralServer, result: Result, count: int) -> None:
+    """First request of a new client, paying 100 ms of connection setup."""
+    await _first_request(server, result, count, warm=False)
+
+
+async def scenario_warm_start(server: MockMistralServer, result: Result, count: int) -> None:
+    """First request of a new client after warm_up opened its connection."""
+    await _first_request(server, result, count, warm=True)
+
+
+async def scenario_key_pool(server: MockMistralServer, result: Result, count: int) -> None:
+    """Concurrent calls over a pool of three keys, one of them throttled."""
+    server.config.throttled_keys = {"throttled"}
+    key_pool = KeyPool(
+        PooledKey(api_key, RateLimiter(20, 10**9))
+        for api_key in ("benchmark", "throttled", "spare")
+    )
+    async with _client(server, key_pool=key_pool) as client:
+        await asyncio.gather(
+            *(
+                _timed(result, lambda i=i: client.chat(_payload(f"pooled {i}")))
+                for i in range(count)
+            )
+        )
+
+
+async def scenario_batch_job(server: MockMistralServer, result: Result, count: int) -> None:
+    """Prompts sent as one batch job: upload, create, poll and download."""
+    from mistral_conversation.mistral_client import (
+        decode_batch_results,
+        encode_batch_requests,
+    )
+
+    async with _client(server) as client:
+
+        async def job() -> None:
+            bodies = [_payload(f"batch {i}") for i in range(count)]
+            upload = await client.upload_file(encode_batch_requests(bodies), "bench.jsonl")
+            job = await client.create_batch_job(upload["id"], "mistral-small-latest")
+            while job["status"] not in ("SUCCESS", "FAILED"):
+                await asyncio.sleep(0.05)
+                job = await client.get_batch_job(job["id"])
+            results = decode_batch_results(await client.download_file(job["output_file"]))
+            assert len(results) == count
+
+        await _timed(result, job)
+
+
+async def _async_hass() -> Any:
+    from homeassistant.core import HomeAssistant
+
+    config_dir = tempfile.mkdtemp(prefix="mistral-bench-")
+    hass = HomeAssistant(config_dir)
+    hass.config.allowlist_external_dirs = {config_dir, tempfile.gettempdir()}
+    return hass
+
+
+def _entry(client: MistralClient, hass: Any, **options: Any) -> Any:
+    from mistral_conversation import MistralRuntimeData
+    from mistral_conversation.attachments import AttachmentCache
+    from mistral_conversation.batch_jobs import BatchJobManager
+    from mistral_conversation.metrics import MetricsRecorder
+
+    entry = SimpleNamespace(
+        entry_id="benchmark",
+        title="Mistral benchmark",
+        domain=PACKAGE,
+        options={"chat_model": "mistral-small-latest", **options},
+        data={},
+    )
+    entry.runtime_data = MistralRuntimeData(
+        client=client,
+        attachments=AttachmentCache(hass),
+        metrics=MetricsRecorder(),
+        batch_jobs=BatchJobManager(hass, entry, client),
+    )
+    return entry
+
+
+async def scenario_service(server: MockMistralServer, result: Result, count: int) -> None:
+    """Concurrent generate_content service calls."""
+    from mistral_conversation import _async_generate_content
+
+    hass = await _async_hass()
+    async with _client(server) as client:
+        entry = _entry(client, hass)
+        await asyncio.gather(
+            *(
+                _timed(
+                    result,
+                    lambda i=i: _async_generate_content(
+                        entry, f"service {i}", filenames=[], use_cache=False
+                    ),
+                )
+                for i in range(count)
+            )
+        )
+    await hass.async_stop(force=True)
+
+
+async def scenario_history(server: MockMistralServer, result: Result, count: int) -> None:
+    """Conversation turns on top of a long chat history."""
+    from homeassistant.components import conversation
+
+    from mistral_conversation.context import ContextManager
+    from mistral_conversation.conversation import MistralConversationEntity
+
+    hass = await _async_hass()
+    async with _client(server) as client:
+        entry = _entry(client, hass, context_budget=100000)
+        entity = MistralConversationEntity(entry)
+        entity.hass = hass
+        entity.entity_id = "conversation.mistral_benchmark"
+        entity._context = ContextManager(hass, client)
+        chat_log = conversation.ChatLog(hass, "benchmark")
+        chat_log.content.append(conversation.SystemContent(content="You are a benchmark."))
+        for turn in range(200):
+            chat_log.content.append(conversation.UserContent(content=f"Question {turn} " * 10))
+            chat_log.content.append(
+                conversation.AssistantContent(agent_id=entity.entity_id, content=f"Answer {turn} " * 20)
+            )
+        for turn in range(count):
+            chat_log.content.append(conversation.UserContent(content=f"New question {turn}"))
+            await _timed(result, lambda: entity._async_handle_chat_log(chat_log))
+    await hass.async_stop(force=True)
+
+
+async def scenario_attachments(server: MockMistralServer, result: Result, count: int) -> None:
+    """Service calls that attach the same 5 MiB image again and again."""
+    from mistral_conversation import _async_generate_content
+
+    hass = await _async_hass()
+    image = Path(hass.config.config_dir) / "snapshot.jpg"
+    image.write_bytes(b"\xff\xd8\xff" + bytes(5 * 1024 * 1024))
+    async with _client(server) as client:
+        entry = _entry(client, hass)
+        for i in range(count):
+            await _timed(
+                result,
+                lambda i=i: _async_generate_content(
+                    entry, f"describe {i}", filenames=[str(image)], use_cache=False
+                ),
+            )
+    await hass.async_stop(force=True)
+
+
+SCENARIOS: dict[str, tuple[Callable[..., Awaitable[None]], int, bool]] = {
+    "burst": (scenario_burst, 200, False),
+    "coalesced": (scenario_coalesced, 200, False),
+    "stream": (scenario_stream, 20, False),
+    "rate_limited": (scenario_rate_limited, 50, False),
+    "key_pool": (scenario_key_pool, 100, False),
+    "cold_start": (scenario_cold_start, 10, False),
+    "warm_start": (scenario_warm_start, 10, False),
+    "batch_job": (scenario_batch_job, 100, False),
+    "service": (scenario_service, 100, True),
+    "history": (scenario_history, 10, True),
+    "attachments": (scenario_attachments, 10, True),
+}
+
+
+async def run(names: list[str], allocations: bool) -> list[Result]:
+    """Run the selected scenarios, each against a fresh mock server."""
+    results = []
+    for name in names:
+        scenario, count, needs_hass = SCENARIOS[name]
+        if needs_hass and not HAS_HOMEASSISTANT:
+            print(f"skipping {name}: Home Assistant is not installed", file=sys.stderr)
+            continue
+        result = Result(name)
+        async with MockMistralServer(MockConfig()) as server:
+            if allocations:
+                tracemalloc.start()
+            start = time.perf_counter()
+            with LoopMonitor() as monitor:
+                await scenario(server, result, count)
+            result.wall = time.perf_counter() - start
+            if allocations:
+                result.peak_alloc = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            result.max_lag = monitor.max_lag
+            result.blocked = monitor.blocked
+            result.upstream = server.stats.requests
+        results.append(result)
+    return results
+
+
+def main() -> None:
+    """Run the benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenarios", nargs="*", help=", ".join(SCENARIOS))
+    parser.add_argument("--allocations", action="store_true", help="trace peak allocations")
+    args = parser.parse_args()
+    if unknown := set(args.scenarios) - set(SCENARIOS):
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    results = asyncio.run(run(args.scenarios or list(SCENARIOS), args.allocations))
+    rows = [HEADER, *(result.row() for result in results)]
+    widths = [max(len(row[column]) for row in rows) for column in range(len(HEADER))]
+    for row in rows:
+        print("  ".join(cell.rjust(width) for cell, width in zip(row, widths)))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,20 +3,49 @@
 # Modified by Louis Rokitta
 
 from __future__ import annotations
-import base64
-from mimetypes import guess_type
-from pathlib import Path
-from .mistral_client import MistralClient
+import asyncio
+from contextlib import suppress
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+import importlib
+import time
+from typing import TYPE_CHECKING, Any
+import httpx
+from .attachments import AttachmentCache
+from .batch_jobs import BatchJobManager
+from .key_pool import KeyPool, get_pooled_key
+from .metrics import MetricsRecorder
+from .mistral_client import (
+    KEEP_WARM_IDLE,
+    KEEP_WARM_INTERVAL,
+    SERVICE_TIMEOUT,
+    MistralClient,
+    create_http_transport,
+)
+from .models import ModelInfo, async_get_models, get_cached_models
+from .response_cache import ResponseCache, payload_cache_key, semantic_scope
+
+if TYPE_CHECKING:
+    from .semantic_cache import SemanticCache
 
 import voluptuous as vol
 
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_API_KEY, Platform
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
+from homeassistant.const import (
+    CONF_API_KEY,
+    CONF_LLM_HASS_API,
+    EVENT_STATE_CHANGED,
+    Platform,
+)
 from homeassistant.core import (
+    CALLBACK_TYPE,
+    Event,
+    EventStateChangedData,
     HomeAssistant,
     ServiceCall,
     ServiceResponse,
     SupportsResponse,
+    callback,
 )
 from homeassistant.exceptions import (
     ConfigEntryNotReady,
@@ -24,22 +53,52 @@ from homeassistant.exceptions import (
     ServiceValidationError,
 )
 from homeassistant.helpers import config_validation as cv, selector
-from homeassistant.helpers.httpx_client import get_async_client
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.httpx_client import create_async_httpx_client
 from homeassistant.helpers.typing import ConfigType
+from homeassistant.util.ulid import ulid_now
+from homeassistant.util.ssl import get_default_context
 
 from .const import (
+    CONF_ADDITIONAL_API_KEYS,
+    CONF_CACHE,
     CONF_CHAT_MODEL,
     CONF_FILENAMES,
+    CONF_HEDGE_REQUESTS,
+    CONF_HTTP2,
+    CONF_KEEP_WARM,
     CONF_MAX_TOKENS,
+    CONF_POOL_ENTRIES,
     CONF_PROMPT,
+    CONF_RATE_LIMIT_RPS,
+    CONF_RATE_LIMIT_TPM,
     CONF_REASONING_EFFORT,
+    CONF_RESPONSE_CACHE,
+    CONF_RESPONSE_CACHE_DETERMINISTIC_ONLY,
+    CONF_RESPONSE_CACHE_MAX_ENTRIES,
+    CONF_RESPONSE_CACHE_MAX_MEMORY,
+    CONF_RESPONSE_CACHE_SEMANTIC,
+    CONF_RESPONSE_CACHE_SEMANTIC_THRESHOLD,
+    CONF_RESPONSE_CACHE_TTL,
     CONF_TEMPERATURE,
     CONF_TOP_P,
     DOMAIN,
     LOGGER,
     RECOMMENDED_CHAT_MODEL,
+    RECOMMENDED_HEDGE_REQUESTS,
+    RECOMMENDED_HTTP2,
+    RECOMMENDED_KEEP_WARM,
     RECOMMENDED_MAX_TOKENS,
+    RECOMMENDED_RATE_LIMIT_RPS,
+    RECOMMENDED_RATE_LIMIT_TPM,
     RECOMMENDED_REASONING_EFFORT,
+    RECOMMENDED_RESPONSE_CACHE,
+    RECOMMENDED_RESPONSE_CACHE_DETERMINISTIC_ONLY,
+    RECOMMENDED_RESPONSE_CACHE_MAX_ENTRIES,
+    RECOMMENDED_RESPONSE_CACHE_MAX_MEMORY,
+    RECOMMENDED_RESPONSE_CACHE_SEMANTIC,
+    RECOMMENDED_RESPONSE_CACHE_SEMANTIC_THRESHOLD,
+    RECOMMENDED_RESPONSE_CACHE_TTL,
     RECOMMENDED_TEMPERATURE,
     RECOMMENDED_TOP_P,
     DEFAULT_SYSTEM_PROMPT,
@@ -47,18 +106,58 @@ from .const import (
 
 SERVICE_GENERATE_IMAGE = "generate_image"
 SERVICE_GENERATE_CONTENT = "generate_content"
+SERVICE_GENERATE_CONTENT_BATCH = "generate_content_batch"
+
+ATTR_MAX_CONCURRENCY = "max_concurrency"
+ATTR_MODE = "mode"
+ATTR_PROMPTS = "prompts"
+MODE_JOB = "job"
+MODE_REALTIME = "realtime"
+DEFAULT_BATCH_CONCURRENCY = 4
+MAX_BATCH_CONCURRENCY = 16
+EVENT_BATCH_PROGRESS = f"{DOMAIN}_batch_progress"
+
+BATCH_OVERRIDES = (CONF_CHAT_MODEL, CONF_MAX_TOKENS, CONF_TEMPERATURE, CONF_TOP_P)
+BATCH_ITEM_SCHEMA = vol.Any(
+    vol.Schema(
+        {
+            vol.Required(CONF_PROMPT): cv.string,
+            vol.Optional(CONF_FILENAMES): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional(CONF_CHAT_MODEL): cv.string,
+            vol.Optional(CONF_MAX_TOKENS): vol.All(vol.Coerce(int), vol.Range(min=1)),
+            vol.Optional(CONF_TEMPERATURE): vol.All(
+                vol.Coerce(float), vol.Range(min=0, max=2)
+            ),
+            vol.Optional(CONF_TOP_P): vol.All(vol.Coerce(float), vol.Range(min=0, max=1)),
+        }
+    ),
+    vol.All(cv.string, lambda prompt: {CONF_PROMPT: prompt}),
+)
 
-PLATFORMS = (Platform.CONVERSATION,)
+PLATFORMS = (Platform.CONVERSATION, Platform.SENSOR)
 CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
 
+# Options that shape what the platforms and the HTTP client are set up
+# with. Changing one reloads the entry, every other option is applied in
+# place.
+RELOAD_OPTIONS = (CONF_LLM_HASS_API, CONF_HTTP2)
 
-def encode_file(file_path: str) -> tuple[str, str]:
-    """Return base64 version of file contents."""
-    mime_type, _ = guess_type(file_path)
-    if (mime_type is None):
-        mime_type = "application/octet-stream"
-    with open(file_path, "rb") as image_file:
-        return (mime_type, base64.b64encode(image_file.read()).decode("utf-8"))
+
+@dataclass
+class MistralRuntimeData:
+    """Runtime data of a Mistral AI config entry."""
+
+    client: MistralClient
+    attachments: AttachmentCache
+    metrics: MetricsRecorder
+    batch_jobs: BatchJobManager
+    response_cache: ResponseCache | None = None
+    semantic_cache: SemanticCache | None = None
+    models: dict[str, ModelInfo] = field(default_factory=dict)
+    options: dict[str, Any] = field(default_factory=dict)
+
+
+MistralConfigEntry = ConfigEntry[MistralRuntimeData]
 
 
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
@@ -70,41 +169,70 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
 
     async def send_prompt(call: ServiceCall) -> ServiceResponse:
         """Send a prompt to Mistral and return the response."""
-        entry_id = call.data["config_entry"]
-        entry = hass.config_entries.async_get_entry(entry_id)
-
-        if (entry is None or entry.domain != DOMAIN):
-            raise ServiceValidationError(
-                translation_domain=DOMAIN,
-                translation_key="invalid_config_entry",
-                translation_placeholders={"config_entry": entry_id},
-            )
+        entry = _async_get_loaded_entry(hass, call.data["config_entry"])
+        text, _usage = await _async_generate_content(
+            entry,
+            call.data[CONF_PROMPT],
+            filenames=call.data[CONF_FILENAMES],
+            use_cache=call.data[CONF_CACHE],
+        )
+        return {"text": text}
 
-        model: str = entry.options.get(CONF_CHAT_MODEL, RECOMMENDED_CHAT_MODEL)
-        api_key: str = entry.data.get(CONF_API_KEY)
-        client = MistralClient(api_key, get_async_client(hass))
+    async def send_prompt_batch(call: ServiceCall) -> ServiceResponse:
+        """Send a list of prompts to Mistral with bounded concurrency."""
+        entry = _async_get_loaded_entry(hass, call.data["config_entry"])
+        items: list[dict[str, Any]] = call.data[ATTR_PROMPTS]
+        if call.data[ATTR_MODE] == MODE_JOB:
+            return await _async_submit_batch_job(entry, items)
+        semaphore = asyncio.Semaphore(call.data[ATTR_MAX_CONCURRENCY])
+        batch_id = ulid_now()
+        total = len(items)
+        completed = 0
+        usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        started = time.monotonic()
 
-        user_prompt = call.data[CONF_PROMPT]
-        system_prompt = entry.options.get(CONF_PROMPT, DEFAULT_SYSTEM_PROMPT)
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ]
-        payload = {
-            "model": model,
-            "messages": messages,
-            "max_tokens": entry.options.get(CONF_MAX_TOKENS, RECOMMENDED_MAX_TOKENS),
-            "temperature": entry.options.get(CONF_TEMPERATURE, RECOMMENDED_TEMPERATURE),
-            "top_p": entry.options.get(CONF_TOP_P, RECOMMENDED_TOP_P),
-            "stream": False,
+        async def run_item(index: int, item: dict[str, Any]) -> dict[str, Any]:
+            nonlocal completed
+            async with semaphore:
+                try:
+                    text, item_usage = await _async_generate_content(
+                        entry,
+                        item[CONF_PROMPT],
+                        filenames=item.get(CONF_FILENAMES, []),
+                        use_cache=call.data[CONF_CACHE],
+                        overrides={
+                            key: item[key] for key in BATCH_OVERRIDES if key in item
+                        },
+                    )
+                except HomeAssistantError as err:
+                    result: dict[str, Any] = {"error": str(err)}
+                else:
+                    result = {"text": text}
+                    for key in usage:
+                        usage[key] += item_usage.get(key, 0)
+            completed += 1
+            hass.bus.async_fire(
+                EVENT_BATCH_PROGRESS,
+                {
+                    "config_entry": entry.entry_id,
+                    "batch_id": batch_id,
+                    "index": index,
+                    "completed": completed,
+                    "total": total,
+                    "success": "error" not in result,
+                },
+            )
+            return result
+
+        results = await asyncio.gather(
+            *(run_item(index, item) for index, item in enumerate(items))
+        )
+        return {
+            "batch_id": batch_id,
+            "results": list(results),
+            "wall_time": round(time.monotonic() - started, 3),
+            "usage": usage,
         }
-        try:
-            response = await client.chat(payload)
-        except Exception as err:
-            raise HomeAssistantError(f"Error generating content: {err}") from err
-        if not response or "choices" not in response or not response["choices"]:
-            raise HomeAssistantError("No response from Mistral API")
-        return {"text": response["choices"][0]["message"]["content"]}
 
     hass.services.async_register(
         DOMAIN,
@@ -117,6 +245,31 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
                 ),
                 vol.Required(CONF_PROMPT): cv.string,
                 vol.Optional(CONF_FILENAMES, default=[]): vol.All(cv.ensure_list, [cv.string]),
+                vol.Optional(CONF_CACHE, default=True): cv.boolean,
+            }
+        ),
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GENERATE_CONTENT_BATCH,
+        send_prompt_batch,
+        schema=vol.Schema(
+            {
+                vol.Required("config_entry"): selector.ConfigEntrySelector(
+                    {"integration": DOMAIN}
+                ),
+                vol.Required(ATTR_PROMPTS): vol.All(
+                    cv.ensure_list, vol.Length(min=1), [BATCH_ITEM_SCHEMA]
+                ),
+                vol.Optional(ATTR_MAX_CONCURRENCY, default=DEFAULT_BATCH_CONCURRENCY): vol.All(
+                    vol.Coerce(int), vol.Range(min=1, max=MAX_BATCH_CONCURRENCY)
+                ),
+                vol.Optional(CONF_CACHE, default=True): cv.boolean,
+                vol.Optional(ATTR_MODE, default=MODE_REALTIME): vol.In(
+                    (MODE_REALTIME, MODE_JOB)
+                ),
             }
         ),
         supports_response=SupportsResponse.ONLY,
@@ -143,14 +296,412 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     return True
 
 
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+def _async_get_loaded_entry(hass: HomeAssistant, entry_id: str) -> MistralConfigEntry:
+    """Return a loaded Mistral config entry or raise a validation error."""
+    entry = hass.config_entries.async_get_entry(entry_id)
+    if (
+        entry is None
+        or entry.domain != DOMAIN
+        or entry.state is not ConfigEntryState.LOADED
+    ):
+        raise ServiceValidationError(
+            translation_domain=DOMAIN,
+            translation_key="invalid_config_entry",
+            translation_placeholders={"config_entry": entry_id},
+        )
+    return entry
+
+
+async def _async_build_payload(
+    entry: MistralConfigEntry,
+    options: dict[str, Any],
+    user_prompt: str,
+    filenames: list[str],
+) -> tuple[dict[str, Any], list[str]]:
+    """Build the chat completion payload of one prompt.
+
+    Returns the payload and the cache keys of its attachments.
+    """
+    runtime_data = entry.runtime_data
+    system_prompt = options.get(CONF_PROMPT, DEFAULT_SYSTEM_PROMPT)
+    attachment_keys: list[str] = []
+    user_content: str | list[dict[str, Any]] = user_prompt
+    if filenames:
+        user_content = [{"type": "text", "text": user_prompt}]
+        for filename in filenames:
+            key, part = await runtime_data.attachments.async_get_part(filename)
+            attachment_keys.append(key)
+            user_content.append(part)
+    model = options.get(CONF_CHAT_MODEL, RECOMMENDED_CHAT_MODEL)
+    if (
+        (info := runtime_data.models.get(model)) is not None
+        and not info.vision
+        and any(
+            part.get("type") == "image_url"
+            for part in user_content
+            if isinstance(part, dict)
+        )
+    ):
+        raise ServiceValidationError(
+            translation_domain=DOMAIN,
+            translation_key="model_without_vision",
+            translation_placeholders={"model": model},
+        )
+    payload = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_content},
+        ],
+        "max_tokens": options.get(CONF_MAX_TOKENS, RECOMMENDED_MAX_TOKENS),
+        "temperature": options.get(CONF_TEMPERATURE, RECOMMENDED_TEMPERATURE),
+        "top_p": options.get(CONF_TOP_P, RECOMMENDED_TOP_P),
+        "stream": False,
+    }
+    return payload, attachment_keys
+
+
+async def _async_generate_content(
+    entry: MistralConfigEntry,
+    user_prompt: str,
+    *,
+    filenames: list[str],
+    use_cache: bool,
+    overrides: dict[str, Any] | None = None,
+) -> tuple[str, dict[str, int]]:
+    """Generate a response for one prompt and return its text and usage."""
+    options = {**entry.options, **(overrides or {})}
+    runtime_data = entry.runtime_data
+    client = runtime_data.client
+    payload, attachment_keys = await _async_build_payload(
+        entry, options, user_prompt, filenames
+    )
+    system_message = payload["messages"][0]
+
+    cacheable = use_cache and (
+        payload["temperature"] == 0
+        or not options.get(
+            CONF_RESPONSE_CACHE_DETERMINISTIC_ONLY,
+            RECOMMENDED_RESPONSE_CACHE_DETERMINISTIC_ONLY,
+        )
+    )
+    cache = runtime_data.response_cache
+    cache_key: str | None = None
+    if cache is not None and cacheable:
+        # Attachments are keyed on path, mtime and size instead of
+        # hashing their encoded contents.
+        cache_key = payload_cache_key(
+            {
+                **payload,
+                "messages": [system_message, {"role": "user", "content": user_prompt}],
+                "attachments": attachment_keys,
+            }
+        )
+        if (text := cache.get(cache_key)) is not None:
+            return text, {}
+
+    semantic = runtime_data.semantic_cache
+    semantic_key: tuple[list[float], str] | None = None
+    if semantic is not None and cacheable and not filenames:
+        try:
+            embedding = (await client.embeddings([user_prompt]))[0]
+        except Exception as err:  # noqa: BLE001
+            LOGGER.debug("Could not embed prompt for the semantic cache: %s", err)
+        else:
+            semantic_key = (
+                embedding,
+                semantic_scope(
+                    user_prompt,
+                    **{key: value for key, value in payload.items() if key != "messages"},
+                    system=system_message["content"],
+                ),
+            )
+            if (text := semantic.get(*semantic_key)) is not None:
+                return text, {}
+
+    try:
+        response = await client.chat(payload, timeout=SERVICE_TIMEOUT)
+    except Exception as err:
+        raise HomeAssistantError(f"Error generating content: {err}") from err
+    if not response or "choices" not in response or not response["choices"]:
+        raise HomeAssistantError("No response from Mistral API")
+    text = response["choices"][0]["message"]["content"]
+    if cache_key is not None:
+        cache.set(cache_key, text)
+    if semantic is not None and semantic_key is not None:
+        semantic.set(*semantic_key, text, mentions=(user_prompt, text))
+    return text, response.get("usage") or {}
+
+
+async def _async_submit_batch_job(
+    entry: MistralConfigEntry, items: list[dict[str, Any]]
+) -> ServiceResponse:
+    """Submit prompts as one Batch API job, results arrive as an event."""
+    if any(CONF_CHAT_MODEL in item for item in items):
+        raise ServiceValidationError(
+            translation_domain=DOMAIN,
+            translation_key="batch_job_model_override",
+        )
+    bodies = []
+    model = entry.options.get(CONF_CHAT_MODEL, RECOMMENDED_CHAT_MODEL)
+    for item in items:
+        payload, _attachment_keys = await _async_build_payload(
+            entry,
+            {
+                **entry.options,
+                **{key: item[key] for key in BATCH_OVERRIDES if key in item},
+            },
+            item[CONF_PROMPT],
+            item.get(CONF_FILENAMES, []),
+        )
+        # The model is set once for the whole job.
+        del payload["model"], payload["stream"]
+        bodies.append(payload)
+    try:
+        job = await entry.runtime_data.batch_jobs.async_submit(bodies, model)
+    except Exception as err:
+        raise HomeAssistantError(f"Error submitting batch job: {err}") from err
+    return {"job_id": job["job_id"], "status": job["status"], "total": job["total"]}
+
+
+def _create_response_cache(entry: ConfigEntry) -> ResponseCache | None:
+    """Create the opt-in response cache of the generate_content service."""
+    options = entry.options
+    if not options.get(CONF_RESPONSE_CACHE, RECOMMENDED_RESPONSE_CACHE):
+        return None
+    return ResponseCache(
+        max_entries=int(
+            options.get(
+                CONF_RESPONSE_CACHE_MAX_ENTRIES, RECOMMENDED_RESPONSE_CACHE_MAX_ENTRIES
+            )
+        ),
+        ttl=float(options.get(CONF_RESPONSE_CACHE_TTL, RECOMMENDED_RESPONSE_CACHE_TTL)),
+        max_bytes=int(
+            options.get(
+                CONF_RESPONSE_CACHE_MAX_MEMORY, RECOMMENDED_RESPONSE_CACHE_MAX_MEMORY
+            )
+        )
+        * 1024,
+    )
+
+
+async def _async_create_semantic_cache(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> SemanticCache | None:
+    """Create the opt-in semantic cache of prompts and answers."""
+    options = entry.options
+    if not options.get(CONF_RESPONSE_CACHE_SEMANTIC, RECOMMENDED_RESPONSE_CACHE_SEMANTIC):
+        return None
+    # numpy is only imported when the semantic cache is enabled, and in the
+    # import executor since loading it would block the event loop.
+    semantic_cache = await hass.async_add_import_executor_job(
+        importlib.import_module, f"{__package__}.semantic_cache"
+    )
+    return semantic_cache.SemanticCache(
+        max_entries=int(
+            options.get(
+                CONF_RESPONSE_CACHE_MAX_ENTRIES, RECOMMENDED_RESPONSE_CACHE_MAX_ENTRIES
+            )
+        ),
+        ttl=float(options.get(CONF_RESPONSE_CACHE_TTL, RECOMMENDED_RESPONSE_CACHE_TTL)),
+        max_bytes=int(
+            options.get(
+                CONF_RESPONSE_CACHE_MAX_MEMORY, RECOMMENDED_RESPONSE_CACHE_MAX_MEMORY
+            )
+        )
+        * 1024,
+        threshold=float(
+            options.get(
+                CONF_RESPONSE_CACHE_SEMANTIC_THRESHOLD,
+                RECOMMENDED_RESPONSE_CACHE_SEMANTIC_THRESHOLD,
+            )
+        ),
+        is_entity=lambda entity_id: hass.states.get(entity_id) is not None,
+    )
+
+
+@callback
+def _async_track_semantic_entities(
+    hass: HomeAssistant, entry: MistralConfigEntry
+) -> CALLBACK_TYPE:
+    """Drop semantic cache answers when an entity they depend on changes.
+
+    The semantic cache can be turned on and off without a reload, so the
+    listener looks it up on every event.
+    """
+
+    @callback
+    def async_referenced(event_data: EventStateChangedData) -> bool:
+        return (
+            semantic_cache := entry.runtime_data.semantic_cache
+        ) is not None and semantic_cache.references(event_data["entity_id"])
+
+    @callback
+    def async_state_changed(event: Event[EventStateChangedData]) -> None:
+        if (semantic_cache := entry.runtime_data.semantic_cache) is not None:
+            semantic_cache.invalidate_entity(event.data["entity_id"])
+
+    return hass.bus.async_listen(
+        EVENT_STATE_CHANGED, async_state_changed, event_filter=async_referenced
+    )
+
+
+def _create_key_pool(hass: HomeAssistant, entry: ConfigEntry) -> KeyPool:
+    """Create the API key pool of an entry.
+
+    The pool holds the entry's own key, its additional keys and the keys of
+    the entries it shares. Every key gets the configured rate limits, so a
+    pool of n keys allows n times the throughput of one.
+    """
+    api_keys = [
+        entry.data.get(CONF_API_KEY),
+        *entry.options.get(CONF_ADDITIONAL_API_KEYS, []),
+        *(
+            other.data.get(CONF_API_KEY)
+            for entry_id in entry.options.get(CONF_POOL_ENTRIES, [])
+            if (other := hass.config_entries.async_get_entry(entry_id)) is not None
+            and other.domain == DOMAIN
+        ),
+    ]
+    requests_per_second = float(
+        entry.options.get(CONF_RATE_LIMIT_RPS, RECOMMENDED_RATE_LIMIT_RPS)
+    )
+    tokens_per_minute = float(
+        entry.options.get(CONF_RATE_LIMIT_TPM, RECOMMENDED_RATE_LIMIT_TPM)
+    )
+    return KeyPool(
+        get_pooled_key(api_key, requests_per_second, tokens_per_minute)
+        for api_key in api_keys
+        if api_key
+    )
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: MistralConfigEntry) -> bool:
     """Set up Mistral AI Conversation from a config entry."""
+    started = time.monotonic()
     api_key = entry.data.get(CONF_API_KEY)
-    entry.runtime_data = MistralClient(api_key, get_async_client(hass))
+    http2 = entry.options.get(CONF_HTTP2, RECOMMENDED_HTTP2)
+    if http2:
+        # Importing h2 would block the event loop. If it is missing the
+        # transport warns and uses HTTP/1.1.
+        with suppress(ImportError):
+            await hass.async_add_import_executor_job(
+                importlib.import_module, "h2.connection"
+            )
+    transport = create_http_transport(verify=get_default_context(), http2=http2)
+    # Clients of the helper cannot be closed directly, so the transport
+    # holding the connection pool is closed on unload instead.
+    http_client = create_async_httpx_client(
+        hass, auto_cleanup=False, transport=transport
+    )
+    key_pool = _create_key_pool(hass, entry)
+    metrics = MetricsRecorder()
+    client = MistralClient(
+        api_key,
+        http_client,
+        key_pool.primary.rate_limiter,
+        hedge=entry.options.get(CONF_HEDGE_REQUESTS, RECOMMENDED_HEDGE_REQUESTS),
+        metrics=metrics,
+        key_pool=key_pool,
+    )
+    entry.runtime_data = MistralRuntimeData(
+        client=client,
+        attachments=AttachmentCache(hass),
+        metrics=metrics,
+        batch_jobs=BatchJobManager(hass, entry, client),
+        response_cache=_create_response_cache(entry),
+        semantic_cache=await _async_create_semantic_cache(hass, entry),
+        models=dict(get_cached_models(api_key) or {}),
+        options=dict(entry.options),
+    )
+    entry.async_on_unload(transport.aclose)
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+
+    entry.async_on_unload(_async_track_semantic_entities(hass, entry))
+
+    async def async_load_models() -> None:
+        """Load the model limits without delaying the setup."""
+        try:
+            entry.runtime_data.models.update(await async_get_models(client))
+        except (httpx.HTTPError, TimeoutError) as err:
+            LOGGER.debug("Could not list Mistral models: %s", err)
+
+    async def async_warm_up() -> None:
+        """Open a connection so the first request skips DNS, TCP and TLS."""
+        warm_up_started = time.monotonic()
+        await client.warm_up(
+            entry.options.get(CONF_CHAT_MODEL, RECOMMENDED_CHAT_MODEL)
+        )
+        metrics.record_startup("warm_up_ms", time.monotonic() - warm_up_started)
+
+    @callback
+    def async_keep_warm(_now: datetime) -> None:
+        """Ping the API before the idle pooled connection expires."""
+        if (
+            entry.options.get(CONF_KEEP_WARM, RECOMMENDED_KEEP_WARM)
+            and time.monotonic() - client.last_used >= KEEP_WARM_IDLE
+        ):
+            entry.async_create_background_task(
+                hass,
+                client.warm_up(
+                    entry.options.get(CONF_CHAT_MODEL, RECOMMENDED_CHAT_MODEL)
+                ),
+                f"{DOMAIN}_keep_warm",
+            )
+
+    entry.async_create_background_task(
+        hass, async_load_models(), f"{DOMAIN}_load_models"
+    )
+    if entry.options.get(CONF_KEEP_WARM, RECOMMENDED_KEEP_WARM):
+        entry.async_create_background_task(hass, async_warm_up(), f"{DOMAIN}_warm_up")
+    # Registered either way, so keep-warm can be switched on without a reload.
+    entry.async_on_unload(
+        async_track_time_interval(
+            hass,
+            async_keep_warm,
+            timedelta(seconds=KEEP_WARM_INTERVAL),
+            name=f"{DOMAIN}_keep_warm",
+            cancel_on_shutdown=True,
+        )
+    )
+    await entry.runtime_data.batch_jobs.async_load()
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    metrics.record_startup("setup_ms", time.monotonic() - started)
+    LOGGER.debug(
+        "Set up Mistral AI entry %s in %s ms",
+        entry.title,
+        metrics.startup["setup_ms"],
+    )
     return True
 
 
-async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+async def _async_update_listener(
+    hass: HomeAssistant, entry: MistralConfigEntry
+) -> None:
+    """Apply changed options in place, reload only when that is not enough."""
+    runtime_data = entry.runtime_data
+    previous = runtime_data.options
+    if entry.data.get(CONF_API_KEY) != runtime_data.client.api_key or any(
+        previous.get(key) != entry.options.get(key) for key in RELOAD_OPTIONS
+    ):
+        await hass.config_entries.async_reload(entry.entry_id)
+        return
+    runtime_data.options = dict(entry.options)
+    client = runtime_data.client
+    client.key_pool = _create_key_pool(hass, entry)
+    client.rate_limiter = client.key_pool.primary.rate_limiter
+    client.hedge = entry.options.get(CONF_HEDGE_REQUESTS, RECOMMENDED_HEDGE_REQUESTS)
+    if any(
+        previous.get(key) != entry.options.get(key)
+        for key in {*previous, *entry.options}
+        if key.startswith(CONF_RESPONSE_CACHE)
+    ):
+        runtime_data.response_cache = _create_response_cache(entry)
+        runtime_data.semantic_cache = await _async_create_semantic_cache(hass, entry)
+    # Everything else, such as the model, prompt and sampling settings, is
+    # read from the options on every request.
+
+
+async def async_unload_entry(hass: HomeAssistant, entry: MistralConfigEntry) -> bool:
     """Unload Mistral AI."""
     return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
@@ -0,0 +1,105 @@
+"""File attachments for the Mistral AI Conversation integration."""
+
+# Modified by Louis Rokitta
+
+from __future__ import annotations
+
+import base64
+from mimetypes import guess_type
+import os
+from pathlib import Path
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+
+from .response_cache import ResponseCache
+
+MAX_ATTACHMENT_SIZE = 10 * 1024 * 1024
+# Multiple of three, so the base64 encodings of the chunks concatenate.
+READ_CHUNK_SIZE = 3 * 256 * 1024
+ATTACHMENT_CACHE_MAX_ENTRIES = 16
+ATTACHMENT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+ATTACHMENT_CACHE_TTL = 24 * 3600
+
+
+def _read_base64(path: Path) -> str:
+    """Read and base64-encode a file chunk by chunk (runs in the executor)."""
+    parts: list[bytes] = []
+    with path.open("rb") as file:
+        while chunk := file.read(READ_CHUNK_SIZE):
+            parts.append(base64.b64encode(chunk))
+    return b"".join(parts).decode("ascii")
+
+
+def _read_text(path: Path) -> str:
+    """Read a text file (runs in the executor)."""
+    return path.read_text(encoding="utf-8", errors="replace")
+
+
+class AttachmentCache:
+    """Encode files into Mistral message parts and remember the result.
+
+    Entries are keyed on path, modification time and size, so a changed
+    file is encoded again while an unchanged camera snapshot or document is
+    only read once.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._cache = ResponseCache(
+            max_entries=ATTACHMENT_CACHE_MAX_ENTRIES,
+            ttl=ATTACHMENT_CACHE_TTL,
+            max_bytes=ATTACHMENT_CACHE_MAX_BYTES,
+        )
+
+    async def async_get_part(self, file_path: str) -> tuple[str, dict[str, Any]]:
+        """Return the cache key and the Mistral content part of a file."""
+        if not self.hass.config.is_allowed_path(file_path):
+            raise HomeAssistantError(
+                f"Cannot read `{file_path}`, no access to path; "
+                "`allowlist_external_dirs` may need to be adjusted in "
+                "`configuration.yaml`"
+            )
+        path = Path(file_path)
+        try:
+            stat = await self.hass.async_add_executor_job(os.stat, path)
+        except OSError as err:
+            raise HomeAssistantError(f"Cannot read `{file_path}`: {err}") from err
+        if stat.st_size > MAX_ATTACHMENT_SIZE:
+            raise HomeAssistantError(
+                f"`{file_path}` is larger than {MAX_ATTACHMENT_SIZE // (1024 * 1024)} MiB"
+            )
+        key = f"{path}:{stat.st_mtime_ns}:{stat.st_size}"
+        if (part := self._cache.get(key)) is not None:
+            return key, part
+
+        mime_type, _ = guess_type(file_path)
+        if mime_type is None or not (
+            mime_type.startswith(("text/", "image/")) or mime_type == "application/pdf"
+        ):
+            raise HomeAssistantError(
+                f"Only images, PDF and text files are supported, got `{file_path}`"
+            )
+        try:
+            if mime_type.startswith("text/"):
+                text = await self.hass.async_add_executor_job(_read_text, path)
+                part = {"type": "text", "text": f"{path.name}:\n{text}"}
+                size = len(text)
+            else:
+                data = await self.hass.async_add_executor_job(_read_base64, path)
+                url = f"data:{mime_type};base64,{data}"
+                if mime_type == "application/pdf":
+                    part = {"type": "document_url", "document_url": url}
+                else:
+                    part = {"type": "image_url", "image_url": url}
+                size = len(url)
+        except OSError as err:
+            raise HomeAssistantError(f"Cannot read `{file_path}`: {err}") from err
+        self._cache.set(key, part, size=size)
+        return key, part
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return the cache counters."""
+        return self._cache.stats
@@ -0,0 +1,208 @@
+"""Batch API jobs for the Mistral AI Conversation integration."""
+
+# Modified by Louis Rokitta
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from typing import Any
+
+import httpx
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util.ulid import ulid_now
+
+from .const import DOMAIN, LOGGER
+from .mistral_client import (
+    RETRYABLE_STATUS_CODES,
+    MistralClient,
+    decode_batch_results,
+    encode_batch_requests,
+)
+
+EVENT_BATCH_JOB_COMPLETED = f"{DOMAIN}_batch_job_completed"
+
+STORAGE_VERSION = 1
+# Jobs usually take minutes to hours, so polling starts slow and backs off.
+POLL_INITIAL_DELAY = 30.0
+POLL_MAX_DELAY = 900.0
+POLL_BACKOFF = 2.0
+TERMINAL_STATUSES = frozenset({"SUCCESS", "FAILED", "TIMEOUT_EXCEEDED", "CANCELLED"})
+# Failed result downloads are retried on later polls, up to this many times.
+MAX_DOWNLOAD_ATTEMPTS = 5
+
+
+def _result_of(line: dict[str, Any] | None) -> tuple[dict[str, Any], dict[str, Any]]:
+    """Return the service result and usage of one batch output line."""
+    if line is None:
+        return {"error": "No result"}, {}
+    response = line.get("response") or {}
+    body = response.get("body") or {}
+    if isinstance(body, str):
+        try:
+            body = json.loads(body)
+        except ValueError:
+            pass
+    if not isinstance(body, dict):
+        # Not a JSON object, such as the error page of a proxy.
+        body = {"message": body}
+    if line.get("error") or response.get("status_code") != 200:
+        error = line.get("error") or body.get("message") or body
+        return {"error": str(error)}, {}
+    try:
+        text = body["choices"][0]["message"]["content"]
+    except (KeyError, IndexError, TypeError):
+        return {"error": "No response from Mistral API"}, {}
+    return {"text": text}, body.get("usage") or {}
+
+
+class BatchJobManager:
+    """Run bulk prompts as Mistral batch jobs.
+
+    A job is submitted as one JSONL file and polled with growing delays.
+    Jobs are stored, so polling resumes after a restart. When a job ends,
+    its results are fired as an event in the order of the prompts.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, entry: ConfigEntry, client: MistralClient
+    ) -> None:
+        self.hass = hass
+        self.entry = entry
+        self.client = client
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.batch_jobs.{entry.entry_id}"
+        )
+        self._jobs: dict[str, dict[str, Any]] = {}
+
+    @property
+    def jobs(self) -> list[dict[str, Any]]:
+        """Return the jobs that have not finished yet."""
+        return list(self._jobs.values())
+
+    async def async_load(self) -> None:
+        """Load stored jobs and resume polling them."""
+        data = await self._store.async_load() or {}
+        self._jobs = data.get("jobs", {})
+        for job_id in self._jobs:
+            self._async_track(job_id)
+
+    async def async_submit(
+        self, bodies: list[dict[str, Any]], model: str
+    ) -> dict[str, Any]:
+        """Upload request bodies as a batch job and start polling it."""
+        upload = await self.client.upload_file(
+            encode_batch_requests(bodies), f"{ulid_now()}.jsonl"
+        )
+        job = await self.client.create_batch_job(
+            upload["id"], model, metadata={"config_entry": self.entry.entry_id}
+        )
+        job_id = job["id"]
+        self._jobs[job_id] = {
+            "job_id": job_id,
+            "input_file": upload["id"],
+            "model": model,
+            "total": len(bodies),
+            "status": job.get("status", "QUEUED"),
+            "created": time.time(),
+        }
+        await self._async_save()
+        self._async_track(job_id)
+        return self._jobs[job_id]
+
+    @callback
+    def _async_track(self, job_id: str) -> None:
+        self.entry.async_create_background_task(
+            self.hass, self._async_poll(job_id), f"{DOMAIN}_batch_job_{job_id}"
+        )
+
+    async def _async_save(self) -> None:
+        await self._store.async_save({"jobs": self._jobs})
+
+    async def _async_poll(self, job_id: str) -> None:
+        """Poll a job until it ends, then deliver its results."""
+        delay = POLL_INITIAL_DELAY
+        while True:
+            await asyncio.sleep(delay)
+            delay = min(delay * POLL_BACKOFF, POLL_MAX_DELAY)
+            try:
+                job = await self.client.get_batch_job(job_id)
+            except httpx.HTTPStatusError as err:
+                if err.response.status_code in RETRYABLE_STATUS_CODES:
+                    continue
+                LOGGER.error("Could not poll Mistral batch job %s: %s", job_id, err)
+                await self._async_finish(job_id, {"status": "FAILED"})
+                return
+            except (httpx.HTTPError, TimeoutError) as err:
+                LOGGER.debug("Could not poll Mistral batch job %s: %s", job_id, err)
+                continue
+            status = job.get("status")
+            if status in TERMINAL_STATUSES:
+                if await self._async_finish(job_id, job):
+                    return
+                continue
+            if status != self._jobs[job_id]["status"]:
+                self._jobs[job_id]["status"] = status
+                await self._async_save()
+
+    async def _async_finish(self, job_id: str, job: dict[str, Any]) -> bool:
+        """Download the results of an ended job and fire them as an event.
+
+        Returns False, keeping the job stored, if a download failed and
+        should be retried on a later poll.
+        """
+        stored = self._jobs[job_id]
+        lines: dict[str, dict[str, Any]] = {}
+        for file_key in ("error_file", "output_file"):
+            if not (file_id := job.get(file_key)):
+                continue
+            try:
+                data = await self.client.download_file(file_id)
+            except (httpx.HTTPError, TimeoutError) as err:
+                attempts = stored.get("download_attempts", 0) + 1
+                missing = (
+                    isinstance(err, httpx.HTTPStatusError)
+                    and err.response.status_code == 404
+                )
+                if not missing and attempts < MAX_DOWNLOAD_ATTEMPTS:
+                    LOGGER.warning(
+                        "Could not download Mistral batch results %s, retrying: %s",
+                        file_id,
+                        err,
+                    )
+                    stored["download_attempts"] = attempts
+                    await self._async_save()
+                    return False
+                LOGGER.error(
+                    "Could not download Mistral batch results %s: %s", file_id, err
+                )
+                continue
+            try:
+                lines.update(decode_batch_results(data))
+            except ValueError as err:
+                LOGGER.error("Invalid Mistral batch results %s: %s", file_id, err)
+        results = []
+        usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        for index in range(stored["total"]):
+            result, line_usage = _result_of(lines.get(str(index)))
+            results.append(result)
+            for key in usage:
+                usage[key] += line_usage.get(key, 0)
+        self.hass.bus.async_fire(
+            EVENT_BATCH_JOB_COMPLETED,
+            {
+                "config_entry": self.entry.entry_id,
+                "job_id": job_id,
+                "status": job.get("status"),
+                "results": results,
+                "usage": usage,
+                "wall_time": round(time.time() - stored["created"], 3),
+            },
+        )
+        del self._jobs[job_id]
+        await self._async_save()
+        return True
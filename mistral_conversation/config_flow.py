@@ -6,10 +6,11 @@ from collections.abc import Mapping
 import logging
 from types import MappingProxyType
 from typing import Any
+import httpx
 import voluptuous as vol
-from voluptuous_openapi import convert
 from homeassistant.config_entries import (
     ConfigEntry,
+    ConfigEntryState,
     ConfigFlow,
     ConfigFlowResult,
     OptionsFlow,
@@ -20,6 +21,7 @@ from homeassistant.const import (
 )
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers import llm
+from homeassistant.helpers.httpx_client import get_async_client
 from homeassistant.helpers.selector import (
     NumberSelector,
     NumberSelectorConfig,
@@ -28,23 +30,70 @@ from homeassistant.helpers.selector import (
     SelectSelectorConfig,
     SelectSelectorMode,
     TemplateSelector,
+    TextSelector,
+    TextSelectorConfig,
+    TextSelectorType,
 )
 from homeassistant.helpers.typing import VolDictType
 from .mistral_client import MistralClient
+from .models import ModelInfo, async_get_models, chat_model_ids, get_cached_models
 from .const import (
+    CONF_ADDITIONAL_API_KEYS,
     CONF_CHAT_MODEL,
+    CONF_CONTEXT_BUDGET,
+    CONF_CONTEXT_SUMMARY,
+    CONF_FAST_MODEL,
+    CONF_HEDGE_REQUESTS,
+    CONF_HTTP2,
+    CONF_KEEP_WARM,
+    CONF_LOCAL_FIRST,
     CONF_MAX_TOKENS,
+    CONF_POOL_ENTRIES,
     CONF_PROMPT,
+    CONF_RATE_LIMIT_RPS,
+    CONF_RATE_LIMIT_TPM,
     CONF_REASONING_EFFORT,
     CONF_RECOMMENDED,
+    CONF_RESPONSE_CACHE,
+    CONF_RESPONSE_CACHE_DETERMINISTIC_ONLY,
+    CONF_RESPONSE_CACHE_MAX_ENTRIES,
+    CONF_RESPONSE_CACHE_MAX_MEMORY,
+    CONF_RESPONSE_CACHE_SEMANTIC,
+    CONF_RESPONSE_CACHE_SEMANTIC_THRESHOLD,
+    CONF_RESPONSE_CACHE_TTL,
+    CONF_ROUTING,
+    CONF_ROUTING_MAX_TOOL_CALLS,
+    CONF_ROUTING_MAX_WORDS,
     CONF_TEMPERATURE,
     CONF_TOP_P,
+    CONF_VOICE_MAX_TOKENS,
+    CONF_VOICE_MODE,
     DOMAIN,
     RECOMMENDED_CHAT_MODEL,
+    RECOMMENDED_CONTEXT_SUMMARY,
+    RECOMMENDED_FAST_MODEL,
+    RECOMMENDED_HEDGE_REQUESTS,
+    RECOMMENDED_HTTP2,
+    RECOMMENDED_KEEP_WARM,
+    RECOMMENDED_LOCAL_FIRST,
     RECOMMENDED_MAX_TOKENS,
+    RECOMMENDED_RATE_LIMIT_RPS,
+    RECOMMENDED_RATE_LIMIT_TPM,
     RECOMMENDED_REASONING_EFFORT,
+    RECOMMENDED_RESPONSE_CACHE,
+    RECOMMENDED_RESPONSE_CACHE_DETERMINISTIC_ONLY,
+    RECOMMENDED_RESPONSE_CACHE_MAX_ENTRIES,
+    RECOMMENDED_RESPONSE_CACHE_MAX_MEMORY,
+    RECOMMENDED_RESPONSE_CACHE_SEMANTIC,
+    RECOMMENDED_RESPONSE_CACHE_SEMANTIC_THRESHOLD,
+    RECOMMENDED_RESPONSE_CACHE_TTL,
+    RECOMMENDED_ROUTING,
+    RECOMMENDED_ROUTING_MAX_TOOL_CALLS,
+    RECOMMENDED_ROUTING_MAX_WORDS,
     RECOMMENDED_TEMPERATURE,
     RECOMMENDED_TOP_P,
+    RECOMMENDED_VOICE_MAX_TOKENS,
+    RECOMMENDED_VOICE_MODE,
     UNSUPPORTED_MODELS,
     WEB_SEARCH_MODELS,
 )
@@ -58,17 +107,23 @@ RECOMMENDED_OPTIONS = {
     CONF_PROMPT: llm.DEFAULT_INSTRUCTIONS_PROMPT,
 }
 
+# Options of the always visible part of the form, kept when the
+# recommended settings are toggled.
+_KEPT_ON_RECOMMENDED_TOGGLE = (
+    CONF_LOCAL_FIRST,
+    CONF_VOICE_MODE,
+    CONF_ADDITIONAL_API_KEYS,
+    CONF_POOL_ENTRIES,
+)
+
 async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> None:
-    """Validate the user input allows us to connect to Mistral."""
-    client = MistralClient(data[CONF_API_KEY])
-    # Mistral does not have a models endpoint, so we do a dummy chat call
-    payload = {
-        "model": RECOMMENDED_CHAT_MODEL,
-        "messages": [{"role": "user", "content": "ping"}],
-        "max_tokens": 1,
-        "stream": False,
-    }
-    await client.chat(payload)
+    """Validate the user input allows us to connect to Mistral.
+
+    Listing the models checks the key without spending tokens and fills
+    the model catalog cache for the options flow.
+    """
+    client = MistralClient(data[CONF_API_KEY], get_async_client(hass))
+    await async_get_models(client)
 
 class MistralConfigFlow(ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Mistral AI Conversation."""
@@ -79,9 +134,16 @@ class MistralConfigFlow(ConfigFlow, domain=DOMAIN):
         errors: dict[str, str] = {}
         try:
             await validate_input(self.hass, user_input)
+        except httpx.HTTPStatusError as err:
+            if err.response.status_code in (401, 403):
+                errors["base"] = "invalid_auth"
+            else:
+                errors["base"] = "cannot_connect"
+        except (httpx.HTTPError, TimeoutError):
+            errors["base"] = "cannot_connect"
         except Exception:
             _LOGGER.exception("Unexpected exception")
-            errors["base"] = "cannot_connect"
+            errors["base"] = "unknown"
         else:
             return self.async_create_entry(
                 title="Mistral AI",
@@ -100,32 +162,120 @@ class MistralOptionsFlow(OptionsFlow):
     async def async_step_init(self, user_input: dict[str, Any] | None = None) -> ConfigFlowResult:
         options: dict[str, Any] | MappingProxyType[str, Any] = self.config_entry.options
         errors: dict[str, str] = {}
+        models = await self._async_get_models()
         if user_input is not None:
             if user_input[CONF_RECOMMENDED] == self.last_rendered_recommended:
                 if not user_input.get(CONF_LLM_HASS_API):
                     user_input.pop(CONF_LLM_HASS_API, None)
-                if user_input.get(CONF_CHAT_MODEL) in UNSUPPORTED_MODELS:
-                    errors[CONF_CHAT_MODEL] = "model_not_supported"
+                model_keys = [CONF_CHAT_MODEL]
+                if user_input.get(CONF_ROUTING):
+                    model_keys.append(CONF_FAST_MODEL)
+                for key in model_keys:
+                    if (model := user_input.get(key)) is not None and (
+                        error := _validate_model(
+                            model, models, bool(user_input.get(CONF_LLM_HASS_API))
+                        )
+                    ):
+                        errors[key] = error
+                if not await self._async_validate_keys(
+                    user_input.get(CONF_ADDITIONAL_API_KEYS, [])
+                ):
+                    errors[CONF_ADDITIONAL_API_KEYS] = "invalid_auth"
                 if not errors:
                     return self.async_create_entry(title="", data=user_input)
             else:
                 self.last_rendered_recommended = user_input[CONF_RECOMMENDED]
                 options = {
+                    **{
+                        key: value
+                        for key, value in user_input.items()
+                        if key.startswith(CONF_RESPONSE_CACHE)
+                        or key in _KEPT_ON_RECOMMENDED_TOGGLE
+                    },
                     CONF_RECOMMENDED: user_input[CONF_RECOMMENDED],
                     CONF_PROMPT: user_input.get(CONF_PROMPT, llm.DEFAULT_INSTRUCTIONS_PROMPT),
                     CONF_LLM_HASS_API: user_input.get(CONF_LLM_HASS_API),
                 }
-        schema = mistral_config_option_schema(self.hass, options)
+        schema = mistral_config_option_schema(
+            self.hass, options, models, self.config_entry.entry_id
+        )
         return self.async_show_form(
             step_id="init",
             data_schema=vol.Schema(schema),
             errors=errors,
         )
 
-def mistral_config_option_schema(hass: HomeAssistant, options: Mapping[str, Any]) -> VolDictType:
+    def _client(self, api_key: str) -> MistralClient:
+        """Return a client for an API key.
+
+        While the entry is loaded its client, or at least its warm
+        connections, are reused instead of setting up new ones.
+        """
+        if self.config_entry.state is not ConfigEntryState.LOADED:
+            return MistralClient(api_key, get_async_client(self.hass))
+        client: MistralClient = self.config_entry.runtime_data.client
+        if client.api_key == api_key:
+            return client
+        return MistralClient(api_key, client.http_client)
+
+    async def _async_get_models(self) -> dict[str, ModelInfo]:
+        """Return the model catalog, or an empty one if it is unavailable."""
+        api_key = self.config_entry.data[CONF_API_KEY]
+        try:
+            return await async_get_models(self._client(api_key))
+        except (httpx.HTTPError, TimeoutError) as err:
+            _LOGGER.debug("Could not list Mistral models: %s", err)
+            return get_cached_models(api_key) or {}
+
+    async def _async_validate_keys(self, api_keys: list[str]) -> bool:
+        """Return whether the API accepts every additional key.
+
+        Keys that cannot be checked because Mistral is unreachable are
+        accepted, the key pool ejects them later if they do not work.
+        """
+        for api_key in api_keys:
+            try:
+                await async_get_models(self._client(api_key))
+            except httpx.HTTPStatusError as err:
+                if err.response.status_code in (401, 403):
+                    return False
+            except (httpx.HTTPError, TimeoutError) as err:
+                _LOGGER.debug("Could not check additional Mistral API key: %s", err)
+        return True
+
+
+def _validate_model(
+    model: str, models: Mapping[str, ModelInfo], tools: bool
+) -> str | None:
+    """Return the error key for an unusable model, if any.
+
+    Only models the catalog knows are checked. Names it does not list, such
+    as new models or aliases, are accepted.
+    """
+    if model in UNSUPPORTED_MODELS:
+        return "model_not_supported"
+    if (info := models.get(model)) is None:
+        return None
+    if not info.chat:
+        return "model_without_chat"
+    if tools and not info.function_calling:
+        return "model_without_tools"
+    return None
+
+def mistral_config_option_schema(
+    hass: HomeAssistant,
+    options: Mapping[str, Any],
+    models: Mapping[str, ModelInfo] | None = None,
+    entry_id: str | None = None,
+) -> VolDictType:
     hass_apis: list[SelectOptionDict] = [
         SelectOptionDict(label=api.name, value=api.id) for api in llm.async_get_apis(hass)
     ]
+    other_entries: list[SelectOptionDict] = [
+        SelectOptionDict(label=entry.title, value=entry.entry_id)
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        if entry.entry_id != entry_id
+    ]
     if (suggested_llm_apis := options.get(CONF_LLM_HASS_API)) and isinstance(suggested_llm_apis, str):
         suggested_llm_apis = [suggested_llm_apis]
     schema: VolDictType = {
@@ -137,21 +287,127 @@ def mistral_config_option_schema(hass: HomeAssistant, options: Mapping[str, Any]
             CONF_LLM_HASS_API,
             description={"suggested_value": suggested_llm_apis},
         ): SelectSelector(SelectSelectorConfig(options=hass_apis, multiple=True)),
+        vol.Optional(
+            CONF_LOCAL_FIRST,
+            default=options.get(CONF_LOCAL_FIRST, RECOMMENDED_LOCAL_FIRST),
+        ): bool,
+        vol.Optional(
+            CONF_VOICE_MODE,
+            default=options.get(CONF_VOICE_MODE, RECOMMENDED_VOICE_MODE),
+        ): bool,
+        vol.Optional(
+            CONF_RESPONSE_CACHE,
+            default=options.get(CONF_RESPONSE_CACHE, RECOMMENDED_RESPONSE_CACHE),
+        ): bool,
+        vol.Optional(
+            CONF_RESPONSE_CACHE_DETERMINISTIC_ONLY,
+            default=options.get(
+                CONF_RESPONSE_CACHE_DETERMINISTIC_ONLY,
+                RECOMMENDED_RESPONSE_CACHE_DETERMINISTIC_ONLY,
+            ),
+        ): bool,
+        vol.Optional(
+            CONF_RESPONSE_CACHE_SEMANTIC,
+            default=options.get(
+                CONF_RESPONSE_CACHE_SEMANTIC, RECOMMENDED_RESPONSE_CACHE_SEMANTIC
+            ),
+        ): bool,
+        vol.Optional(
+            CONF_RESPONSE_CACHE_SEMANTIC_THRESHOLD,
+            default=options.get(
+                CONF_RESPONSE_CACHE_SEMANTIC_THRESHOLD,
+                RECOMMENDED_RESPONSE_CACHE_SEMANTIC_THRESHOLD,
+            ),
+        ): NumberSelector(NumberSelectorConfig(min=0.5, max=1, step=0.01)),
+        vol.Optional(
+            CONF_RESPONSE_CACHE_MAX_ENTRIES,
+            default=options.get(
+                CONF_RESPONSE_CACHE_MAX_ENTRIES, RECOMMENDED_RESPONSE_CACHE_MAX_ENTRIES
+            ),
+        ): NumberSelector(NumberSelectorConfig(min=1, max=10000, step=1)),
+        vol.Optional(
+            CONF_RESPONSE_CACHE_TTL,
+            default=options.get(CONF_RESPONSE_CACHE_TTL, RECOMMENDED_RESPONSE_CACHE_TTL),
+        ): NumberSelector(
+            NumberSelectorConfig(min=1, max=604800, step=1, unit_of_measurement="s")
+        ),
+        vol.Optional(
+            CONF_RESPONSE_CACHE_MAX_MEMORY,
+            default=options.get(
+                CONF_RESPONSE_CACHE_MAX_MEMORY, RECOMMENDED_RESPONSE_CACHE_MAX_MEMORY
+            ),
+        ): NumberSelector(
+            NumberSelectorConfig(min=16, max=65536, step=16, unit_of_measurement="KiB")
+        ),
+        vol.Optional(
+            CONF_ADDITIONAL_API_KEYS,
+            description={"suggested_value": options.get(CONF_ADDITIONAL_API_KEYS)},
+        ): TextSelector(
+            TextSelectorConfig(type=TextSelectorType.PASSWORD, multiple=True)
+        ),
+        vol.Optional(
+            CONF_POOL_ENTRIES,
+            description={"suggested_value": options.get(CONF_POOL_ENTRIES)},
+        ): SelectSelector(SelectSelectorConfig(options=other_entries, multiple=True)),
         vol.Required(CONF_RECOMMENDED, default=options.get(CONF_RECOMMENDED, False)): bool,
     }
     if options.get(CONF_RECOMMENDED):
         return schema
+    # Offer the catalog in a dropdown, but still accept names it does not
+    # list yet; without a catalog the model is typed as free text.
+    model_selector: Any = (
+        SelectSelector(
+            SelectSelectorConfig(
+                options=chat_model_ids(models),
+                custom_value=True,
+                mode=SelectSelectorMode.DROPDOWN,
+            )
+        )
+        if models
+        else str
+    )
     schema.update({
         vol.Optional(
             CONF_CHAT_MODEL,
             description={"suggested_value": options.get(CONF_CHAT_MODEL)},
             default=RECOMMENDED_CHAT_MODEL,
-        ): str,
+        ): model_selector,
         vol.Optional(
             CONF_MAX_TOKENS,
             description={"suggested_value": options.get(CONF_MAX_TOKENS)},
             default=RECOMMENDED_MAX_TOKENS,
         ): int,
+        vol.Optional(
+            CONF_VOICE_MAX_TOKENS,
+            default=options.get(CONF_VOICE_MAX_TOKENS, RECOMMENDED_VOICE_MAX_TOKENS),
+        ): NumberSelector(NumberSelectorConfig(min=16, max=1000, step=1)),
+        vol.Optional(
+            CONF_ROUTING,
+            default=options.get(CONF_ROUTING, RECOMMENDED_ROUTING),
+        ): bool,
+        vol.Optional(
+            CONF_FAST_MODEL,
+            description={"suggested_value": options.get(CONF_FAST_MODEL)},
+            default=RECOMMENDED_FAST_MODEL,
+        ): model_selector,
+        vol.Optional(
+            CONF_ROUTING_MAX_WORDS,
+            default=options.get(CONF_ROUTING_MAX_WORDS, RECOMMENDED_ROUTING_MAX_WORDS),
+        ): NumberSelector(NumberSelectorConfig(min=1, max=200, step=1)),
+        vol.Optional(
+            CONF_ROUTING_MAX_TOOL_CALLS,
+            default=options.get(
+                CONF_ROUTING_MAX_TOOL_CALLS, RECOMMENDED_ROUTING_MAX_TOOL_CALLS
+            ),
+        ): NumberSelector(NumberSelectorConfig(min=0, max=20, step=1)),
+        vol.Optional(
+            CONF_CONTEXT_BUDGET,
+            description={"suggested_value": options.get(CONF_CONTEXT_BUDGET)},
+        ): int,
+        vol.Optional(
+            CONF_CONTEXT_SUMMARY,
+            default=options.get(CONF_CONTEXT_SUMMARY, RECOMMENDED_CONTEXT_SUMMARY),
+        ): bool,
         vol.Optional(
             CONF_TOP_P,
             description={"suggested_value": options.get(CONF_TOP_P)},
@@ -173,5 +429,25 @@ def mistral_config_option_schema(hass: HomeAssistant, options: Mapping[str, Any]
                 mode=SelectSelectorMode.DROPDOWN,
             )
         ),
+        vol.Optional(
+            CONF_RATE_LIMIT_RPS,
+            default=options.get(CONF_RATE_LIMIT_RPS, RECOMMENDED_RATE_LIMIT_RPS),
+        ): NumberSelector(NumberSelectorConfig(min=0.2, max=100, step=0.1)),
+        vol.Optional(
+            CONF_RATE_LIMIT_TPM,
+            default=options.get(CONF_RATE_LIMIT_TPM, RECOMMENDED_RATE_LIMIT_TPM),
+        ): NumberSelector(NumberSelectorConfig(min=1000, max=100000000, step=1000)),
+        vol.Optional(
+            CONF_HEDGE_REQUESTS,
+            default=options.get(CONF_HEDGE_REQUESTS, RECOMMENDED_HEDGE_REQUESTS),
+        ): bool,
+        vol.Optional(
+            CONF_HTTP2,
+            default=options.get(CONF_HTTP2, RECOMMENDED_HTTP2),
+        ): bool,
+        vol.Optional(
+            CONF_KEEP_WARM,
+            default=options.get(CONF_KEEP_WARM, RECOMMENDED_KEEP_WARM),
+        ): bool,
     })
     return schema
@@ -6,23 +6,72 @@ import logging
 DOMAIN = "mistral_ai_api"
 LOGGER: logging.Logger = logging.getLogger(__package__)
 
+CONF_ADDITIONAL_API_KEYS = "additional_api_keys"
+CONF_CACHE = "cache"
 CONF_CHAT_MODEL = "chat_model"
+CONF_CONTEXT_BUDGET = "context_budget"
+CONF_CONTEXT_SUMMARY = "context_summary"
+CONF_FAST_MODEL = "fast_model"
 CONF_FILENAMES = "filenames"
+CONF_HEDGE_REQUESTS = "hedge_requests"
+CONF_HTTP2 = "http2"
+CONF_KEEP_WARM = "keep_warm"
+CONF_LOCAL_FIRST = "local_first"
 CONF_MAX_TOKENS = "max_tokens"
+CONF_POOL_ENTRIES = "pool_entries"
 CONF_PROMPT = "prompt"
+CONF_RATE_LIMIT_RPS = "rate_limit_rps"
+CONF_RATE_LIMIT_TPM = "rate_limit_tpm"
 CONF_REASONING_EFFORT = "reasoning_effort"
 CONF_RECOMMENDED = "recommended"
+CONF_ROUTING = "routing"
+CONF_ROUTING_MAX_TOOL_CALLS = "routing_max_tool_calls"
+CONF_ROUTING_MAX_WORDS = "routing_max_words"
+CONF_RESPONSE_CACHE = "response_cache"
+CONF_RESPONSE_CACHE_DETERMINISTIC_ONLY = "response_cache_deterministic_only"
+CONF_RESPONSE_CACHE_MAX_ENTRIES = "response_cache_max_entries"
+CONF_RESPONSE_CACHE_MAX_MEMORY = "response_cache_max_memory"
+CONF_RESPONSE_CACHE_SEMANTIC = "response_cache_semantic"
+CONF_RESPONSE_CACHE_SEMANTIC_THRESHOLD = "response_cache_semantic_threshold"
+CONF_RESPONSE_CACHE_TTL = "response_cache_ttl"
 CONF_TEMPERATURE = "temperature"
 CONF_TOP_P = "top_p"
+CONF_VOICE_MAX_TOKENS = "voice_max_tokens"
+CONF_VOICE_MODE = "voice_mode"
 
 RECOMMENDED_CHAT_MODEL = "mistral-medium"
+RECOMMENDED_CONTEXT_BUDGET = 8000  # input tokens
+RECOMMENDED_CONTEXT_SUMMARY = True
+RECOMMENDED_FAST_MODEL = "mistral-small-latest"
+RECOMMENDED_HEDGE_REQUESTS = False
+RECOMMENDED_HTTP2 = False
+RECOMMENDED_KEEP_WARM = False
+RECOMMENDED_LOCAL_FIRST = False
 RECOMMENDED_MAX_TOKENS = 150
+RECOMMENDED_RATE_LIMIT_RPS = 5.0
+RECOMMENDED_RATE_LIMIT_TPM = 500000
 RECOMMENDED_REASONING_EFFORT = "low"
+RECOMMENDED_RESPONSE_CACHE = False
+RECOMMENDED_RESPONSE_CACHE_DETERMINISTIC_ONLY = True
+RECOMMENDED_RESPONSE_CACHE_MAX_ENTRIES = 128
+RECOMMENDED_RESPONSE_CACHE_MAX_MEMORY = 1024  # KiB
+RECOMMENDED_RESPONSE_CACHE_SEMANTIC = False
+RECOMMENDED_RESPONSE_CACHE_SEMANTIC_THRESHOLD = 0.92  # cosine similarity
+RECOMMENDED_RESPONSE_CACHE_TTL = 3600  # seconds
+RECOMMENDED_ROUTING = False
+RECOMMENDED_ROUTING_MAX_TOOL_CALLS = 2
+RECOMMENDED_ROUTING_MAX_WORDS = 12
 RECOMMENDED_TEMPERATURE = 1.0
 RECOMMENDED_TOP_P = 1.0
+RECOMMENDED_VOICE_MAX_TOKENS = 80
+RECOMMENDED_VOICE_MODE = False
 DEFAULT_SYSTEM_PROMPT = (
     "You are a Home Assistant smart home AI. Only respond with Home Assistant compatible commands."
 )
+VOICE_MODE_PROMPT = (
+    "Your answer will be spoken aloud. Answer in one to three short sentences. "
+    "Do not use lists, tables, markdown, emojis or links."
+)
 
 # Mistral unterstützt keine Websuche, daher deaktiviert
 CONF_WEB_SEARCH = "web_search"
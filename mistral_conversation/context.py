@@ -0,0 +1,190 @@
+"""Context window management for the Mistral AI Conversation integration."""
+
+# Modified by Louis Rokitta
+
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from .const import LOGGER
+from .metrics import SITE_SUMMARY
+from .mistral_client import EncodedMessages, MistralClient
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+
+# Roughly four bytes of JSON per token for the Mistral tokenizers, plus the
+# per-message role and separator overhead.
+BYTES_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+MAX_TRACKED_CONVERSATIONS = 32
+SUMMARY_MAX_TOKENS = 256
+
+SUMMARY_INSTRUCTIONS = (
+    "Summarize the conversation below between a user and a smart home "
+    "assistant in a few short sentences. Keep names, devices, decisions and "
+    "open questions. Reply with the summary only."
+)
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+
+
+def estimate_tokens(text: str | bytes) -> int:
+    """Estimate the token count of a text without running a tokenizer."""
+    if isinstance(text, str):
+        text = text.encode("utf-8")
+    return len(text) // BYTES_PER_TOKEN + 1
+
+
+def _estimate_message(encoded: bytes) -> int:
+    return len(encoded) // BYTES_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+
+
+@dataclass(slots=True)
+class _ConversationSummary:
+    """Rolling summary of the turns that no longer fit the budget."""
+
+    text: str = ""
+    covered: int = 0
+    task: asyncio.Task[None] | None = None
+
+
+class ContextManager:
+    """Fit conversation messages into an input token budget.
+
+    The system prompt and the most recent turns are always kept. Older turns
+    are dropped from the request and folded into a rolling summary by a
+    background task, so the live turn never waits for summarization and
+    picks up the new summary on a later turn.
+    """
+
+    def __init__(self, hass: HomeAssistant, client: MistralClient) -> None:
+        self.hass = hass
+        self.client = client
+        self._summaries: OrderedDict[str, _ConversationSummary] = OrderedDict()
+
+    def fit(
+        self,
+        conversation_id: str,
+        messages: EncodedMessages,
+        budget: int,
+        model: str,
+        *,
+        reserved_tokens: int = 0,
+        summarize: bool = True,
+    ) -> EncodedMessages:
+        """Return the messages trimmed to the budget."""
+        prefix = 0
+        while prefix < len(messages) and messages[prefix].get("role") == "system":
+            prefix += 1
+        costs = [_estimate_message(encoded) for encoded in messages.encoded]
+        available = budget - reserved_tokens - sum(costs[:prefix])
+
+        summary = self._summaries.get(conversation_id)
+        summary_message: dict[str, Any] | None = None
+        if summary is not None and summary.text:
+            summary_message = {"role": "system", "content": SUMMARY_PREFIX + summary.text}
+            available -= estimate_tokens(summary_message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+        if sum(costs[prefix:]) <= available:
+            return messages
+
+        # Only cut in front of a user message so tool calls stay together
+        # with their results.
+        cut = None
+        remaining = sum(costs[prefix:])
+        for index in range(prefix, len(messages)):
+            if messages[index].get("role") == "user" and remaining <= available:
+                cut = index
+                break
+            remaining -= costs[index]
+        if cut is None:
+            cut = next(
+                (
+                    index
+                    for index in range(len(messages) - 1, prefix - 1, -1)
+                    if messages[index].get("role") == "user"
+                ),
+                prefix,
+            )
+
+        if summarize:
+            self._async_schedule_summary(conversation_id, messages, prefix, cut, model)
+        trimmed = EncodedMessages(messages[:prefix], messages.encoded[:prefix])
+        start = cut
+        if summary_message is not None:
+            trimmed.append(summary_message)
+            # Turns the summary already covers are not sent again.
+            if summary.covered < len(messages):
+                start = max(cut, summary.covered)
+        trimmed.extend_encoded(messages[start:], messages.encoded[start:])
+        LOGGER.debug(
+            "Trimmed conversation %s from %s to %s messages",
+            conversation_id,
+            len(messages),
+            len(trimmed),
+        )
+        return trimmed
+
+    def _async_schedule_summary(
+        self,
+        conversation_id: str,
+        messages: list[dict[str, Any]],
+        prefix: int,
+        cut: int,
+        model: str,
+    ) -> None:
+        summary = self._summaries.setdefault(conversation_id, _ConversationSummary())
+        self._summaries.move_to_end(conversation_id)
+        while len(self._summaries) > MAX_TRACKED_CONVERSATIONS:
+            _, dropped = self._summaries.popitem(last=False)
+            if dropped.task is not None:
+                dropped.task.cancel()
+        start = max(summary.covered, prefix)
+        if cut <= start or (summary.task is not None and not summary.task.done()):
+            return
+        summary.task = self.hass.async_create_background_task(
+            self._async_summarize(summary, messages[start:cut], cut, model),
+            f"mistral summarize {conversation_id}",
+        )
+
+    async def _async_summarize(
+        self,
+        summary: _ConversationSummary,
+        messages: list[dict[str, Any]],
+        covered: int,
+        model: str,
+    ) -> None:
+        lines = [f"Previous summary: {summary.text}"] if summary.text else []
+        for message in messages:
+            content = message.get("content")
+            if message.get("role") in ("user", "assistant") and content:
+                lines.append(f"{message['role']}: {content}")
+        payload = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": SUMMARY_INSTRUCTIONS},
+                {"role": "user", "content": "\n".join(lines)},
+            ],
+            "max_tokens": SUMMARY_MAX_TOKENS,
+            "temperature": 0,
+            "stream": False,
+        }
+        try:
+            response = await self.client.chat(payload, site=SITE_SUMMARY)
+            text = response["choices"][0]["message"]["content"]
+        except Exception as err:  # noqa: BLE001
+            LOGGER.warning("Could not summarize conversation history: %s", err)
+            return
+        if isinstance(text, str) and text:
+            summary.text = text.strip()
+            summary.covered = covered
+
+    def clear(self) -> None:
+        """Cancel pending summaries and forget all conversations."""
+        for summary in self._summaries.values():
+            if summary.task is not None:
+                summary.task.cancel()
+        self._summaries.clear()
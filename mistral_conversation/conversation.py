@@ -1,36 +1,86 @@
 # Modified by Louis Rokitta
-from collections.abc import AsyncGenerator, Callable
+from collections.abc import AsyncGenerator, AsyncIterator, Callable, Mapping
+import importlib
 import json
-from typing import Any, Literal, cast
+import re
+import secrets
+from typing import TYPE_CHECKING, Any, Literal, cast
 
-from homeassistant.components import assist_pipeline, conversation
+from voluptuous_openapi import convert
+
+from homeassistant.components import conversation
+from homeassistant.components.homeassistant.exposed_entities import (
+    async_should_expose,
+)
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_LLM_HASS_API, MATCH_ALL
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import HomeAssistantError
-from homeassistant.helpers import device_registry as dr, intent, llm
+from homeassistant.helpers import device_registry as dr, intent, llm, template
 from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
 
 from . import MistralClient
+from .context import ContextManager, estimate_tokens
+from .history import MessageHistoryCache
+from .metrics import MODEL_LOCAL, SITE_CONVERSATION
+from .models import context_budget
+from .mistral_client import CONVERSATION_TIMEOUT, SEMANTIC_LOOKUP_TIMEOUT
+from .response_cache import semantic_scope
+from .router import (
+    ROUTE_EMPTY,
+    ROUTE_ERROR,
+    ROUTE_FIXED,
+    ROUTE_LOCAL_INTENT,
+    ROUTE_TOOL_HEAVY,
+    ModelRouter,
+    Route,
+    TooManyToolCalls,
+)
+from .tool_specs import ToolSpecCache
 from .const import (
     CONF_CHAT_MODEL,
+    CONF_CONTEXT_BUDGET,
+    CONF_CONTEXT_SUMMARY,
+    CONF_FAST_MODEL,
+    CONF_LOCAL_FIRST,
     CONF_MAX_TOKENS,
     CONF_PROMPT,
     CONF_REASONING_EFFORT,
+    CONF_ROUTING,
+    CONF_ROUTING_MAX_TOOL_CALLS,
+    CONF_ROUTING_MAX_WORDS,
     CONF_TEMPERATURE,
     CONF_TOP_P,
+    CONF_VOICE_MAX_TOKENS,
+    CONF_VOICE_MODE,
     DOMAIN,
     LOGGER,
     RECOMMENDED_CHAT_MODEL,
+    RECOMMENDED_CONTEXT_SUMMARY,
+    RECOMMENDED_FAST_MODEL,
+    RECOMMENDED_LOCAL_FIRST,
     RECOMMENDED_MAX_TOKENS,
     RECOMMENDED_REASONING_EFFORT,
+    RECOMMENDED_ROUTING,
+    RECOMMENDED_ROUTING_MAX_TOOL_CALLS,
+    RECOMMENDED_ROUTING_MAX_WORDS,
     RECOMMENDED_TEMPERATURE,
     RECOMMENDED_TOP_P,
+    RECOMMENDED_VOICE_MAX_TOKENS,
+    RECOMMENDED_VOICE_MODE,
     DEFAULT_SYSTEM_PROMPT,
+    VOICE_MODE_PROMPT,
 )
 
+if TYPE_CHECKING:
+    from hassil.recognize import RecognizeResult
+
 MAX_TOOL_ITERATIONS = 3
 
+# End of a sentence: closing punctuation followed by whitespace, full-width
+# punctuation or a line break.
+_SENTENCE_BOUNDARY = re.compile(r"[.!?…]+[\"'”’)\]]*\s+|[。！？]+|\n+")
+
 async def async_setup_entry(
     hass: HomeAssistant,
     config_entry: ConfigEntry,
@@ -40,31 +90,234 @@ async def async_setup_entry(
     async_add_entities([agent])
 
 
+def _format_tool(
+    tool: llm.Tool, custom_serializer: Callable[[Any], Any] | None
+) -> dict[str, Any]:
+    """Format a Home Assistant LLM tool as a Mistral function spec."""
+    function: dict[str, Any] = {
+        "name": tool.name,
+        "parameters": convert(tool.parameters, custom_serializer=custom_serializer),
+    }
+    if tool.description:
+        function["description"] = tool.description
+    return {"type": "function", "function": function}
+
+
 def _convert_content_to_param(content: conversation.Content) -> list[dict]:
     messages = []
-    if content.content:
-        role = content.role
-        if role == "system":
-            role = "system"
-        elif role == "user":
-            role = "user"
-        elif role == "assistant":
-            role = "assistant"
-        else:
-            role = "user"
+    if isinstance(content, conversation.ToolResultContent):
+        messages.append(
+            {
+                "role": "tool",
+                "name": content.tool_name,
+                "tool_call_id": content.tool_call_id,
+                "content": json.dumps(content.tool_result),
+            }
+        )
+    elif isinstance(content, conversation.AssistantContent):
+        if content.content or content.tool_calls:
+            message: dict[str, Any] = {
+                "role": "assistant",
+                "content": content.content or "",
+            }
+            if content.tool_calls:
+                message["tool_calls"] = [
+                    {
+                        "id": tool_call.id,
+                        "type": "function",
+                        "function": {
+                            "name": tool_call.tool_name,
+                            "arguments": json.dumps(tool_call.tool_args),
+                        },
+                    }
+                    for tool_call in content.tool_calls
+                ]
+            messages.append(message)
+    elif content.content:
+        role = "system" if content.role == "system" else "user"
         messages.append({"role": role, "content": content.content})
     return messages
 
 
+def _local_intent_uncertain(result: "RecognizeResult") -> bool:
+    """Filter out local matches that left part of the sentence unresolved."""
+    return bool(result.unmatched_entities)
+
+
+def _parse_tool_call(tool_call: dict[str, Any]) -> llm.ToolInput:
+    """Parse an accumulated Mistral tool call into a tool input."""
+    function = tool_call.get("function", {})
+    arguments = function.get("arguments") or {}
+    if isinstance(arguments, str):
+        try:
+            arguments = json.loads(arguments) if arguments.strip() else {}
+        except json.JSONDecodeError as err:
+            raise HomeAssistantError(
+                f"Mistral returned invalid tool arguments: {arguments}"
+            ) from err
+    return llm.ToolInput(
+        id=tool_call.get("id") or secrets.token_hex(5)[:9],
+        tool_name=function.get("name", ""),
+        tool_args=arguments,
+    )
+
+
+def _delta_text(content: Any) -> str:
+    """Return the plain text of a streamed delta content field."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            part.get("text", "") for part in content if isinstance(part, dict)
+        )
+    return ""
+
+
+async def _transform_stream(
+    stream: AsyncIterator[dict[str, Any]],
+) -> AsyncGenerator[conversation.AssistantContentDeltaDict]:
+    """Transform Mistral stream chunks into chat log deltas.
+
+    Each tool call is handed to the chat log as soon as the next one starts.
+    The chat log starts every tool call as its own task when it receives it,
+    so independent calls of one turn run concurrently instead of one after
+    another.
+    """
+    started = False
+    pending: dict[str, Any] | None = None
+    pending_index: int | None = None
+    async for chunk in stream:
+        choices = chunk.get("choices")
+        if not choices:
+            continue
+        if not started:
+            yield {"role": "assistant"}
+            started = True
+        delta = choices[0].get("delta", {})
+        if text := _delta_text(delta.get("content")):
+            yield {"content": text}
+        for tool_delta in delta.get("tool_calls") or ():
+            index = tool_delta.get("index")
+            call_id = tool_delta.get("id")
+            # Mistral may send several complete calls with the same index,
+            # so a new id also starts a new call.
+            if (
+                pending is None
+                or index != pending_index
+                or (call_id and pending["id"] not in (None, call_id))
+            ):
+                if pending is not None:
+                    yield {"tool_calls": [_parse_tool_call(pending)]}
+                pending = {"id": None, "function": {"name": "", "arguments": ""}}
+                pending_index = index
+            if call_id:
+                pending["id"] = call_id
+            function = tool_delta.get("function", {})
+            if function.get("name"):
+                pending["function"]["name"] += function["name"]
+            arguments = function.get("arguments")
+            if isinstance(arguments, dict):
+                pending["function"]["arguments"] = arguments
+            elif arguments:
+                pending["function"]["arguments"] += arguments
+    if pending is not None:
+        yield {"tool_calls": [_parse_tool_call(pending)]}
+
+
+async def _flush_sentences(
+    stream: AsyncIterator[conversation.AssistantContentDeltaDict],
+) -> AsyncGenerator[conversation.AssistantContentDeltaDict]:
+    """Regroup streamed text into whole sentences.
+
+    Text is held back until a sentence ends and is then handed on in one
+    delta, so a streaming TTS engine gets each sentence as soon as it is
+    complete rather than word fragments. The rest is flushed before a tool
+    call and when the stream ends.
+    """
+    buffer = ""
+    async for delta in stream:
+        if "content" not in delta:
+            if buffer:
+                yield {"content": buffer}
+                buffer = ""
+            yield delta
+            continue
+        buffer += delta["content"]
+        end = None
+        for end in _SENTENCE_BOUNDARY.finditer(buffer):
+            pass
+        if end is not None:
+            yield {"content": buffer[: end.end()]}
+            buffer = buffer[end.end() :]
+    if buffer:
+        yield {"content": buffer}
+
+
+def _is_voice_turn(
+    options: Mapping[str, Any], user_input: conversation.ConversationInput
+) -> bool:
+    """Return whether a turn gets the short, spoken answer profile.
+
+    Voice satellites and other devices pass their device id, typed chat
+    does not.
+    """
+    return bool(options.get(CONF_VOICE_MODE, RECOMMENDED_VOICE_MODE)) and (
+        user_input.device_id is not None
+    )
+
+
+def _max_tokens(options: Mapping[str, Any], voice: bool, tools: bool) -> int:
+    """Return the answer token limit of a turn.
+
+    The shorter voice limit is not used while tools are offered: any
+    response may turn out to be a tool call, whose arguments must not be
+    cut off. The voice prompt still asks for a short answer.
+    """
+    if voice and not tools:
+        return int(options.get(CONF_VOICE_MAX_TOKENS, RECOMMENDED_VOICE_MAX_TOKENS))
+    return options.get(CONF_MAX_TOKENS, RECOMMENDED_MAX_TOKENS)
+
+
+def _exposed_entity_ids(hass: HomeAssistant, assistant: str) -> set[str]:
+    """Return the ids of the entities exposed to an assistant."""
+    return {
+        state.entity_id
+        for state in hass.states.async_all()
+        if async_should_expose(hass, assistant, state.entity_id)
+    }
+
+
+def _create_router(entry: ConfigEntry) -> ModelRouter | None:
+    """Create the model router if routing is enabled."""
+    options = entry.options
+    if not options.get(CONF_ROUTING, RECOMMENDED_ROUTING):
+        return None
+    return ModelRouter(
+        options.get(CONF_CHAT_MODEL, RECOMMENDED_CHAT_MODEL),
+        options.get(CONF_FAST_MODEL, RECOMMENDED_FAST_MODEL),
+        int(options.get(CONF_ROUTING_MAX_WORDS, RECOMMENDED_ROUTING_MAX_WORDS)),
+        int(
+            options.get(
+                CONF_ROUTING_MAX_TOOL_CALLS, RECOMMENDED_ROUTING_MAX_TOOL_CALLS
+            )
+        ),
+        entry.runtime_data.metrics,
+    )
+
+
 class MistralConversationEntity(
     conversation.ConversationEntity, conversation.AbstractConversationAgent
 ):
     _attr_has_entity_name = True
     _attr_name = None
-    _attr_supports_streaming = False
+    _attr_supports_streaming = True
 
     def __init__(self, entry: ConfigEntry) -> None:
         self.entry = entry
+        self._history = MessageHistoryCache(_convert_content_to_param)
+        self._context: ContextManager | None = None
+        self._tool_specs: ToolSpecCache | None = None
+        self._router = _create_router(entry)
         self._attr_unique_id = entry.entry_id
         self._attr_device_info = dr.DeviceInfo(
             identifiers={(DOMAIN, entry.entry_id)},
@@ -84,6 +337,15 @@ class MistralConversationEntity(
 
     async def async_added_to_hass(self) -> None:
         await super().async_added_to_hass()
+        self._context = ContextManager(self.hass, self.entry.runtime_data.client)
+        self._tool_specs = ToolSpecCache(self.hass, _format_tool)
+        self.async_on_remove(self._tool_specs.async_setup())
+        # assist_pipeline pulls in the STT, TTS and wake word components, so
+        # it is imported when the entity is added, in the import executor,
+        # instead of with this platform.
+        assist_pipeline = await self.hass.async_add_import_executor_job(
+            importlib.import_module, "homeassistant.components.assist_pipeline"
+        )
         assist_pipeline.async_migrate_engine(
             self.hass, "conversation", self.entry.entry_id, self.entity_id
         )
@@ -94,6 +356,8 @@ class MistralConversationEntity(
 
     async def async_will_remove_from_hass(self) -> None:
         conversation.async_unset_agent(self.hass, self.entry)
+        if self._context is not None:
+            self._context.clear()
         await super().async_will_remove_from_hass()
 
     async def _async_handle_message(
@@ -102,16 +366,39 @@ class MistralConversationEntity(
         chat_log: conversation.ChatLog,
     ) -> conversation.ConversationResult:
         options = self.entry.options
+        if options.get(CONF_LOCAL_FIRST, RECOMMENDED_LOCAL_FIRST) and (
+            result := await self._async_handle_local_intent(user_input, chat_log)
+        ):
+            return result
+        voice = _is_voice_turn(options, user_input)
+        prompt = options.get(CONF_PROMPT, DEFAULT_SYSTEM_PROMPT)
+        if voice:
+            prompt = f"{prompt}\n{VOICE_MODE_PROMPT}"
         try:
             await chat_log.async_update_llm_data(
                 DOMAIN,
                 user_input,
                 options.get(CONF_LLM_HASS_API),
-                options.get(CONF_PROMPT, DEFAULT_SYSTEM_PROMPT),
+                prompt,
             )
         except conversation.ConverseError as err:
             return err.as_conversation_result()
-        await self._async_handle_chat_log(chat_log)
+        semantic_key = await self._async_semantic_key(chat_log, prompt, voice)
+        semantic = self.entry.runtime_data.semantic_cache
+        if (
+            semantic is not None
+            and semantic_key is not None
+            and (cached := semantic.get(*semantic_key)) is not None
+        ):
+            chat_log.async_add_assistant_content_without_tools(
+                conversation.AssistantContent(
+                    agent_id=user_input.agent_id, content=cached
+                )
+            )
+        else:
+            await self._async_handle_chat_log(chat_log, voice)
+            if semantic is not None and semantic_key is not None:
+                self._async_semantic_store(chat_log, semantic_key)
         intent_response = intent.IntentResponse(language=user_input.language)
         last_assistant = None
         for c in reversed(chat_log.content):
@@ -128,36 +415,235 @@ class MistralConversationEntity(
             continue_conversation=chat_log.continue_conversation,
         )
 
-    async def _async_handle_chat_log(self, chat_log: conversation.ChatLog) -> None:
+    async def _async_semantic_key(
+        self, chat_log: conversation.ChatLog, prompt: str, voice: bool = False
+    ) -> tuple[list[float], str] | None:
+        """Return the embedding and scope for a semantic cache lookup.
+
+        Only the first turn of a conversation is looked up, later turns
+        depend on what was said before. The scope holds the prompt as
+        configured, the rendered one changes with the time of every turn.
+        Prompts with templates are not looked up, they may render states
+        that the cached answer depends on.
+        """
+        if self.entry.runtime_data.semantic_cache is None:
+            return None
+        if template.is_template_string(prompt):
+            return None
+        contents = chat_log.content
+        if (
+            len(contents) != 2
+            or not isinstance(contents[0], conversation.SystemContent)
+            or not isinstance(contents[1], conversation.UserContent)
+        ):
+            return None
+        text = contents[1].content
+        options = self.entry.options
+        try:
+            embedding = (
+                await self.entry.runtime_data.client.embeddings(
+                    [text], timeout=SEMANTIC_LOOKUP_TIMEOUT
+                )
+            )[0]
+        except Exception as err:  # noqa: BLE001
+            LOGGER.debug("Could not embed prompt for the semantic cache: %s", err)
+            return None
+        return embedding, semantic_scope(
+            text,
+            site=SITE_CONVERSATION,
+            system=prompt,
+            llm_api=options.get(CONF_LLM_HASS_API),
+            model=options.get(CONF_CHAT_MODEL, RECOMMENDED_CHAT_MODEL),
+            max_tokens=_max_tokens(options, voice, bool(chat_log.llm_api)),
+            temperature=options.get(CONF_TEMPERATURE, RECOMMENDED_TEMPERATURE),
+            top_p=options.get(CONF_TOP_P, RECOMMENDED_TOP_P),
+        )
+
+    def _async_semantic_store(
+        self, chat_log: conversation.ChatLog, key: tuple[list[float], str]
+    ) -> None:
+        """Cache the answer of a first turn that did not call any tools."""
+        semantic = self.entry.runtime_data.semantic_cache
+        added = chat_log.content[2:]
+        if (
+            semantic is None
+            or len(added) != 1
+            or not isinstance(answer := added[0], conversation.AssistantContent)
+            or answer.tool_calls
+            or not answer.content
+        ):
+            return
+        question = cast(conversation.UserContent, chat_log.content[1])
+        entity_ids: set[str] = set()
+        if chat_log.llm_api is not None:
+            # The answer may be derived from the states the API gave the
+            # model without naming any entity, so every exposed entity
+            # invalidates it.
+            entity_ids = _exposed_entity_ids(
+                self.hass,
+                chat_log.llm_api.llm_context.assistant or conversation.DOMAIN,
+            )
+        semantic.set(
+            *key,
+            answer.content,
+            mentions=(question.content, answer.content),
+            entity_ids=entity_ids,
+        )
+
+    async def _async_handle_local_intent(
+        self,
+        user_input: conversation.ConversationInput,
+        chat_log: conversation.ChatLog,
+    ) -> conversation.ConversationResult | None:
+        """Run the input through Home Assistant's own intents.
+
+        Only strict matches against exposed entities are handled, anything
+        else returns None and goes to Mistral with the same chat log. The
+        local answer is added to the chat log so a follow-up question that
+        does go to Mistral sees it.
+        """
+        response = await conversation.async_handle_intents(
+            self.hass, user_input, intent_filter=_local_intent_uncertain
+        )
+        if response is None:
+            return None
+        self.entry.runtime_data.metrics.record_route(MODEL_LOCAL, ROUTE_LOCAL_INTENT)
+        chat_log.async_add_assistant_content_without_tools(
+            conversation.AssistantContent(
+                agent_id=user_input.agent_id,
+                content=response.speech.get("plain", {}).get("speech", ""),
+            )
+        )
+        return conversation.ConversationResult(
+            response=response,
+            conversation_id=chat_log.conversation_id,
+            continue_conversation=chat_log.continue_conversation,
+        )
+
+    async def _async_handle_chat_log(
+        self, chat_log: conversation.ChatLog, voice: bool = False
+    ) -> None:
+        """Answer the chat log, with the voice profile for spoken turns."""
         options = self.entry.options
         model = options.get(CONF_CHAT_MODEL, RECOMMENDED_CHAT_MODEL)
-        system_prompt = options.get(CONF_PROMPT, DEFAULT_SYSTEM_PROMPT)
-        messages = [
-            {"role": "system", "content": system_prompt}
-        ]
-        for content in chat_log.content:
-            messages.extend(_convert_content_to_param(content))
-        client = self.entry.runtime_data
-        payload = {
+        fingerprint = repr(sorted(options.items()))
+        client = self.entry.runtime_data.client
+        payload: dict[str, Any] = {
             "model": model,
-            "messages": messages,
-            "max_tokens": options.get(CONF_MAX_TOKENS, RECOMMENDED_MAX_TOKENS),
+            "max_tokens": _max_tokens(options, voice, bool(chat_log.llm_api)),
             "temperature": options.get(CONF_TEMPERATURE, RECOMMENDED_TEMPERATURE),
             "top_p": options.get(CONF_TOP_P, RECOMMENDED_TOP_P),
-            "stream": False,
+            "stream": True,
         }
+        reserved_tokens = 0
+        if chat_log.llm_api:
+            if self._tool_specs is not None:
+                tools = self._tool_specs.get(chat_log.llm_api)
+                payload["tools"] = tools.specs
+                reserved_tokens = tools.tokens
+            else:
+                payload["tools"] = [
+                    _format_tool(tool, chat_log.llm_api.custom_serializer)
+                    for tool in chat_log.llm_api.tools
+                ]
+                reserved_tokens = estimate_tokens(json.dumps(payload["tools"]))
+            payload["tool_choice"] = "auto"
+        models = self.entry.runtime_data.models
+        router = self._router
+        route = (
+            router.route(chat_log)
+            if router is not None
+            else Route(model, ROUTE_FIXED, fast=False)
+        )
+
+        for _iteration in range(MAX_TOOL_ITERATIONS):
+            messages = self._history.get_messages(chat_log, fingerprint)
+            if self._context is not None:
+                messages = self._context.fit(
+                    chat_log.conversation_id,
+                    messages,
+                    context_budget(
+                        options.get(CONF_CONTEXT_BUDGET),
+                        models.get(route.model),
+                        payload["max_tokens"],
+                    ),
+                    model,
+                    reserved_tokens=reserved_tokens,
+                    summarize=options.get(
+                        CONF_CONTEXT_SUMMARY, RECOMMENDED_CONTEXT_SUMMARY
+                    ),
+                )
+            payload["messages"] = messages
+            while True:
+                payload["model"] = route.model
+                start = len(chat_log.content)
+                try:
+                    await self._async_stream_response(
+                        chat_log,
+                        client,
+                        payload,
+                        sentences=voice,
+                        router=router if route.fast else None,
+                    )
+                except TooManyToolCalls:
+                    assert router is not None
+                    route = router.escalate(ROUTE_TOOL_HEAVY)
+                    continue
+                except HomeAssistantError as err:
+                    if router is None or not route.fast or len(chat_log.content) > start:
+                        raise
+                    LOGGER.debug("Fast model %s failed: %s", route.model, err)
+                    route = router.escalate(ROUTE_ERROR)
+                    continue
+                if router is not None and route.fast:
+                    if reason := router.check(chat_log.content[start:]):
+                        route = router.escalate(reason)
+                        if reason == ROUTE_EMPTY:
+                            continue
+                break
+            if not chat_log.unresponded_tool_results:
+                break
+
+    async def _async_stream_response(
+        self,
+        chat_log: conversation.ChatLog,
+        client: MistralClient,
+        payload: dict[str, Any],
+        sentences: bool = False,
+        router: ModelRouter | None = None,
+    ) -> None:
+        """Stream one model response into the chat log.
+
+        With ``sentences``, text reaches the chat log one whole sentence at
+        a time. With ``router``, the response is a fast model's and its tool
+        calls are held back until they are known to be within its limit.
+        """
+        produced = False
+        stream = _transform_stream(
+            client.chat_stream(payload, timeout=CONVERSATION_TIMEOUT)
+        )
+        if router is not None:
+            stream = router.limit_tool_calls(stream)
+        if sentences:
+            stream = _flush_sentences(stream)
         try:
-            response = await client.chat(payload)
+            async for _content in chat_log.async_add_delta_content_stream(
+                self.entity_id, stream
+            ):
+                produced = True
+        except (HomeAssistantError, TooManyToolCalls):
+            raise
         except Exception as err:
             raise HomeAssistantError("Error talking to Mistral") from err
-        if not response or "choices" not in response or not response["choices"]:
+        if not produced:
             raise HomeAssistantError("No response from Mistral API")
-        content = response["choices"][0]["message"]["content"]
-        chat_log.async_add_assistant_content(
-            conversation.AssistantContent(content=content, agent_id=self.entity_id)
-        )
 
     async def _async_entry_update_listener(
         self, hass: HomeAssistant, entry: ConfigEntry
     ) -> None:
-        await hass.config_entries.async_reload(entry.entry_id)
+        """Pick up changed options without a reload.
+
+        The entry's own listener reloads it for options that need one; the
+        rest is read from the options on every turn, except the router.
+        """
+        self._router = _create_router(entry)
@@ -0,0 +1,51 @@
+"""Diagnostics support for the Mistral AI Conversation integration."""
+
+# Modified by Louis Rokitta
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_API_KEY
+from homeassistant.core import HomeAssistant
+
+from . import MistralConfigEntry
+from .const import CONF_ADDITIONAL_API_KEYS
+
+TO_REDACT = {CONF_API_KEY, CONF_ADDITIONAL_API_KEYS}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: MistralConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    cache = entry.runtime_data.response_cache
+    return {
+        "data": async_redact_data(entry.data, TO_REDACT),
+        "options": async_redact_data(entry.options, TO_REDACT),
+        "response_cache": cache.stats if cache is not None else None,
+        "semantic_cache": (
+            semantic.stats
+            if (semantic := entry.runtime_data.semantic_cache) is not None
+            else None
+        ),
+        "attachment_cache": entry.runtime_data.attachments.stats,
+        "batch_jobs": entry.runtime_data.batch_jobs.jobs,
+        "client": {
+            "retries": entry.runtime_data.client.retries,
+            "hedged": entry.runtime_data.client.hedged,
+        },
+        "api_keys": entry.runtime_data.client.key_pool.stats,
+        "metrics": entry.runtime_data.metrics.snapshot(),
+        "rate_limiter": (
+            {
+                "requests_per_second": limiter.requests_per_second,
+                "tokens_per_minute": limiter.tokens_per_minute,
+                "queued": limiter.queued,
+                "throttled": limiter.throttled,
+            }
+            if (limiter := entry.runtime_data.client.rate_limiter) is not None
+            else None
+        ),
+    }
@@ -0,0 +1,81 @@
+"""Incremental message conversion for the Mistral AI Conversation integration."""
+
+# Modified by Louis Rokitta
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from .mistral_client import EncodedMessages
+
+if TYPE_CHECKING:
+    from homeassistant.components import conversation
+
+MAX_CACHED_CONVERSATIONS = 32
+
+
+@dataclass(slots=True)
+class _ConvertedHistory:
+    """Converted messages of one conversation."""
+
+    fingerprint: str
+    system: Any = None
+    system_messages: EncodedMessages = field(default_factory=EncodedMessages)
+    messages: EncodedMessages = field(default_factory=EncodedMessages)
+    consumed: int = 1
+    last: Any = None
+
+
+class MessageHistoryCache:
+    """Keep converted Mistral messages per conversation between turns.
+
+    The chat log only grows between turns, so each call converts and encodes
+    the content added since the previous call. The system prompt is
+    re-encoded only when its rendered text changes, and the whole buffer is
+    rebuilt when the options fingerprint changes or the chat log no longer
+    starts with the content that was converted before.
+    """
+
+    def __init__(
+        self, convert: Callable[[conversation.Content], list[dict[str, Any]]]
+    ) -> None:
+        self._convert = convert
+        self._histories: OrderedDict[str, _ConvertedHistory] = OrderedDict()
+
+    def get_messages(
+        self, chat_log: conversation.ChatLog, fingerprint: str
+    ) -> EncodedMessages:
+        """Return the messages for a chat log, converting only new content."""
+        contents = chat_log.content
+        history = self._histories.get(chat_log.conversation_id)
+        if (
+            history is None
+            or history.fingerprint != fingerprint
+            or len(contents) < history.consumed
+            or (history.last is not None and contents[history.consumed - 1] is not history.last)
+        ):
+            history = _ConvertedHistory(fingerprint)
+        self._histories[chat_log.conversation_id] = history
+        self._histories.move_to_end(chat_log.conversation_id)
+        while len(self._histories) > MAX_CACHED_CONVERSATIONS:
+            self._histories.popitem(last=False)
+
+        if contents and contents[0] != history.system:
+            history.system = contents[0]
+            history.system_messages = EncodedMessages(self._convert(contents[0]))
+        for content in contents[history.consumed :]:
+            history.messages.extend(self._convert(content))
+            history.last = content
+        history.consumed = max(len(contents), 1)
+
+        return EncodedMessages(
+            [*history.system_messages, *history.messages],
+            [*history.system_messages.encoded, *history.messages.encoded],
+        )
+
+    def clear(self) -> None:
+        """Drop all converted conversations."""
+        self._histories.clear()
@@ -0,0 +1,205 @@
+"""API key pool for the Mistral AI Conversation integration."""
+
+# Modified by Louis Rokitta
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+import hashlib
+import time
+from typing import Any
+
+from .rate_limit import Priority, RateLimiter, get_rate_limiter
+
+# Consecutive failures after which a key is ejected from the pool.
+EJECT_AFTER_FAILURES = 3
+# Ejections double in length while a key keeps failing after it returns.
+EJECT_BASE_DELAY = 30.0  # seconds
+EJECT_MAX_DELAY = 600.0  # seconds
+# Ejection after a 429 that does not say when to retry.
+THROTTLE_DELAY = 5.0  # seconds
+
+
+@dataclass(slots=True, eq=False)
+class PooledKey:
+    """An API key with its rate limiter and health.
+
+    A key is shared by every client and config entry using it, so the
+    outstanding requests and ejections of one key are counted house-wide.
+    """
+
+    api_key: str
+    rate_limiter: RateLimiter | None = None
+    outstanding: int = 0
+    requests: int = 0
+    failures: int = 0
+    ejections: int = 0
+    ejected_until: float = 0.0
+    errors: int = 0
+    throttled: int = 0
+    _ejected: asyncio.Future[None] | None = field(default=None, repr=False)
+
+    @property
+    def label(self) -> str:
+        """Return a name for the key that does not reveal it."""
+        return f"…{self.api_key[-4:]}"
+
+    def available(self, now: float) -> bool:
+        """Return whether the key is not ejected."""
+        return self.ejected_until <= now
+
+    def ejection(self) -> asyncio.Future[None]:
+        """Return a future that is done when the key is next ejected."""
+        if self._ejected is None or self._ejected.done():
+            self._ejected = asyncio.get_running_loop().create_future()
+        return self._ejected
+
+    def succeeded(self) -> None:
+        """Record a response that shows the key is healthy."""
+        self.failures = 0
+        self.ejections = 0
+
+    def failed(self) -> None:
+        """Record a server or connection error, ejecting the key if needed."""
+        self.errors += 1
+        self.failures += 1
+        if self.failures >= EJECT_AFTER_FAILURES:
+            self._eject(
+                min(EJECT_BASE_DELAY * 2**self.ejections, EJECT_MAX_DELAY)
+            )
+
+    def rejected(self) -> None:
+        """Record that the API refused the key, ejecting it right away."""
+        self.errors += 1
+        self._eject(min(EJECT_BASE_DELAY * 2**self.ejections, EJECT_MAX_DELAY))
+
+    def throttle(self, retry_after: float | None) -> None:
+        """Record a 429 and eject the key until it may be used again."""
+        self.throttled += 1
+        self._eject(retry_after if retry_after is not None else THROTTLE_DELAY)
+
+    def _eject(self, duration: float) -> None:
+        self.ejected_until = max(self.ejected_until, time.monotonic() + duration)
+        self.ejections += 1
+        # One more failure after the ejection ends ejects the key again.
+        self.failures = EJECT_AFTER_FAILURES - 1
+        if self._ejected is not None and not self._ejected.done():
+            self._ejected.set_result(None)
+
+
+class KeyPool:
+    """Spread requests over API keys by least outstanding requests.
+
+    Ejected keys get no traffic until their ejection ends. If every key is
+    ejected, the one that comes back first is used anyway, so the pool never
+    refuses a request; with a single key it behaves like that key alone.
+    """
+
+    def __init__(self, keys: Iterable[PooledKey]) -> None:
+        self.keys = list({id(key): key for key in keys}.values())
+        if not self.keys:
+            raise ValueError("A key pool needs at least one key")
+
+    @property
+    def primary(self) -> PooledKey:
+        """Return the key of the config entry itself."""
+        return self.keys[0]
+
+    def acquire(self, pinned: bool = False) -> PooledKey:
+        """Choose the key for a request and count it as outstanding.
+
+        Pinned requests, such as file uploads that later requests refer to,
+        always use the primary key.
+        """
+        if pinned:
+            key = self.primary
+        else:
+            now = time.monotonic()
+            healthy = [key for key in self.keys if key.available(now)]
+            key = (
+                min(healthy, key=lambda key: (key.outstanding, key.requests))
+                if healthy
+                else min(self.keys, key=lambda key: key.ejected_until)
+            )
+        key.outstanding += 1
+        key.requests += 1
+        return key
+
+    def has_available_key(self) -> bool:
+        """Return whether any key is not ejected."""
+        now = time.monotonic()
+        return any(key.available(now) for key in self.keys)
+
+    async def wait_for_slot(
+        self, key: PooledKey, cost: float, priority: Priority
+    ) -> bool:
+        """Wait for the rate limiter of a key to admit a request.
+
+        Returns False, without taking a slot, if the key is ejected while
+        the request waits and another key is available to take it over.
+        """
+        if key.rate_limiter is None:
+            return True
+        if len(self.keys) == 1:
+            await key.rate_limiter.acquire(cost, priority)
+            return True
+        slot = asyncio.ensure_future(key.rate_limiter.acquire(cost, priority))
+        try:
+            while True:
+                ejected = key.ejection()
+                await asyncio.wait(
+                    (slot, ejected), return_when=asyncio.FIRST_COMPLETED
+                )
+                if slot.done():
+                    slot.result()
+                    return True
+                if self.has_available_key():
+                    return False
+        finally:
+            if not slot.done():
+                slot.cancel()
+
+    @staticmethod
+    def release(key: PooledKey) -> None:
+        """Stop counting a request as outstanding."""
+        key.outstanding -= 1
+
+    @property
+    def queued(self) -> int:
+        """Return the requests waiting in the rate limiters of all keys."""
+        return sum(
+            key.rate_limiter.queued for key in self.keys if key.rate_limiter is not None
+        )
+
+    @property
+    def stats(self) -> list[dict[str, Any]]:
+        """Return the load and health of every key."""
+        now = time.monotonic()
+        return [
+            {
+                "key": key.label,
+                "outstanding": key.outstanding,
+                "requests": key.requests,
+                "errors": key.errors,
+                "throttled": key.throttled,
+                "ejections": key.ejections,
+                "ejected_for": round(max(key.ejected_until - now, 0.0), 1),
+            }
+            for key in self.keys
+        ]
+
+
+_KEYS: dict[str, PooledKey] = {}
+
+
+def get_pooled_key(
+    api_key: str, requests_per_second: float, tokens_per_minute: float
+) -> PooledKey:
+    """Return the pooled key shared by every client using the same API key."""
+    key = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+    limiter = get_rate_limiter(api_key, requests_per_second, tokens_per_minute)
+    if (pooled := _KEYS.get(key)) is None:
+        pooled = _KEYS[key] = PooledKey(api_key, limiter)
+    return pooled
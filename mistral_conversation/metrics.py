@@ -0,0 +1,193 @@
+"""Latency and token usage instrumentation for the Mistral API client."""
+
+# Modified by Louis Rokitta
+
+from __future__ import annotations
+
+from collections import Counter, deque
+from collections.abc import Callable
+from dataclasses import dataclass, field
+import time
+from typing import Any
+
+HISTOGRAM_SAMPLES = 500
+
+SITE_CONVERSATION = "conversation"
+SITE_EMBEDDING = "embedding"
+SITE_SERVICE = "service"
+SITE_SUMMARY = "summary"
+
+# Model name under which answers from Home Assistant's own intents are counted.
+MODEL_LOCAL = "local"
+
+
+class RollingHistogram:
+    """Percentiles over the most recent samples."""
+
+    def __init__(self, samples: int = HISTOGRAM_SAMPLES) -> None:
+        self._values: deque[float] = deque(maxlen=samples)
+
+    def add(self, value: float) -> None:
+        """Add a sample."""
+        self._values.append(value)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def percentile(self, percent: float) -> float | None:
+        """Return the given percentile or None without samples."""
+        if not self._values:
+            return None
+        values = sorted(self._values)
+        index = min(len(values) - 1, max(0, round(percent / 100 * len(values)) - 1))
+        return values[index]
+
+    def summary(self) -> dict[str, Any]:
+        """Return count and p50/p95/p99 in milliseconds."""
+        return {
+            "count": len(self._values),
+            **{
+                f"p{percent}": (
+                    round(value * 1000, 1)
+                    if (value := self.percentile(percent)) is not None
+                    else None
+                )
+                for percent in (50, 95, 99)
+            },
+        }
+
+
+@dataclass(slots=True)
+class CallTiming:
+    """Timings of one API call, filled in while the call runs."""
+
+    model: str
+    site: str
+    start: float = field(default_factory=time.monotonic)
+    queue_wait: float = 0.0
+    connect: float | None = None
+    first_token: float | None = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+    def mark_first_token(self) -> None:
+        """Remember the time of the first response byte or token."""
+        if self.first_token is None:
+            self.first_token = time.monotonic() - self.start
+
+    def add_usage(self, usage: dict[str, Any] | None) -> None:
+        """Take token counts from a response usage block."""
+        if usage:
+            self.prompt_tokens = int(usage.get("prompt_tokens") or 0)
+            self.completion_tokens = int(usage.get("completion_tokens") or 0)
+
+
+@dataclass(slots=True)
+class _Series:
+    total: RollingHistogram = field(default_factory=RollingHistogram)
+    first_token: RollingHistogram = field(default_factory=RollingHistogram)
+    queue_wait: RollingHistogram = field(default_factory=RollingHistogram)
+    connect: RollingHistogram = field(default_factory=RollingHistogram)
+    requests: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    errors: Counter[str] = field(default_factory=Counter)
+
+    def add(self, timing: CallTiming, total: float, error: str | None) -> None:
+        self.requests += 1
+        self.queue_wait.add(timing.queue_wait)
+        if timing.connect is not None:
+            self.connect.add(timing.connect)
+        if error is not None:
+            self.errors[error] += 1
+            return
+        self.total.add(total)
+        if timing.first_token is not None:
+            self.first_token.add(timing.first_token)
+        self.prompt_tokens += timing.prompt_tokens
+        self.completion_tokens += timing.completion_tokens
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "errors": dict(self.errors),
+            "latency_ms": self.total.summary(),
+            "time_to_first_token_ms": self.first_token.summary(),
+            "queue_wait_ms": self.queue_wait.summary(),
+            "connect_ms": self.connect.summary(),
+        }
+
+
+class MetricsRecorder:
+    """Aggregate call timings overall and per model and call site."""
+
+    def __init__(self) -> None:
+        self.overall = _Series()
+        self._by_key: dict[tuple[str, str], _Series] = {}
+        self._routes: Counter[tuple[str, str]] = Counter()
+        self._listeners: list[Callable[[], None]] = []
+        self.startup: dict[str, float | None] = {
+            "setup_ms": None,
+            "warm_up_ms": None,
+            "first_request_ms": None,
+            "first_request_connect_ms": None,
+        }
+
+    def record(self, timing: CallTiming, error: BaseException | str | None = None) -> None:
+        """Record a finished call."""
+        total = time.monotonic() - timing.start
+        if isinstance(error, BaseException):
+            error = type(error).__name__
+        if not self.overall.requests:
+            self.record_startup("first_request_ms", total)
+            if timing.connect is not None:
+                self.record_startup("first_request_connect_ms", timing.connect)
+        self.overall.add(timing, total, error)
+        key = (timing.model, timing.site)
+        if (series := self._by_key.get(key)) is None:
+            series = self._by_key[key] = _Series()
+        series.add(timing, total, error)
+        for listener in self._listeners:
+            listener()
+
+    def record_startup(self, name: str, seconds: float) -> None:
+        """Record a duration of the entry's startup, such as the setup time."""
+        self.startup[name] = round(seconds * 1000, 1)
+
+    def record_route(self, model: str, reason: str) -> None:
+        """Record a model routing decision."""
+        self._routes[(model, reason)] += 1
+
+    def time_to_first_token(
+        self, model: str, site: str, percent: float, min_samples: int = 1
+    ) -> float | None:
+        """Return a time to first token percentile of a model and call site.
+
+        Returns None while fewer than ``min_samples`` calls were recorded.
+        """
+        series = self._by_key.get((model, site))
+        if series is None or len(series.first_token) < min_samples:
+            return None
+        return series.first_token.percentile(percent)
+
+    def async_add_listener(self, listener: Callable[[], None]) -> Callable[[], None]:
+        """Call a listener after every recorded call, return a remover."""
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return all metrics for diagnostics."""
+        return {
+            "startup": dict(self.startup),
+            "overall": self.overall.as_dict(),
+            "by_model_and_site": {
+                f"{model}/{site}": series.as_dict()
+                for (model, site), series in self._by_key.items()
+            },
+            "routes": {
+                f"{model}/{reason}": count
+                for (model, reason), count in self._routes.items()
+            },
+        }
@@ -2,33 +2,764 @@
 
 # Modified by Louis Rokitta
 
+import asyncio
+from collections.abc import AsyncGenerator
+from dataclasses import dataclass
+import hashlib
+import json
 import httpx
 import logging
-from typing import Any, Dict, Optional
+import random
+import secrets
+import ssl
+import time
+from typing import Any, Dict, Optional, Tuple
 
-MISTRAL_API_URL = "https://api.mistral.ai/v1/chat/completions"
+from .key_pool import KeyPool, PooledKey
+from .metrics import (
+    SITE_CONVERSATION,
+    SITE_EMBEDDING,
+    SITE_SERVICE,
+    CallTiming,
+    MetricsRecorder,
+    RollingHistogram,
+)
+from .rate_limit import Priority, RateLimiter
+
+MISTRAL_API_BASE = "https://api.mistral.ai/v1"
+MISTRAL_API_URL = f"{MISTRAL_API_BASE}/chat/completions"
+EMBEDDING_MODEL = "mistral-embed"
+
+# Pool sizing for the long-lived per-entry client. Bursts of automations
+# share a handful of warm connections instead of opening one per call.
+MAX_CONNECTIONS = 10
+MAX_KEEPALIVE_CONNECTIONS = 5
+KEEPALIVE_EXPIRY = 60.0
+# Keep-warm pings go out before an idle pooled connection expires.
+KEEP_WARM_INTERVAL = 45.0
+# A connection idle this long is pinged on the next tick, which comes at most
+# one interval later, so it is never idle past the keep-alive expiry.
+KEEP_WARM_IDLE = KEEPALIVE_EXPIRY - KEEP_WARM_INTERVAL - 5.0
+BYTES_PER_TOKEN = 4
+# Rate limit cost of one image or document: what a 1024x1024 image takes
+# in 16 pixel patches.
+ATTACHMENT_TOKENS = 4096
+
+# Overall deadlines: a voice turn has to fail fast, a service call may wait.
+CONVERSATION_TIMEOUT = 20.0
+SERVICE_TIMEOUT = 120.0
+# A semantic cache lookup is skipped rather than hold up a conversation turn.
+SEMANTIC_LOOKUP_TIMEOUT = 2.0
+# Upper bound for a single attempt within the overall deadline.
+REQUEST_TIMEOUT = 30.0
+RETRYABLE_STATUS_CODES = frozenset({408, 409, 429, 500, 502, 503, 504})
+# A request that creates something is only retried when the server surely
+# did not act on it: it was never sent, or it was refused with a 429.
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+# Statuses that say the key itself is unusable; another key may still work.
+REJECTED_KEY_STATUS_CODES = frozenset({401, 403})
+
+HEDGE_LATENCY_SAMPLES = 200
+HEDGE_MIN_SAMPLES = 20
+HEDGE_MIN_DELAY = 0.2
 
 _LOGGER = logging.getLogger(__name__)
 
+
+def _encode_json(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class EncodedMessages(list):
+    """Message list that keeps the JSON encoding of every message.
+
+    Messages are encoded once when they are added, so a request body for a
+    long conversation only pays serialization for the messages added since
+    the last request.
+    """
+
+    def __init__(self, messages: Any = (), encoded: list[bytes] | None = None) -> None:
+        super().__init__(messages)
+        if encoded is None:
+            encoded = [_encode_json(message) for message in self]
+        self.encoded = encoded
+
+    def append(self, message: Dict[str, Any]) -> None:
+        super().append(message)
+        self.encoded.append(_encode_json(message))
+
+    def extend(self, messages: Any) -> None:
+        for message in messages:
+            self.append(message)
+
+    def extend_encoded(self, messages: Any, encoded: list[bytes]) -> None:
+        """Append messages together with their already encoded JSON."""
+        super().extend(messages)
+        self.encoded.extend(encoded)
+
+    def __iadd__(self, messages: Any) -> "EncodedMessages":
+        self.extend(messages)
+        return self
+
+    def copy(self) -> "EncodedMessages":
+        return EncodedMessages(self, list(self.encoded))
+
+
+def encode_payload(payload: Dict[str, Any]) -> bytes:
+    """Serialize a request payload, reusing pre-encoded messages if present."""
+    messages = payload.get("messages")
+    if not isinstance(messages, EncodedMessages):
+        return _encode_json(payload)
+    head = _encode_json({key: value for key, value in payload.items() if key != "messages"})
+    separator = b"," if len(head) > 2 else b""
+    return b"".join(
+        (head[:-1], separator, b'"messages":[', b",".join(messages.encoded), b"]}")
+    )
+
+
+def encode_batch_requests(bodies: list[Dict[str, Any]]) -> bytes:
+    """Encode request bodies as a batch input file, one JSON line each.
+
+    The custom id of each line is its index in ``bodies``.
+    """
+    return b"\n".join(
+        _encode_json({"custom_id": str(index), "body": body})
+        for index, body in enumerate(bodies)
+    )
+
+
+def decode_batch_results(data: bytes) -> Dict[str, Dict[str, Any]]:
+    """Index the lines of a batch output or error file by custom id."""
+    results: Dict[str, Dict[str, Any]] = {}
+    for line in data.splitlines():
+        if line.strip():
+            result = json.loads(line)
+            results[str(result.get("custom_id"))] = result
+    return results
+
+
+def create_http_transport(
+    verify: ssl.SSLContext | bool = True, http2: bool = False
+) -> httpx.AsyncHTTPTransport:
+    """Create the pooled transport for the Mistral API.
+
+    HTTP/2 needs the optional ``h2`` package; without it the transport
+    falls back to HTTP/1.1 keep-alive connections.
+    """
+    limits = httpx.Limits(
+        max_connections=MAX_CONNECTIONS,
+        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=KEEPALIVE_EXPIRY,
+    )
+    try:
+        return httpx.AsyncHTTPTransport(verify=verify, http2=http2, limits=limits)
+    except ImportError:
+        _LOGGER.warning("HTTP/2 requested but the h2 package is not installed, using HTTP/1.1")
+        return httpx.AsyncHTTPTransport(verify=verify, limits=limits)
+
+
+def create_http_client(
+    verify: ssl.SSLContext | bool = True, http2: bool = False
+) -> httpx.AsyncClient:
+    """Create a pooled HTTP client for the Mistral API."""
+    return httpx.AsyncClient(transport=create_http_transport(verify, http2))
+
+
+@dataclass(frozen=True, slots=True)
+class RetryPolicy:
+    """How often and how fast transient failures are retried."""
+
+    attempts: int = 3
+    base_delay: float = 0.25
+    max_delay: float = 4.0
+
+    def backoff(self, attempt: int) -> float:
+        """Return a full-jitter exponential backoff delay."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return None
+
+
+def _close_abandoned_response(task: "asyncio.Task[httpx.Response]") -> None:
+    """Close the response of a losing hedged attempt."""
+    if task.cancelled() or task.exception() is not None:
+        return
+    asyncio.get_running_loop().create_task(task.result().aclose())
+
+
+def _estimate_cost(body: bytes, payload: Dict[str, Any]) -> int:
+    """Estimate the tokens a request counts against the per-minute limit.
+
+    Images and documents are sent as base64 data URLs, whose size says
+    nothing about their token count, so each one is counted at a flat
+    ``ATTACHMENT_TOKENS`` instead of by its bytes.
+    """
+    size = len(body)
+    attachments = 0
+    for message in payload.get("messages") or ():
+        content = message.get("content") if isinstance(message, dict) else None
+        if not isinstance(content, list):
+            continue
+        for part in content:
+            if not isinstance(part, dict) or part.get("type") == "text":
+                continue
+            url = part.get(part.get("type", ""))
+            if isinstance(url, dict):
+                url = url.get("url")
+            if isinstance(url, str):
+                size -= len(url)
+                attachments += 1
+    return (
+        max(size, 0) // BYTES_PER_TOKEN
+        + attachments * ATTACHMENT_TOKENS
+        + int(payload.get("max_tokens") or 0)
+    )
+
+
+class _KeyEjected(Exception):
+    """The key of a queued attempt was ejected, another key should send it."""
+
+
+@dataclass(slots=True)
+class _InFlight:
+    """An upstream request shared by every caller with the same payload."""
+
+    task: "asyncio.Task[Dict[str, Any]]"
+    waiters: int = 0
+
+
+_InFlightKey = Tuple[int, float, bytes]
+
+
 class MistralClient:
-    def __init__(self, api_key: str, http_client: Optional[httpx.AsyncClient] = None):
+    def __init__(
+        self,
+        api_key: str,
+        http_client: Optional[httpx.AsyncClient] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        hedge: bool = False,
+        metrics: Optional[MetricsRecorder] = None,
+        base_url: str = MISTRAL_API_BASE,
+        key_pool: Optional[KeyPool] = None,
+    ):
         self.api_key = api_key
-        self.http_client = http_client or httpx.AsyncClient()
+        self.base_url = base_url.rstrip("/")
+        self._owns_http_client = http_client is None
+        self.http_client = http_client or create_http_client()
+        self.rate_limiter = rate_limiter
+        self.key_pool = key_pool or KeyPool([PooledKey(api_key, rate_limiter)])
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.hedge = hedge
+        self._inflight: Dict[_InFlightKey, _InFlight] = {}
+        self.metrics = metrics
+        self._latencies = RollingHistogram(HEDGE_LATENCY_SAMPLES)
+        self.retries = 0
+        self.hedged = 0
+        # When the last request finished, for keep-warm pings.
+        self.last_used = 0.0
+
+    async def close(self) -> None:
+        """Close the HTTP client if it was created by this client."""
+        if self._owns_http_client:
+            await self.http_client.aclose()
 
-    async def chat(self, payload: Dict[str, Any]) -> Dict[str, Any]:
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
+    async def __aenter__(self) -> "MistralClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    @staticmethod
+    def _headers(api_key: str) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json",
         }
+
+    async def chat(
+        self,
+        payload: Dict[str, Any],
+        priority: Priority = Priority.BACKGROUND,
+        timeout: float = SERVICE_TIMEOUT,
+        site: str = SITE_SERVICE,
+    ) -> Dict[str, Any]:
+        """Send a chat completion request.
+
+        ``timeout`` is the overall deadline for the call, including queueing
+        behind the rate limiter, retries and backoff.
+
+        Concurrent calls with an identical payload, priority and timeout
+        share one upstream request and receive the same response object,
+        which callers must not mutate. A cancelled caller does not cancel the request for the
+        others; it is only cancelled once nobody is waiting for it anymore.
+        """
+        body = encode_payload(payload)
+        # A caller never inherits the queue priority or deadline of another.
+        key = (priority, timeout, hashlib.sha256(body).digest())
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            inflight = _InFlight(
+                asyncio.get_running_loop().create_task(
+                    self._post(
+                        body,
+                        _estimate_cost(body, payload),
+                        priority,
+                        asyncio.get_running_loop().time() + timeout,
+                        CallTiming(str(payload.get("model")), site),
+                    )
+                )
+            )
+            self._inflight[key] = inflight
+            inflight.task.add_done_callback(lambda task: self._forget(key, task))
+        inflight.waiters += 1
+        try:
+            return await asyncio.shield(inflight.task)
+        finally:
+            inflight.waiters -= 1
+            if inflight.waiters == 0 and not inflight.task.done():
+                inflight.task.cancel()
+
+    def _forget(self, key: _InFlightKey, task: "asyncio.Task[Dict[str, Any]]") -> None:
+        inflight = self._inflight.get(key)
+        if inflight is not None and inflight.task is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Retrieve the exception so an abandoned request is not reported
+            # as "exception was never retrieved".
+            task.exception()
+
+    def _hedge_delay(self) -> Optional[float]:
+        """Return how long to wait before hedging, based on the p95 latency."""
+        if not self.hedge or len(self._latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        if self.key_pool.queued:
+            return None
+        return max(self._latencies.percentile(95) or 0.0, HEDGE_MIN_DELAY)
+
+    async def _attempt(
+        self,
+        request: httpx.Request,
+        cost: int,
+        priority: Priority,
+        timing: CallTiming,
+        key: PooledKey,
+    ) -> httpx.Response:
+        queued = time.monotonic()
+        admitted = await self.key_pool.wait_for_slot(key, cost, priority)
+        timing.queue_wait += time.monotonic() - queued
+        if not admitted:
+            raise _KeyEjected
+        start = time.monotonic()
+        response = await self.http_client.send(request, stream=True)
+        if response.status_code < 500:
+            self._latencies.add(time.monotonic() - start)
+        return response
+
+    async def _attempt_hedged(
+        self,
+        request: httpx.Request,
+        cost: int,
+        priority: Priority,
+        timing: CallTiming,
+        key: PooledKey,
+    ) -> httpx.Response:
+        """Send a request and race a second copy if the first one is slow."""
+        hedge_delay = self._hedge_delay()
+        if hedge_delay is None:
+            return await self._attempt(request, cost, priority, timing, key)
+        loop = asyncio.get_running_loop()
+        pending = {loop.create_task(self._attempt(request, cost, priority, timing, key))}
+        done, pending = await asyncio.wait(pending, timeout=hedge_delay)
+        if not done:
+            self.hedged += 1
+            pending.add(
+                loop.create_task(self._attempt(request, cost, priority, timing, key))
+            )
+        error: Optional[BaseException] = None
         try:
-            response = await self.http_client.post(
-                MISTRAL_API_URL, json=payload, headers=headers, timeout=30
+            while True:
+                winner: Optional[httpx.Response] = None
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                    elif winner is None:
+                        winner = task.result()
+                    else:
+                        _close_abandoned_response(task)
+                if winner is not None:
+                    return winner
+                if not pending:
+                    assert error is not None
+                    raise error
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+        finally:
+            for task in pending:
+                task.cancel()
+                task.add_done_callback(_close_abandoned_response)
+
+    async def _send(
+        self,
+        body: bytes,
+        cost: int,
+        priority: Priority,
+        deadline: float,
+        timing: CallTiming,
+        accept: str = "application/json",
+        method: str = "POST",
+        path: str = "/chat/completions",
+        content_type: str = "application/json",
+        pinned: bool = False,
+        idempotent: bool = True,
+    ) -> httpx.Response:
+        """Send a request with retries and return the unread response.
+
+        Transient failures (connection errors, timeouts, 429 and 5xx) are
+        retried with jittered exponential backoff until the retry policy or
+        the deadline runs out. Every attempt goes to the key chosen by the
+        key pool, so a retry after a 429 or a refused key usually moves to
+        another key. Other errors are raised right away.
+
+        Requests that are not ``idempotent`` are never hedged, and are only
+        retried after connection errors and 429 responses, so a request the
+        server may have acted on is not sent twice.
+        """
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        connect_started: Optional[float] = None
+
+        async def trace(event: str, info: Dict[str, Any]) -> None:
+            nonlocal connect_started
+            if event == "connection.connect_tcp.started":
+                connect_started = time.monotonic()
+            elif (
+                event in ("connection.connect_tcp.complete", "connection.start_tls.complete")
+                and connect_started is not None
+            ):
+                timing.connect = time.monotonic() - connect_started
+
+        async with asyncio.timeout_at(deadline):
+            while True:
+                remaining = deadline - loop.time()
+                self.last_used = time.monotonic()
+                key = self.key_pool.acquire(pinned)
+                request = self.http_client.build_request(
+                    method,
+                    f"{self.base_url}{path}",
+                    content=body,
+                    headers={
+                        **self._headers(key.api_key),
+                        "Accept": accept,
+                        "Content-Type": content_type,
+                    },
+                    timeout=min(REQUEST_TIMEOUT, remaining),
+                    extensions={"trace": trace},
+                )
+                retry_after: Optional[float] = None
+                try:
+                    response = await (
+                        self._attempt_hedged(request, cost, priority, timing, key)
+                        if idempotent
+                        else self._attempt(request, cost, priority, timing, key)
+                    )
+                except _KeyEjected:
+                    # Not an attempt: the request never left the queue.
+                    continue
+                except httpx.TransportError as err:
+                    key.failed()
+                    if attempt + 1 >= self.retry_policy.attempts or not (
+                        idempotent or isinstance(err, UNSENT_ERRORS)
+                    ):
+                        raise
+                else:
+                    status = response.status_code
+                    if key.rate_limiter is not None:
+                        key.rate_limiter.on_response(status, response.headers)
+                    if status == 429:
+                        key.throttle(_retry_after(response))
+                    elif status >= 500:
+                        key.failed()
+                    elif status in REJECTED_KEY_STATUS_CODES:
+                        key.rejected()
+                    else:
+                        key.succeeded()
+                    retry_key = (
+                        status in REJECTED_KEY_STATUS_CODES
+                        and not pinned
+                        and len(self.key_pool.keys) > 1
+                    )
+                    if (
+                        not (
+                            (
+                                status in RETRYABLE_STATUS_CODES
+                                if idempotent
+                                else status == 429
+                            )
+                            or retry_key
+                        )
+                        or attempt + 1 >= self.retry_policy.attempts
+                    ):
+                        if response.is_error:
+                            await response.aread()
+                            await response.aclose()
+                            response.raise_for_status()
+                        return response
+                    retry_after = _retry_after(response)
+                    await response.aclose()
+                finally:
+                    self.key_pool.release(key)
+                attempt += 1
+                self.retries += 1
+                delay = self.retry_policy.backoff(attempt)
+                if retry_after is not None and (
+                    key.rate_limiter is not None or self.key_pool.has_available_key()
+                ):
+                    # The limiter already pauses every request queued for
+                    # the throttled key, and the pool ejected it.
+                    delay = 0.0
+                elif retry_after is not None:
+                    delay = max(delay, retry_after)
+                if loop.time() + delay >= deadline:
+                    raise TimeoutError("Mistral API deadline exceeded")
+                await asyncio.sleep(delay)
+
+    def _record(self, timing: CallTiming, error: Optional[str]) -> None:
+        if self.metrics is not None:
+            self.metrics.record(timing, error)
+
+    async def _post(
+        self,
+        body: bytes,
+        cost: int,
+        priority: Priority,
+        deadline: float,
+        timing: CallTiming,
+        path: str = "/chat/completions",
+    ) -> Dict[str, Any]:
+        error: Optional[str] = None
+        try:
+            response = await self._send(
+                body, cost, priority, deadline, timing, path=path
             )
-            response.raise_for_status()
-            return response.json()
+            timing.mark_first_token()
+            try:
+                await response.aread()
+            finally:
+                await response.aclose()
+                self.last_used = time.monotonic()
+            result = response.json()
+            timing.add_usage(result.get("usage"))
+            return result
         except httpx.HTTPStatusError as err:
+            error = f"http_{err.response.status_code}"
             _LOGGER.error("Mistral API HTTP error: %s | Response: %s", err, err.response.text if err.response else None)
             raise
         except Exception as err:
+            error = type(err).__name__
             _LOGGER.error("Mistral API error: %s", err, exc_info=True)
             raise
+        except asyncio.CancelledError:
+            error = "cancelled"
+            raise
+        finally:
+            self._record(timing, error)
+
+    async def embeddings(
+        self,
+        inputs: list[str],
+        model: str = EMBEDDING_MODEL,
+        priority: Priority = Priority.INTERACTIVE,
+        timeout: float = REQUEST_TIMEOUT,
+    ) -> list[list[float]]:
+        """Return one embedding vector per input text."""
+        body = _encode_json({"model": model, "input": inputs})
+        result = await self._post(
+            body,
+            len(body) // BYTES_PER_TOKEN,
+            priority,
+            asyncio.get_running_loop().time() + timeout,
+            CallTiming(model, SITE_EMBEDDING),
+            path="/embeddings",
+        )
+        data = sorted(result.get("data") or [], key=lambda item: item.get("index", 0))
+        return [item["embedding"] for item in data]
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        body: bytes = b"",
+        content_type: str = "application/json",
+        timeout: float = REQUEST_TIMEOUT,
+        priority: Priority = Priority.BACKGROUND,
+        idempotent: bool = True,
+    ) -> httpx.Response:
+        """Send a request outside the metrics and read its body.
+
+        These requests manage files, jobs and models that belong to one
+        workspace, so they always use the primary key.
+        """
+        response = await self._send(
+            body,
+            1,
+            priority,
+            asyncio.get_running_loop().time() + timeout,
+            CallTiming("", SITE_SERVICE),
+            method=method,
+            path=path,
+            content_type=content_type,
+            pinned=True,
+            idempotent=idempotent,
+        )
+        try:
+            await response.aread()
+        finally:
+            await response.aclose()
+            self.last_used = time.monotonic()
+        return response
+
+    async def upload_file(
+        self, content: bytes, filename: str, purpose: str = "batch"
+    ) -> Dict[str, Any]:
+        """Upload a file and return its metadata, including the id."""
+        boundary = secrets.token_hex(16)
+        body = b"".join(
+            (
+                f'--{boundary}\r\nContent-Disposition: form-data; name="purpose"'
+                f"\r\n\r\n{purpose}\r\n".encode(),
+                f'--{boundary}\r\nContent-Disposition: form-data; name="file"; '
+                f'filename="{filename}"\r\nContent-Type: application/octet-stream'
+                "\r\n\r\n".encode(),
+                content,
+                f"\r\n--{boundary}--\r\n".encode(),
+            )
+        )
+        response = await self._request(
+            "POST",
+            "/files",
+            body,
+            f"multipart/form-data; boundary={boundary}",
+            timeout=SERVICE_TIMEOUT,
+            idempotent=False,
+        )
+        return response.json()
+
+    async def download_file(self, file_id: str) -> bytes:
+        """Return the content of a file, such as batch job output."""
+        response = await self._request(
+            "GET", f"/files/{file_id}/content", timeout=SERVICE_TIMEOUT
+        )
+        return response.content
+
+    async def create_batch_job(
+        self,
+        input_file_id: str,
+        model: str,
+        metadata: Optional[Dict[str, str]] = None,
+        endpoint: str = "/v1/chat/completions",
+    ) -> Dict[str, Any]:
+        """Start a batch job over an uploaded JSONL file of requests."""
+        body: Dict[str, Any] = {
+            "input_files": [input_file_id],
+            "model": model,
+            "endpoint": endpoint,
+        }
+        if metadata:
+            body["metadata"] = metadata
+        response = await self._request(
+            "POST", "/batch/jobs", _encode_json(body), idempotent=False
+        )
+        return response.json()
+
+    async def get_batch_job(self, job_id: str) -> Dict[str, Any]:
+        """Return the current state of a batch job."""
+        response = await self._request("GET", f"/batch/jobs/{job_id}")
+        return response.json()
+
+    async def warm_up(self, model: str) -> None:
+        """Open a pooled connection to the API ahead of real requests.
+
+        Fetching one model card costs no tokens and little bandwidth. Errors
+        are only logged: the request is made for its connection.
+        """
+        try:
+            await self._request("GET", f"/models/{model}")
+        except (httpx.HTTPError, TimeoutError) as err:
+            _LOGGER.debug("Mistral API warm-up failed: %s", err)
+
+    async def list_models(self, timeout: float = REQUEST_TIMEOUT) -> list[Dict[str, Any]]:
+        """Return the models available to the API key.
+
+        Listing models costs no tokens, so it doubles as a cheap check of
+        the key. The call is not recorded in the metrics.
+        """
+        response = await self._request(
+            "GET", "/models", timeout=timeout, priority=Priority.INTERACTIVE
+        )
+        return response.json().get("data") or []
+
+    async def chat_stream(
+        self,
+        payload: Dict[str, Any],
+        priority: Priority = Priority.INTERACTIVE,
+        timeout: float = CONVERSATION_TIMEOUT,
+        site: str = SITE_CONVERSATION,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Stream a chat completion and yield each server-sent event chunk.
+
+        The response body is parsed line by line as it arrives, so the first
+        chunk is available as soon as Mistral emits the first token. Retries
+        and hedging only apply until the response headers arrive.
+        """
+        payload = {**payload, "stream": True}
+        body = encode_payload(payload)
+        deadline = asyncio.get_running_loop().time() + timeout
+        timing = CallTiming(str(payload.get("model")), site)
+        error: Optional[str] = None
+        try:
+            response = await self._send(
+                body,
+                _estimate_cost(body, payload),
+                priority,
+                deadline,
+                timing,
+                accept="text/event-stream",
+            )
+            try:
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        break
+                    if data:
+                        timing.mark_first_token()
+                        chunk = json.loads(data)
+                        timing.add_usage(chunk.get("usage"))
+                        yield chunk
+            finally:
+                await response.aclose()
+                self.last_used = time.monotonic()
+        except httpx.HTTPStatusError as err:
+            error = f"http_{err.response.status_code}"
+            _LOGGER.error("Mistral API HTTP error: %s | Response: %s", err, err.response.text if err.response else None)
+            raise
+        except Exception as err:
+            error = type(err).__name__
+            _LOGGER.error("Mistral API error: %s", err, exc_info=True)
+            raise
+        except (asyncio.CancelledError, GeneratorExit):
+            error = "cancelled"
+            raise
+        finally:
+            self._record(timing, error)
@@ -0,0 +1,121 @@
+"""Model catalog of the Mistral API."""
+
+# Modified by Louis Rokitta
+
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+import hashlib
+import time
+from typing import Any
+
+from .const import RECOMMENDED_CONTEXT_BUDGET
+from .mistral_client import MistralClient
+
+MODEL_CATALOG_TTL = 3600.0  # seconds
+MODEL_LIST_TIMEOUT = 10.0  # seconds
+# Share of a model's context window used as its default input token budget,
+# leaving room for tool specs and the answer.
+CONTEXT_BUDGET_SHARE = 0.25
+
+
+@dataclass(frozen=True, slots=True)
+class ModelInfo:
+    """Limits and capabilities of one Mistral model."""
+
+    id: str
+    max_context_length: int | None = None
+    chat: bool = True
+    function_calling: bool = False
+    vision: bool = False
+    deprecated: bool = False
+
+    @property
+    def default_context_budget(self) -> int | None:
+        """Return the default input token budget for this model."""
+        if not self.max_context_length:
+            return None
+        return int(self.max_context_length * CONTEXT_BUDGET_SHARE)
+
+    @classmethod
+    def from_api(cls, data: Mapping[str, Any]) -> ModelInfo:
+        """Create the info from an entry of the models listing."""
+        capabilities = data.get("capabilities") or {}
+        return cls(
+            id=data["id"],
+            max_context_length=data.get("max_context_length"),
+            chat=bool(capabilities.get("completion_chat", True)),
+            function_calling=bool(capabilities.get("function_calling")),
+            vision=bool(capabilities.get("vision")),
+            deprecated=data.get("deprecation") is not None,
+        )
+
+
+def parse_models(data: list[Mapping[str, Any]]) -> dict[str, ModelInfo]:
+    """Index a models listing by model id and alias."""
+    models: dict[str, ModelInfo] = {}
+    for item in data:
+        if not item.get("id"):
+            continue
+        info = ModelInfo.from_api(item)
+        models.setdefault(info.id, info)
+        for alias in item.get("aliases") or ():
+            models.setdefault(alias, info)
+    return models
+
+
+def context_budget(
+    configured: int | None, info: ModelInfo | None, max_tokens: int
+) -> int:
+    """Return the input token budget of a request to a model.
+
+    A configured budget wins over the model default, but neither may exceed
+    the model's context window minus the tokens reserved for the answer.
+    """
+    budget = int(
+        configured
+        or (info.default_context_budget if info is not None else None)
+        or RECOMMENDED_CONTEXT_BUDGET
+    )
+    if info is not None and info.max_context_length:
+        budget = min(budget, info.max_context_length - max_tokens)
+    return budget
+
+
+def chat_model_ids(models: Mapping[str, ModelInfo]) -> list[str]:
+    """Return the names of the current chat models, sorted."""
+    return sorted(
+        name for name, info in models.items() if info.chat and not info.deprecated
+    )
+
+
+_CATALOGS: dict[str, tuple[float, dict[str, ModelInfo]]] = {}
+
+
+def _catalog_key(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+def get_cached_models(api_key: str) -> dict[str, ModelInfo] | None:
+    """Return the cached catalog of an API key, even if it has expired."""
+    if (cached := _CATALOGS.get(_catalog_key(api_key))) is None:
+        return None
+    return cached[1]
+
+
+async def async_get_models(
+    client: MistralClient, ttl: float = MODEL_CATALOG_TTL
+) -> dict[str, ModelInfo]:
+    """Return the model catalog of the client's API key.
+
+    The listing is fetched at most once per ``ttl`` for every API key and
+    shared by the config flow and all entries using the key.
+    """
+    key = _catalog_key(client.api_key)
+    cached = _CATALOGS.get(key)
+    if cached is not None and time.monotonic() - cached[0] < ttl:
+        return cached[1]
+    models = parse_models(await client.list_models(timeout=MODEL_LIST_TIMEOUT))
+    _CATALOGS[key] = (time.monotonic(), models)
+    return models
@@ -0,0 +1,217 @@
+"""Client-side rate limiting for the Mistral API."""
+
+# Modified by Louis Rokitta
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from enum import IntEnum
+import hashlib
+import heapq
+import itertools
+import logging
+import time
+from typing import Mapping
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_RETRY_AFTER = 1.0
+MIN_REQUESTS_PER_SECOND = 0.2
+
+# Header names Mistral and compatible gateways use to report the remaining
+# budget of the current window.
+_TOKEN_LIMIT_HEADERS = ("x-ratelimit-limit-tokens-minute", "ratelimitbysize-limit")
+_TOKEN_REMAINING_HEADERS = (
+    "x-ratelimit-remaining-tokens-minute",
+    "ratelimitbysize-remaining",
+)
+_REQUEST_REMAINING_HEADERS = (
+    "x-ratelimit-remaining-req-minute",
+    "x-ratelimit-remaining-requests",
+)
+
+
+class Priority(IntEnum):
+    """Queue priority of a request, lower values are served first."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+@dataclass(order=True, slots=True)
+class _Waiter:
+    priority: int
+    sequence: int
+    cost: float = field(compare=False)
+    future: asyncio.Future[None] = field(compare=False)
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _first_number(headers: Mapping[str, str], names: tuple[str, ...]) -> float | None:
+    for name in names:
+        if (value := headers.get(name)) is not None:
+            try:
+                return float(value)
+            except ValueError:
+                continue
+    return None
+
+
+class RateLimiter:
+    """Token bucket limiter for requests per second and tokens per minute.
+
+    Requests wait in a priority queue instead of being sent into a 429, and
+    interactive requests are granted before queued background requests. The
+    request rate is halved on every 429 and recovers slowly on success.
+    """
+
+    def __init__(self, requests_per_second: float, tokens_per_minute: float) -> None:
+        self.configured_rps = requests_per_second
+        self.requests_per_second = requests_per_second
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = max(requests_per_second, 1.0)
+        self._tokens = tokens_per_minute
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._queue: list[_Waiter] = []
+        self._sequence = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+        self.throttled = 0
+
+    def configure(self, requests_per_second: float, tokens_per_minute: float) -> None:
+        """Apply new configured limits."""
+        self.configured_rps = requests_per_second
+        self.requests_per_second = min(self.requests_per_second, requests_per_second)
+        self.tokens_per_minute = tokens_per_minute
+
+    @property
+    def queued(self) -> int:
+        """Return the number of requests waiting for a slot."""
+        return sum(1 for waiter in self._queue if not waiter.future.done())
+
+    async def acquire(self, cost: float, priority: Priority) -> None:
+        """Wait until a request of the given token cost may be sent."""
+        waiter = _Waiter(
+            priority,
+            next(self._sequence),
+            cost,
+            asyncio.get_running_loop().create_future(),
+        )
+        heapq.heappush(self._queue, waiter)
+        self._dispatch()
+        try:
+            await waiter.future
+        finally:
+            if not waiter.future.done():
+                waiter.future.cancel()
+            if waiter.future.cancelled():
+                # Let the requests behind a cancelled one move up now rather
+                # than when its timer fires.
+                self._dispatch()
+
+    def on_response(self, status: int, headers: Mapping[str, str]) -> float | None:
+        """Adapt the limits to a response and return the Retry-After delay."""
+        if (limit := _first_number(headers, _TOKEN_LIMIT_HEADERS)) is not None:
+            self.tokens_per_minute = limit
+        if (remaining := _first_number(headers, _TOKEN_REMAINING_HEADERS)) is not None:
+            self._tokens = min(self._tokens, remaining)
+        if _first_number(headers, _REQUEST_REMAINING_HEADERS) == 0:
+            self._requests = min(self._requests, 0.0)
+
+        if status != 429:
+            self.requests_per_second = min(
+                self.configured_rps,
+                self.requests_per_second + self.configured_rps / 20,
+            )
+            return None
+
+        self.throttled += 1
+        retry_after = _parse_retry_after(headers.get("retry-after"))
+        if retry_after is None:
+            retry_after = DEFAULT_RETRY_AFTER
+        self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+        self.requests_per_second = max(
+            MIN_REQUESTS_PER_SECOND, self.requests_per_second / 2
+        )
+        _LOGGER.debug(
+            "Mistral rate limit hit, pausing %.1fs at %.2f requests/s",
+            retry_after,
+            self.requests_per_second,
+        )
+        self._dispatch()
+        return retry_after
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(
+            max(self.requests_per_second, 1.0),
+            self._requests + elapsed * self.requests_per_second,
+        )
+        self._tokens = min(
+            self.tokens_per_minute,
+            self._tokens + elapsed * self.tokens_per_minute / 60,
+        )
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        delay = 0.0
+        while self._queue:
+            head = self._queue[0]
+            if head.future.done():
+                heapq.heappop(self._queue)
+                continue
+            now = time.monotonic()
+            self._refill(now)
+            if now < self._blocked_until:
+                delay = self._blocked_until - now
+                break
+            # Capped here rather than on arrival, as the limit may have been
+            # lowered by a response since the request was queued.
+            cost = min(head.cost, self.tokens_per_minute)
+            if self._requests >= 1 and self._tokens >= cost:
+                self._requests -= 1
+                self._tokens -= cost
+                heapq.heappop(self._queue)
+                head.future.set_result(None)
+                continue
+            delay = max(
+                (1 - self._requests) / self.requests_per_second,
+                (cost - self._tokens) / (self.tokens_per_minute / 60),
+                0.01,
+            )
+            break
+        else:
+            return
+        self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+
+_LIMITERS: dict[str, RateLimiter] = {}
+
+
+def get_rate_limiter(
+    api_key: str, requests_per_second: float, tokens_per_minute: float
+) -> RateLimiter:
+    """Return the limiter shared by every client using the same API key."""
+    key = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+    if (limiter := _LIMITERS.get(key)) is None:
+        limiter = _LIMITERS[key] = RateLimiter(requests_per_second, tokens_per_minute)
+    else:
+        limiter.configure(requests_per_second, tokens_per_minute)
+    return limiter
@@ -0,0 +1,103 @@
+"""Response cache for the Mistral AI Conversation integration."""
+
+# Modified by Louis Rokitta
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import hashlib
+import json
+import re
+import time
+from typing import Any
+
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)?")
+
+
+def payload_cache_key(payload: dict[str, Any]) -> str:
+    """Return a canonical hash of a chat completion payload."""
+    canonical = json.dumps(
+        payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def semantic_scope(text: str, **context: Any) -> str:
+    """Return the part of a semantic cache key that has to match exactly.
+
+    Prompts that only differ in a number ("set it to 21 degrees" and "set
+    it to 22 degrees") embed almost identically, so the numbers of the
+    prompt are part of the scope together with the model settings.
+    """
+    return payload_cache_key({**context, "numbers": _NUMBER.findall(text)})
+
+
+@dataclass(slots=True)
+class _CacheEntry:
+    value: Any
+    size: int
+    expires: float
+
+
+class ResponseCache:
+    """LRU cache with a time to live and a memory limit."""
+
+    def __init__(self, max_entries: int, ttl: float, max_bytes: int) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Any | None:
+        """Return a cached value or None on a miss."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def set(self, key: str, value: Any, size: int | None = None) -> None:
+        """Store a value, evicting the least recently used entries if needed."""
+        if size is None:
+            size = len(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _CacheEntry(value, size, time.monotonic() + self.ttl)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all cached values."""
+        self._entries.clear()
+        self._bytes = 0
+
+    def _remove(self, key: str) -> None:
+        self._bytes -= self._entries.pop(key).size
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return counters used to tune the cache settings."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
@@ -0,0 +1,143 @@
+"""Model routing for the Mistral AI Conversation integration."""
+
+# Modified by Louis Rokitta
+
+from __future__ import annotations
+
+from collections.abc import AsyncGenerator, AsyncIterator, Iterable
+from dataclasses import dataclass
+import re
+
+from homeassistant.components import conversation
+from homeassistant.helpers import llm
+
+from .metrics import SITE_CONVERSATION, MetricsRecorder
+
+# Both models need this many streamed answers before their time to first
+# token is compared.
+LATENCY_MIN_SAMPLES = 10
+
+ROUTE_FIXED = "fixed"
+ROUTE_SHORT = "short"
+ROUTE_LONG = "long"
+ROUTE_MULTI_STEP = "multi_step"
+ROUTE_LATENCY = "latency"
+ROUTE_TOOL_HEAVY = "tool_heavy"
+ROUTE_TOOL_ERROR = "tool_error"
+ROUTE_EMPTY = "empty"
+ROUTE_ERROR = "error"
+ROUTE_LOCAL_INTENT = "intent"
+
+_SENTENCE_END = re.compile(r"[.!?;:\n]+\s+\S")
+
+
+class TooManyToolCalls(Exception):
+    """A fast model response asked for more tool calls than allowed."""
+
+
+@dataclass(slots=True, frozen=True)
+class Route:
+    """The model chosen for a turn and why."""
+
+    model: str
+    reason: str
+    fast: bool
+
+
+class ModelRouter:
+    """Send short, simple turns to a fast model and the rest to the main one.
+
+    A turn goes to the fast model when the user's request is a single
+    sentence of at most ``max_words`` words, unless the fast model has been
+    answering slower than the main model lately. The conversation escalates
+    to the main model when the fast model fails, answers with nothing, asks
+    for more than ``max_tool_calls`` tool calls in one response or a tool
+    call fails. Too many tool calls are detected before any of them runs.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        fast_model: str,
+        max_words: int,
+        max_tool_calls: int,
+        metrics: MetricsRecorder | None = None,
+    ) -> None:
+        self.model = model
+        self.fast_model = fast_model
+        self.max_words = max_words
+        self.max_tool_calls = max_tool_calls
+        self.metrics = metrics
+
+    def route(self, chat_log: conversation.ChatLog) -> Route:
+        """Choose the model for the latest user turn."""
+        text = next(
+            (
+                content.content
+                for content in reversed(chat_log.content)
+                if isinstance(content, conversation.UserContent)
+            ),
+            "",
+        ).strip()
+        if len(text.split()) > self.max_words:
+            return self._decide(self.model, ROUTE_LONG)
+        if _SENTENCE_END.search(text):
+            return self._decide(self.model, ROUTE_MULTI_STEP)
+        if self._fast_model_slower():
+            return self._decide(self.model, ROUTE_LATENCY)
+        return self._decide(self.fast_model, ROUTE_SHORT)
+
+    def escalate(self, reason: str) -> Route:
+        """Switch the rest of the turn to the main model."""
+        return self._decide(self.model, reason)
+
+    async def limit_tool_calls(
+        self, stream: AsyncIterator[conversation.AssistantContentDeltaDict]
+    ) -> AsyncGenerator[conversation.AssistantContentDeltaDict]:
+        """Hold back the tool calls of a fast model response until it ends.
+
+        The chat log runs a tool call as soon as it receives it, so the calls
+        are only handed on once the response is known to stay within
+        ``max_tool_calls``. A response asking for more raises
+        TooManyToolCalls before any of its calls has run.
+        """
+        held: list[llm.ToolInput] = []
+        async for delta in stream:
+            if tool_calls := delta.get("tool_calls"):
+                held.extend(tool_calls)
+                if len(held) > self.max_tool_calls:
+                    raise TooManyToolCalls
+                continue
+            yield delta
+        if held:
+            yield {"tool_calls": held}
+
+    def check(self, added: Iterable[conversation.Content]) -> str | None:
+        """Return an escalation reason for a fast model response, if any."""
+        answered = False
+        for content in added:
+            if isinstance(content, conversation.AssistantContent):
+                answered = answered or bool(content.content or content.tool_calls)
+            elif isinstance(
+                content, conversation.ToolResultContent
+            ) and isinstance(content.tool_result, dict) and "error" in content.tool_result:
+                return ROUTE_TOOL_ERROR
+        if not answered:
+            return ROUTE_EMPTY
+        return None
+
+    def _fast_model_slower(self) -> bool:
+        if self.metrics is None:
+            return False
+        fast, main = (
+            self.metrics.time_to_first_token(
+                model, SITE_CONVERSATION, 95, min_samples=LATENCY_MIN_SAMPLES
+            )
+            for model in (self.fast_model, self.model)
+        )
+        return fast is not None and main is not None and fast >= main
+
+    def _decide(self, model: str, reason: str) -> Route:
+        if self.metrics is not None:
+            self.metrics.record_route(model, reason)
+        return Route(model, reason, model == self.fast_model and model != self.model)
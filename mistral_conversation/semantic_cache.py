@@ -0,0 +1,219 @@
+"""Semantic response cache for the Mistral AI Conversation integration."""
+
+# Modified by Louis Rokitta
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass
+import re
+import time
+from typing import Any
+
+import numpy as np
+
+_ENTITY_ID = re.compile(r"\b[a-z0-9_]+\.[a-z0-9_]+\b")
+
+
+def find_entity_ids(
+    texts: Iterable[str], is_entity: Callable[[str], bool]
+) -> frozenset[str]:
+    """Return the existing entity ids mentioned in some texts."""
+    return frozenset(
+        candidate
+        for text in texts
+        for candidate in _ENTITY_ID.findall(text)
+        if is_entity(candidate)
+    )
+
+
+@dataclass(slots=True)
+class _SemanticEntry:
+    scope: str
+    value: str
+    entity_ids: frozenset[str]
+    size: int
+    expires: float
+
+
+class SemanticCache:
+    """Answers looked up by the cosine similarity of prompt embeddings.
+
+    Embeddings are normalized and kept as rows of one float32 matrix, so a
+    lookup is a single matrix-vector product over every cached prompt of
+    the same scope. Entries are evicted least recently used first when the
+    entry or memory limit is reached, expire after ``ttl`` seconds and are
+    dropped when an entity they mention changes state.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        max_bytes: int,
+        threshold: float,
+        is_entity: Callable[[str], bool] | None = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.threshold = threshold
+        self.is_entity = is_entity
+        self._vectors: np.ndarray | None = None
+        self._scope_ids = np.full(0, -1, dtype=np.int64)
+        self._scopes: dict[str, int] = {}
+        self._entries: OrderedDict[int, _SemanticEntry] = OrderedDict()
+        self._free: list[int] = []
+        self._by_entity: dict[str, set[int]] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, embedding: Sequence[float], scope: str) -> str | None:
+        """Return the answer of the most similar cached prompt, if close enough."""
+        scope_id = self._scopes.get(scope)
+        if self._vectors is None or scope_id is None:
+            self.misses += 1
+            return None
+        vector = self._normalize(embedding)
+        if vector is None or vector.shape[0] != self._vectors.shape[1]:
+            self.misses += 1
+            return None
+        scores = self._vectors @ vector
+        scores[self._scope_ids != scope_id] = -np.inf
+        slot = int(np.argmax(scores))
+        if scores[slot] < self.threshold:
+            self.misses += 1
+            return None
+        entry = self._entries[slot]
+        if entry.expires <= time.monotonic():
+            self._remove(slot)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(slot)
+        self.hits += 1
+        return entry.value
+
+    def set(
+        self,
+        embedding: Sequence[float],
+        scope: str,
+        value: str,
+        mentions: Iterable[str] = (),
+        entity_ids: Iterable[str] = (),
+    ) -> None:
+        """Store an answer, evicting the least recently used ones if needed.
+
+        ``mentions`` are the texts, usually prompt and answer, whose entity
+        ids invalidate the answer when their state changes. ``entity_ids``
+        are further entities the answer may depend on without naming them.
+        """
+        vector = self._normalize(embedding)
+        if vector is None or self.max_entries <= 0:
+            return
+        if self._vectors is not None and vector.shape[0] != self._vectors.shape[1]:
+            # The embedding model changed, the old vectors are useless.
+            self.clear()
+        size = vector.nbytes + len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        entity_ids = frozenset(entity_ids)
+        if self.is_entity is not None:
+            entity_ids |= find_entity_ids(mentions, self.is_entity)
+        slot = self._allocate(vector.shape[0])
+        assert self._vectors is not None
+        self._vectors[slot] = vector
+        if scope not in self._scopes and len(self._scopes) >= 2 * self.max_entries:
+            self._compact_scopes()
+        self._scope_ids[slot] = self._scopes.setdefault(scope, len(self._scopes))
+        self._entries[slot] = _SemanticEntry(
+            scope, value, entity_ids, size, time.monotonic() + self.ttl
+        )
+        for entity_id in entity_ids:
+            self._by_entity.setdefault(entity_id, set()).add(slot)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def references(self, entity_id: str) -> bool:
+        """Return whether a cached answer mentions an entity."""
+        return entity_id in self._by_entity
+
+    def invalidate_entity(self, entity_id: str) -> None:
+        """Drop every answer that mentions an entity."""
+        for slot in self._by_entity.pop(entity_id, set()):
+            self._remove(slot)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        """Drop all cached answers."""
+        self._vectors = None
+        self._scope_ids = np.full(0, -1, dtype=np.int64)
+        self._scopes.clear()
+        self._entries.clear()
+        self._free.clear()
+        self._by_entity.clear()
+        self._bytes = 0
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray | None:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        if vector.ndim != 1 or not norm:
+            return None
+        return vector / norm
+
+    def _allocate(self, dimensions: int) -> int:
+        """Return a free matrix row, growing the matrix if needed."""
+        if self._free:
+            return self._free.pop()
+        rows = 0 if self._vectors is None else self._vectors.shape[0]
+        capacity = min(max(rows * 2, 16), max(self.max_entries, rows + 1))
+        vectors = np.zeros((capacity, dimensions), dtype=np.float32)
+        scope_ids = np.full(capacity, -1, dtype=np.int64)
+        if self._vectors is not None:
+            vectors[:rows] = self._vectors
+            scope_ids[:rows] = self._scope_ids
+        self._vectors = vectors
+        self._scope_ids = scope_ids
+        # Hand out the lowest new row first.
+        self._free.extend(range(capacity - 1, rows, -1))
+        return rows
+
+    def _compact_scopes(self) -> None:
+        """Forget scope ids that no cached answer uses anymore."""
+        self._scopes = {}
+        for slot, entry in self._entries.items():
+            self._scope_ids[slot] = self._scopes.setdefault(
+                entry.scope, len(self._scopes)
+            )
+
+    def _remove(self, slot: int) -> None:
+        entry = self._entries.pop(slot)
+        self._bytes -= entry.size
+        self._scope_ids[slot] = -1
+        self._free.append(slot)
+        for entity_id in entry.entity_ids:
+            if (slots := self._by_entity.get(entity_id)) is not None:
+                slots.discard(slot)
+                if not slots:
+                    del self._by_entity[entity_id]
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return counters used to tune the cache settings."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "tracked_entities": len(self._by_entity),
+        }
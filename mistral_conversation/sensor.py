@@ -0,0 +1,129 @@
+"""Sensors for the Mistral AI Conversation integration."""
+
+# Modified by Louis Rokitta
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
+from homeassistant.helpers.typing import StateType
+
+from . import MistralConfigEntry
+from .const import DOMAIN
+from .metrics import MetricsRecorder
+
+
+@dataclass(frozen=True, kw_only=True)
+class MistralSensorEntityDescription(SensorEntityDescription):
+    """Describes a Mistral metrics sensor."""
+
+    value_fn: Callable[[MetricsRecorder], StateType]
+
+
+SENSORS: tuple[MistralSensorEntityDescription, ...] = (
+    MistralSensorEntityDescription(
+        key="latency_p50",
+        translation_key="latency_p50",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics: metrics.overall.total.summary()["p50"],
+    ),
+    MistralSensorEntityDescription(
+        key="latency_p95",
+        translation_key="latency_p95",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics: metrics.overall.total.summary()["p95"],
+    ),
+    MistralSensorEntityDescription(
+        key="time_to_first_token_p95",
+        translation_key="time_to_first_token_p95",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics: metrics.overall.first_token.summary()["p95"],
+    ),
+    MistralSensorEntityDescription(
+        key="queue_wait_p95",
+        translation_key="queue_wait_p95",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics: metrics.overall.queue_wait.summary()["p95"],
+    ),
+    MistralSensorEntityDescription(
+        key="prompt_tokens",
+        translation_key="prompt_tokens",
+        native_unit_of_measurement="tokens",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.overall.prompt_tokens,
+    ),
+    MistralSensorEntityDescription(
+        key="completion_tokens",
+        translation_key="completion_tokens",
+        native_unit_of_measurement="tokens",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.overall.completion_tokens,
+    ),
+    MistralSensorEntityDescription(
+        key="requests",
+        translation_key="requests",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.overall.requests,
+    ),
+    MistralSensorEntityDescription(
+        key="errors",
+        translation_key="errors",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: sum(metrics.overall.errors.values()),
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: MistralConfigEntry,
+    async_add_entities: AddConfigEntryEntitiesCallback,
+) -> None:
+    """Set up the metrics sensors."""
+    async_add_entities(
+        MistralMetricsSensor(entry, description) for description in SENSORS
+    )
+
+
+class MistralMetricsSensor(SensorEntity):
+    """Sensor exposing one Mistral API metric on the service device."""
+
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_should_poll = False
+    entity_description: MistralSensorEntityDescription
+
+    def __init__(
+        self, entry: MistralConfigEntry, description: MistralSensorEntityDescription
+    ) -> None:
+        self.entity_description = description
+        self._metrics = entry.runtime_data.metrics
+        self._attr_unique_id = f"{entry.entry_id}_{description.key}"
+        self._attr_device_info = dr.DeviceInfo(identifiers={(DOMAIN, entry.entry_id)})
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(self._metrics.async_add_listener(self.async_write_ha_state))
+
+    @property
+    def native_value(self) -> StateType:
+        return self.entity_description.value_fn(self._metrics)
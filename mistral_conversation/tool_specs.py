@@ -0,0 +1,130 @@
+"""Tool spec caching for the Mistral AI Conversation integration."""
+
+# Modified by Louis Rokitta
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+import json
+from typing import Any
+
+from homeassistant.components import conversation
+from homeassistant.components.homeassistant.exposed_entities import (
+    async_listen_entity_updates,
+)
+from homeassistant.components.script import DOMAIN as SCRIPT_DOMAIN
+from homeassistant.const import (
+    ATTR_DOMAIN,
+    EVENT_SERVICE_REGISTERED,
+    EVENT_SERVICE_REMOVED,
+)
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers import (
+    area_registry as ar,
+    entity_registry as er,
+    floor_registry as fr,
+    llm,
+)
+
+from .context import estimate_tokens
+
+MAX_CACHED_TOOL_SETS = 8
+
+
+@dataclass(frozen=True, slots=True)
+class ToolSpecs:
+    """Converted tool specs of one LLM API instance."""
+
+    specs: list[dict[str, Any]]
+    tokens: int
+
+
+class ToolSpecCache:
+    """Keep converted tool specs between turns.
+
+    The Assist API builds new tool objects for every turn, but their
+    parameter schemas only change when entities, areas, floors, their
+    exposure to conversation or scripts change. Specs are kept per LLM API,
+    assistant, language and tool names and descriptions, and all of them
+    are dropped on any of those registry, exposure or script changes.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        format_tool: Callable[[llm.Tool, Callable[[Any], Any] | None], dict[str, Any]],
+    ) -> None:
+        self.hass = hass
+        self._format_tool = format_tool
+        self._specs: OrderedDict[tuple[Any, ...], ToolSpecs] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, llm_api: llm.APIInstance) -> ToolSpecs:
+        """Return the converted specs of the API's tools."""
+        context = llm_api.llm_context
+        key = (
+            llm_api.api.id,
+            context.assistant,
+            context.language,
+            tuple((tool.name, tool.description) for tool in llm_api.tools),
+        )
+        if (specs := self._specs.get(key)) is not None:
+            self._specs.move_to_end(key)
+            self.hits += 1
+            return specs
+        self.misses += 1
+        converted = [
+            self._format_tool(tool, llm_api.custom_serializer)
+            for tool in llm_api.tools
+        ]
+        specs = self._specs[key] = ToolSpecs(
+            converted, estimate_tokens(json.dumps(converted))
+        )
+        while len(self._specs) > MAX_CACHED_TOOL_SETS:
+            self._specs.popitem(last=False)
+        return specs
+
+    @callback
+    def clear(self, _event: Event[Any] | None = None) -> None:
+        """Drop all converted specs."""
+        self._specs.clear()
+
+    @callback
+    def async_setup(self) -> CALLBACK_TYPE:
+        """Listen for changes that alter tool schemas, return a remover."""
+        unsubs = [
+            self.hass.bus.async_listen(event_type, self.clear)
+            for event_type in (
+                er.EVENT_ENTITY_REGISTRY_UPDATED,
+                ar.EVENT_AREA_REGISTRY_UPDATED,
+                fr.EVENT_FLOOR_REGISTRY_UPDATED,
+            )
+        ]
+        # Scripts are tools whose fields are their parameters. Reloading a
+        # script re-registers its service.
+        unsubs.extend(
+            self.hass.bus.async_listen(
+                event_type, self.clear, event_filter=_is_script_service
+            )
+            for event_type in (EVENT_SERVICE_REGISTERED, EVENT_SERVICE_REMOVED)
+        )
+        unsubs.append(
+            async_listen_entity_updates(self.hass, conversation.DOMAIN, self.clear)
+        )
+
+        @callback
+        def remove() -> None:
+            for unsub in unsubs:
+                unsub()
+            self.clear()
+
+        return remove
+
+
+@callback
+def _is_script_service(event_data: Mapping[str, Any]) -> bool:
+    """Return whether a service event is about a script."""
+    return event_data[ATTR_DOMAIN] == SCRIPT_DOMAIN
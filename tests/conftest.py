@@ -0,0 +1,60 @@
+"""Fixtures for the Mistral AI Conversation tests.
+
+The client, limiter, pool, cache and context modules do not depend on Home
+Assistant and are tested without it. Tests of modules that need it skip
+themselves when it is not installed.
+"""
+
+# Modified by Louis Rokitta
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import inspect
+from pathlib import Path
+import sys
+from types import ModuleType
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+PACKAGE = "mistral_conversation"
+
+if (
+    importlib.util.find_spec("homeassistant") is None
+    and PACKAGE not in sys.modules
+):
+    # Without Home Assistant the package __init__ cannot be imported, but
+    # the modules under test do not depend on it.
+    _package = ModuleType(PACKAGE)
+    _package.__path__ = [str(ROOT / PACKAGE)]
+    sys.modules[PACKAGE] = _package
+
+
+def pytest_configure(config: pytest.Config) -> None:
+    """Let pytest-asyncio run coroutine tests when it is installed.
+
+    The Home Assistant test fixtures need it in auto mode.
+    """
+    if config.pluginmanager.hasplugin("asyncio"):
+        config.option.asyncio_mode = "auto"
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem: pytest.Function) -> bool | None:
+    """Run coroutine tests in a fresh event loop.
+
+    Tests marked for pytest-asyncio, such as those using the Home Assistant
+    test fixtures, are left to that plugin.
+    """
+    if not inspect.iscoroutinefunction(
+        pyfuncitem.obj
+    ) or pyfuncitem.get_closest_marker("asyncio"):
+        return None
+    arguments = {
+        name: pyfuncitem.funcargs[name]
+        for name in pyfuncitem._fixtureinfo.argnames  # noqa: SLF001
+    }
+    asyncio.run(pyfuncitem.obj(**arguments))
+    return True
@@ -0,0 +1,100 @@
+"""Tests for file attachments."""
+
+# Modified by Louis Rokitta
+
+from __future__ import annotations
+
+import base64
+import os
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.exceptions import HomeAssistantError  # noqa: E402
+
+from mistral_conversation import attachments  # noqa: E402
+from mistral_conversation.attachments import (  # noqa: E402
+    READ_CHUNK_SIZE,
+    AttachmentCache,
+    _read_base64,
+)
+
+
+@pytest.fixture
+def cache(hass: HomeAssistant, tmp_path: Path) -> AttachmentCache:
+    """Return an attachment cache that may read the temporary directory."""
+    hass.config.allowlist_external_dirs = {str(tmp_path)}
+    return AttachmentCache(hass)
+
+
+def test_chunked_base64_matches_plain_encoding(tmp_path: Path) -> None:
+    """Encoding chunk by chunk gives the same text as encoding at once."""
+    data = os.urandom(2 * READ_CHUNK_SIZE + 5)
+    path = tmp_path / "snapshot.jpg"
+    path.write_bytes(data)
+    assert _read_base64(path) == base64.b64encode(data).decode("ascii")
+
+
+async def test_image_is_encoded_once_until_it_changes(
+    cache: AttachmentCache, tmp_path: Path
+) -> None:
+    """An unchanged file comes from the cache, a changed one is read again."""
+    path = tmp_path / "snapshot.png"
+    path.write_bytes(b"first")
+    key, part = await cache.async_get_part(str(path))
+    assert part == {
+        "type": "image_url",
+        "image_url": "data:image/png;base64," + base64.b64encode(b"first").decode(),
+    }
+    assert await cache.async_get_part(str(path)) == (key, part)
+    assert cache.stats["hits"] == 1
+
+    path.write_bytes(b"second!")
+    new_key, new_part = await cache.async_get_part(str(path))
+    assert new_key != key
+    assert new_part["image_url"].endswith(base64.b64encode(b"second!").decode())
+
+
+async def test_text_and_pdf_parts(cache: AttachmentCache, tmp_path: Path) -> None:
+    """Text files are inlined, PDF files are sent as documents."""
+    text = tmp_path / "notes.txt"
+    text.write_text("Water the plants")
+    pdf = tmp_path / "manual.pdf"
+    pdf.write_bytes(b"%PDF-1.4")
+    assert (await cache.async_get_part(str(text)))[1] == {
+        "type": "text",
+        "text": "notes.txt:\nWater the plants",
+    }
+    assert (await cache.async_get_part(str(pdf)))[1]["document_url"].startswith(
+        "data:application/pdf;base64,"
+    )
+
+
+async def test_unreadable_files_are_refused(
+    hass: HomeAssistant,
+    cache: AttachmentCache,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """Files outside the allowlist, too large, missing or of other types fail."""
+    hass.config.allowlist_external_dirs = {str(tmp_path / "allowed")}
+    with pytest.raises(HomeAssistantError, match="no access to path"):
+        await cache.async_get_part(str(tmp_path / "snapshot.png"))
+
+    hass.config.allowlist_external_dirs = {str(tmp_path)}
+    with pytest.raises(HomeAssistantError, match="Cannot read"):
+        await cache.async_get_part(str(tmp_path / "missing.png"))
+
+    archive = tmp_path / "backup.zip"
+    archive.write_bytes(b"PK")
+    with pytest.raises(HomeAssistantError, match="Only images, PDF and text"):
+        await cache.async_get_part(str(archive))
+
+    monkeypatch.setattr(attachments, "MAX_ATTACHMENT_SIZE", 4)
+    large = tmp_path / "large.png"
+    large.write_bytes(b"12345")
+    with pytest.raises(HomeAssistantError, match="larger than"):
+        await cache.async_get_part(str(large))
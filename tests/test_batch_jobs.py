@@ -0,0 +1,214 @@
+"""Tests for the Batch API job manager."""
+
+# Modified by Louis Rokitta
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Any
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from homeassistant.core import Event, HomeAssistant  # noqa: E402
+from pytest_homeassistant_custom_component.common import (  # noqa: E402
+    MockConfigEntry,
+    async_capture_events,
+)
+
+from benchmarks.mock_server import MockConfig, MockMistralServer  # noqa: E402
+from mistral_conversation import batch_jobs  # noqa: E402
+from mistral_conversation.batch_jobs import (  # noqa: E402
+    EVENT_BATCH_JOB_COMPLETED,
+    BatchJobManager,
+    _result_of,
+)
+from mistral_conversation.const import DOMAIN  # noqa: E402
+from mistral_conversation.mistral_client import (  # noqa: E402
+    MistralClient,
+    RetryPolicy,
+    encode_batch_requests,
+)
+
+pytestmark = pytest.mark.usefixtures("socket_enabled")
+
+PROMPTS = ["first", "second", "third"]
+ANSWERS = [{"text": f"Answer to: {prompt}"} for prompt in PROMPTS]
+BODIES = [{"messages": [{"role": "user", "content": prompt}]} for prompt in PROMPTS]
+MODEL = "mistral-small-latest"
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Poll every 50 ms instead of backing off to minutes."""
+    monkeypatch.setattr(batch_jobs, "POLL_INITIAL_DELAY", 0.05)
+    monkeypatch.setattr(batch_jobs, "POLL_MAX_DELAY", 0.05)
+
+
+@pytest.fixture
+async def server() -> AsyncIterator[MockMistralServer]:
+    """Run a mock API that writes batch results out of order."""
+    async with MockMistralServer(
+        MockConfig(batch_duration=0.1, batch_out_of_order=True)
+    ) as server:
+        yield server
+
+
+@pytest.fixture
+async def client(server: MockMistralServer) -> AsyncIterator[MistralClient]:
+    """Return a client of the mock API that does not retry on its own."""
+    async with MistralClient(
+        "test-key", base_url=server.base_url, retry_policy=RetryPolicy(attempts=1)
+    ) as client:
+        yield client
+
+
+@pytest.fixture
+def entry(hass: HomeAssistant) -> MockConfigEntry:
+    """Return a config entry to run the jobs of."""
+    entry = MockConfigEntry(domain=DOMAIN)
+    entry.add_to_hass(hass)
+    return entry
+
+
+async def _async_completed(events: list[Event[Any]]) -> dict[str, Any]:
+    async with asyncio.timeout(5):
+        while not events:
+            await asyncio.sleep(0.01)
+    return events[0].data
+
+
+async def test_results_are_fired_in_prompt_order(
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    entry: MockConfigEntry,
+    client: MistralClient,
+) -> None:
+    """A job is submitted, polled and its results delivered in order."""
+    events = async_capture_events(hass, EVENT_BATCH_JOB_COMPLETED)
+    manager = BatchJobManager(hass, entry, client)
+    job = await manager.async_submit(BODIES, MODEL)
+    assert job["total"] == 3
+    assert manager.jobs == [job]
+
+    data = await _async_completed(events)
+    assert data["job_id"] == job["job_id"]
+    assert data["status"] == "SUCCESS"
+    assert data["results"] == ANSWERS
+    assert data["usage"]["completion_tokens"] == 15
+    assert not manager.jobs
+    await hass.async_block_till_done()
+    assert hass_storage[f"{DOMAIN}.batch_jobs.{entry.entry_id}"]["data"] == {
+        "jobs": {}
+    }
+
+
+async def test_polling_resumes_after_a_restart(
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    entry: MockConfigEntry,
+    client: MistralClient,
+) -> None:
+    """Stored jobs are polled again when the manager is loaded."""
+    upload = await client.upload_file(encode_batch_requests(BODIES), "batch.jsonl")
+    job = await client.create_batch_job(upload["id"], MODEL)
+    hass_storage[f"{DOMAIN}.batch_jobs.{entry.entry_id}"] = {
+        "version": batch_jobs.STORAGE_VERSION,
+        "key": f"{DOMAIN}.batch_jobs.{entry.entry_id}",
+        "data": {
+            "jobs": {
+                job["id"]: {
+                    "job_id": job["id"],
+                    "input_file": upload["id"],
+                    "model": MODEL,
+                    "total": 3,
+                    "status": "QUEUED",
+                    "created": 0.0,
+                }
+            }
+        },
+    }
+    events = async_capture_events(hass, EVENT_BATCH_JOB_COMPLETED)
+    manager = BatchJobManager(hass, entry, client)
+    await manager.async_load()
+    assert len(manager.jobs) == 1
+
+    data = await _async_completed(events)
+    assert data["job_id"] == job["id"]
+    assert data["results"] == ANSWERS
+
+
+async def test_failed_download_is_retried_on_a_later_poll(
+    hass: HomeAssistant,
+    entry: MockConfigEntry,
+    server: MockMistralServer,
+    client: MistralClient,
+) -> None:
+    """A failed download keeps the job instead of losing its results."""
+    server.config.download_failures = 1
+    events = async_capture_events(hass, EVENT_BATCH_JOB_COMPLETED)
+    manager = BatchJobManager(hass, entry, client)
+    await manager.async_submit(BODIES, MODEL)
+
+    data = await _async_completed(events)
+    assert server.stats.errors == 1
+    assert data["results"] == ANSWERS
+    await hass.async_block_till_done()
+    assert len(events) == 1
+
+
+async def test_downloads_are_given_up_after_too_many_attempts(
+    hass: HomeAssistant,
+    monkeypatch: pytest.MonkeyPatch,
+    entry: MockConfigEntry,
+    server: MockMistralServer,
+    client: MistralClient,
+) -> None:
+    """A download that keeps failing ends the job without results."""
+    monkeypatch.setattr(batch_jobs, "MAX_DOWNLOAD_ATTEMPTS", 2)
+    server.config.download_failures = 10
+    events = async_capture_events(hass, EVENT_BATCH_JOB_COMPLETED)
+    manager = BatchJobManager(hass, entry, client)
+    await manager.async_submit(BODIES, MODEL)
+
+    data = await _async_completed(events)
+    assert server.stats.errors == 2
+    assert data["results"] == [{"error": "No result"}] * 3
+    assert not manager.jobs
+
+
+async def test_missing_results_are_not_retried(
+    hass: HomeAssistant,
+    entry: MockConfigEntry,
+    server: MockMistralServer,
+    client: MistralClient,
+) -> None:
+    """A result file the API no longer has ends the job right away."""
+    events = async_capture_events(hass, EVENT_BATCH_JOB_COMPLETED)
+    manager = BatchJobManager(hass, entry, client)
+    job = await manager.async_submit(BODIES, MODEL)
+    # Drop the output file as soon as the job has written it.
+    async with asyncio.timeout(5):
+        while not (output_file := server.jobs[job["job_id"]]["output_file"]):
+            await asyncio.sleep(0.005)
+    del server.files[output_file]
+
+    data = await _async_completed(events)
+    assert data["results"] == [{"error": "No result"}] * 3
+
+
+def test_invalid_result_lines_become_errors() -> None:
+    """A line whose body is not a JSON object is an error for its prompt."""
+    assert _result_of(
+        {"response": {"status_code": 502, "body": "<html>Bad gateway</html>"}}
+    ) == ({"error": "<html>Bad gateway</html>"}, {})
+    assert _result_of({"response": {"status_code": 200, "body": "{"}}) == (
+        {"error": "No response from Mistral API"},
+        {},
+    )
+    assert _result_of({"response": {"status_code": 200, "body": "[]"}}) == (
+        {"error": "No response from Mistral API"},
+        {},
+    )
@@ -0,0 +1,156 @@
+"""Tests for context window trimming and summaries."""
+
+# Modified by Louis Rokitta
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Coroutine
+from typing import Any
+
+from mistral_conversation.context import (
+    MESSAGE_OVERHEAD_TOKENS,
+    SUMMARY_PREFIX,
+    ContextManager,
+    estimate_tokens,
+)
+from mistral_conversation.mistral_client import EncodedMessages
+
+SYSTEM = {"role": "system", "content": "You are a voice assistant."}
+
+
+class _Hass:
+    """Just enough of Home Assistant to run background tasks."""
+
+    def __init__(self) -> None:
+        self.tasks: list[asyncio.Task[Any]] = []
+
+    def async_create_background_task(
+        self, target: Coroutine[Any, Any, Any], name: str
+    ) -> asyncio.Task[Any]:
+        task = asyncio.get_running_loop().create_task(target, name=name)
+        self.tasks.append(task)
+        return task
+
+
+class _Client:
+    """Client that answers every summary request with the same text."""
+
+    def __init__(self, summary: str) -> None:
+        self.summary = summary
+        self.payloads: list[dict[str, Any]] = []
+
+    async def chat(self, payload: dict[str, Any], **kwargs: Any) -> dict[str, Any]:
+        self.payloads.append(payload)
+        return {"choices": [{"message": {"content": self.summary}}]}
+
+
+def _conversation(turns: int) -> EncodedMessages:
+    messages = EncodedMessages([SYSTEM])
+    for turn in range(turns):
+        messages.append({"role": "user", "content": f"Question {turn} " + "x" * 80})
+        messages.append({"role": "assistant", "content": f"Answer {turn} " + "y" * 80})
+    return messages
+
+
+def _cost(messages: EncodedMessages, start: int = 0, end: int | None = None) -> int:
+    return sum(
+        len(encoded) // 4 + MESSAGE_OVERHEAD_TOKENS
+        for encoded in messages.encoded[start:end]
+    )
+
+
+def test_estimate_tokens() -> None:
+    """Tokens are estimated from the UTF-8 size."""
+    assert estimate_tokens("") == 1
+    assert estimate_tokens("a" * 40) == 11
+    assert estimate_tokens("é" * 20) == estimate_tokens(b"a" * 40)
+
+
+def test_messages_within_budget_are_kept() -> None:
+    """A conversation that fits is passed through unchanged."""
+    manager = ContextManager(None, None)
+    messages = _conversation(3)
+    assert manager.fit("id", messages, _cost(messages), "model") is messages
+
+
+def test_oldest_turns_are_dropped() -> None:
+    """The system prompt and the newest turns that fit are kept."""
+    manager = ContextManager(None, None)
+    messages = _conversation(4)
+    # Room for the system prompt and the last two turns.
+    budget = _cost(messages, 0, 1) + _cost(messages, 5)
+    trimmed = manager.fit("id", messages, budget, "model", summarize=False)
+    assert list(trimmed) == [SYSTEM, *messages[5:]]
+    assert trimmed.encoded == [messages.encoded[0], *messages.encoded[5:]]
+
+
+def test_reserved_tokens_count_against_the_budget() -> None:
+    """Tokens reserved for tool specs leave less room for turns."""
+    manager = ContextManager(None, None)
+    messages = _conversation(4)
+    budget = _cost(messages, 0, 1) + _cost(messages, 5)
+    trimmed = manager.fit(
+        "id", messages, budget, "model", reserved_tokens=1, summarize=False
+    )
+    assert list(trimmed) == [SYSTEM, *messages[7:]]
+
+
+def test_cut_never_splits_a_tool_call_from_its_result() -> None:
+    """Turns are only cut in front of a user message."""
+    manager = ContextManager(None, None)
+    messages = _conversation(1)
+    messages.append({"role": "user", "content": "Turn on the light"})
+    messages.append(
+        {
+            "role": "assistant",
+            "content": "",
+            "tool_calls": [{"id": "call", "function": {"name": "HassTurnOn"}}],
+        }
+    )
+    messages.append(
+        {"role": "tool", "tool_call_id": "call", "content": '{"success":true}'}
+    )
+    messages.append({"role": "assistant", "content": "Done."})
+    # Room for the tool result and the answer, but not the whole last turn.
+    budget = _cost(messages, 0, 1) + _cost(messages, 5)
+    trimmed = manager.fit("id", messages, budget, "model", summarize=False)
+    # The last turn is kept whole even though it is over the budget.
+    assert list(trimmed) == [SYSTEM, *messages[3:]]
+
+
+async def test_dropped_turns_are_summarized_for_later_turns() -> None:
+    """Dropped turns are summarized in the background and used next time."""
+    hass, client = _Hass(), _Client("The user asked about the weather.")
+    manager = ContextManager(hass, client)
+    messages = _conversation(4)
+    budget = _cost(messages, 0, 1) + _cost(messages, 5) + 40
+    first = manager.fit("id", messages, budget, "model")
+    # The live turn does not wait for the summary.
+    assert list(first) == [SYSTEM, *messages[5:]]
+    await asyncio.gather(*hass.tasks)
+    assert len(client.payloads) == 1
+    assert "Question 0" in client.payloads[0]["messages"][1]["content"]
+
+    second = manager.fit("id", messages, budget, "model")
+    assert second[1] == {
+        "role": "system",
+        "content": SUMMARY_PREFIX + "The user asked about the weather.",
+    }
+    assert second[-1] == messages[-1]
+    manager.clear()
+
+
+async def test_turns_covered_by_the_summary_are_not_sent_again() -> None:
+    """A larger budget does not repeat turns the summary already covers."""
+    hass, client = _Hass(), _Client("The user asked about the weather.")
+    manager = ContextManager(hass, client)
+    messages = _conversation(4)
+    manager.fit("id", messages, _cost(messages, 0, 1) + _cost(messages, 5), "model")
+    await asyncio.gather(*hass.tasks)
+
+    # Room for the summary and the last three turns.
+    budget = _cost(messages, 0, 1) + _cost(messages, 3) + 40
+    trimmed = manager.fit("id", messages, budget, "model", summarize=False)
+    assert list(trimmed) == [SYSTEM, trimmed[1], *messages[5:]]
+    assert trimmed[1]["content"].startswith(SUMMARY_PREFIX)
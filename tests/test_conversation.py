@@ -0,0 +1,183 @@
+"""Tests for the conversation agent."""
+
+# Modified by Louis Rokitta
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Iterable
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+pytest.importorskip("homeassistant.components.conversation")
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from homeassistant.components import conversation  # noqa: E402
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.setup import async_setup_component  # noqa: E402
+from pytest_homeassistant_custom_component.common import (  # noqa: E402
+    MockConfigEntry,
+)
+
+from mistral_conversation import _async_track_semantic_entities  # noqa: E402
+from mistral_conversation.const import (  # noqa: E402
+    CONF_MAX_TOKENS,
+    CONF_VOICE_MAX_TOKENS,
+    DOMAIN,
+)
+from mistral_conversation.conversation import (  # noqa: E402
+    _exposed_entity_ids,
+    _flush_sentences,
+    _max_tokens,
+    _transform_stream,
+)
+
+
+async def _stream(items: Iterable[dict[str, Any]]) -> AsyncIterator[dict[str, Any]]:
+    for item in items:
+        yield item
+
+
+async def _collect(stream: AsyncIterator[dict[str, Any]]) -> list[dict[str, Any]]:
+    return [item async for item in stream]
+
+
+def _chunk(**delta: Any) -> dict[str, Any]:
+    return {"choices": [{"delta": delta}]}
+
+
+def _texts(*parts: str) -> list[dict[str, Any]]:
+    return [{"content": part} for part in parts]
+
+
+async def test_transform_stream_yields_text() -> None:
+    """Text deltas follow a single role delta, empty chunks are skipped."""
+    deltas = await _collect(
+        _transform_stream(
+            _stream(
+                [
+                    {"choices": []},
+                    _chunk(role="assistant", content="Hel"),
+                    _chunk(content=[{"type": "text", "text": "lo"}]),
+                    _chunk(content=""),
+                ]
+            )
+        )
+    )
+    assert deltas == [{"role": "assistant"}, *_texts("Hel", "lo")]
+
+
+async def test_transform_stream_assembles_tool_calls() -> None:
+    """Tool call fragments are joined, each call is handed on once complete."""
+    deltas = await _collect(
+        _transform_stream(
+            _stream(
+                [
+                    _chunk(
+                        tool_calls=[
+                            {
+                                "index": 0,
+                                "id": "call1",
+                                "function": {"name": "HassTurnOn", "arguments": '{"na'},
+                            }
+                        ]
+                    ),
+                    _chunk(
+                        tool_calls=[
+                            {"index": 0, "function": {"arguments": 'me": "Kitchen"}'}}
+                        ]
+                    ),
+                    # A second complete call with the same index.
+                    _chunk(
+                        tool_calls=[
+                            {
+                                "index": 0,
+                                "id": "call2",
+                                "function": {"name": "HassTurnOff", "arguments": {}},
+                            }
+                        ]
+                    ),
+                ]
+            )
+        )
+    )
+    assert deltas[0] == {"role": "assistant"}
+    calls = [delta["tool_calls"][0] for delta in deltas[1:]]
+    assert [(call.id, call.tool_name, call.tool_args) for call in calls] == [
+        ("call1", "HassTurnOn", {"name": "Kitchen"}),
+        ("call2", "HassTurnOff", {}),
+    ]
+
+
+async def test_flush_sentences_groups_whole_sentences() -> None:
+    """Text is handed on one whole sentence at a time."""
+    deltas = await _collect(
+        _flush_sentences(
+            _stream(
+                [
+                    {"role": "assistant"},
+                    *_texts("The light", " is on. The ", "door is", " closed! Anything"),
+                    *_texts(" else?"),
+                ]
+            )
+        )
+    )
+    assert deltas == [
+        {"role": "assistant"},
+        *_texts("The light is on. ", "The door is closed! ", "Anything else?"),
+    ]
+
+
+async def test_flush_sentences_keeps_decimals_and_handles_cjk() -> None:
+    """A decimal point does not end a sentence, full-width punctuation does."""
+    deltas = await _collect(
+        _flush_sentences(_stream(_texts("It is 21.5", " degrees", "。好的", "。再见")))
+    )
+    assert deltas == _texts("It is 21.5 degrees。", "好的。", "再见")
+
+
+async def test_flush_sentences_flushes_before_tool_calls() -> None:
+    """Held back text goes out before a tool call delta."""
+    tool_calls = {"tool_calls": []}
+    deltas = await _collect(
+        _flush_sentences(_stream([*_texts("Let me check"), tool_calls]))
+    )
+    assert deltas == [*_texts("Let me check"), tool_calls]
+
+
+def test_voice_token_limit_only_without_tools() -> None:
+    """The voice limit never cuts off the arguments of a tool call."""
+    options = {CONF_MAX_TOKENS: 300, CONF_VOICE_MAX_TOKENS: 60}
+    assert _max_tokens(options, voice=True, tools=False) == 60
+    assert _max_tokens(options, voice=True, tools=True) == 300
+    assert _max_tokens(options, voice=False, tools=False) == 300
+
+
+async def test_state_change_invalidates_answers_from_exposed_states(
+    hass: HomeAssistant,
+) -> None:
+    """An answer given with the Assist API depends on every exposed state."""
+    pytest.importorskip("numpy")
+    from mistral_conversation.semantic_cache import SemanticCache
+
+    assert await async_setup_component(hass, "homeassistant", {})
+    hass.states.async_set("light.kitchen", "on")
+    cache = SemanticCache(max_entries=8, ttl=60, max_bytes=64 * 1024, threshold=0.9)
+    entry = MockConfigEntry(domain=DOMAIN)
+    entry.runtime_data = SimpleNamespace(semantic_cache=cache)
+    unsubscribe = _async_track_semantic_entities(hass, entry)
+
+    # The answer does not name the entity it was derived from.
+    cache.set(
+        [1.0, 0.0],
+        "scope",
+        "One light is on.",
+        mentions=("How many lights are on?", "One light is on."),
+        entity_ids=_exposed_entity_ids(hass, conversation.DOMAIN),
+    )
+    assert cache.get([1.0, 0.0], "scope") == "One light is on."
+    hass.states.async_set("light.kitchen", "off")
+    await hass.async_block_till_done()
+    assert cache.get([1.0, 0.0], "scope") is None
+    unsubscribe()
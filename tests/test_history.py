@@ -0,0 +1,78 @@
+"""Tests for the incremental message conversion."""
+
+# Modified by Louis Rokitta
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any
+
+from mistral_conversation.history import MessageHistoryCache
+
+
+@dataclass(eq=False)
+class _Content:
+    role: str
+    content: str
+
+
+@dataclass
+class _ChatLog:
+    conversation_id: str
+    content: list[_Content] = field(default_factory=list)
+
+
+class _Converter:
+    """Convert content to messages and count the calls."""
+
+    def __init__(self) -> None:
+        self.converted: list[_Content] = []
+
+    def __call__(self, content: _Content) -> list[dict[str, Any]]:
+        self.converted.append(content)
+        return [{"role": content.role, "content": content.content}]
+
+
+def _messages(chat_log: _ChatLog) -> list[dict[str, Any]]:
+    return [{"role": c.role, "content": c.content} for c in chat_log.content]
+
+
+def test_only_new_content_is_converted() -> None:
+    """Each turn converts what was added since the previous one."""
+    convert = _Converter()
+    cache = MessageHistoryCache(convert)
+    chat_log = _ChatLog("id", [_Content("system", "Prompt"), _Content("user", "Hi")])
+    assert cache.get_messages(chat_log, "options") == _messages(chat_log)
+    assert len(convert.converted) == 2
+
+    chat_log.content += [_Content("assistant", "Hello"), _Content("user", "Bye")]
+    messages = cache.get_messages(chat_log, "options")
+    assert messages == _messages(chat_log)
+    assert convert.converted[2:] == chat_log.content[2:]
+    assert len(messages.encoded) == len(messages)
+
+
+def test_changed_system_prompt_is_reconverted() -> None:
+    """A newly rendered system prompt replaces the old one."""
+    convert = _Converter()
+    cache = MessageHistoryCache(convert)
+    chat_log = _ChatLog("id", [_Content("system", "At 10:00"), _Content("user", "Hi")])
+    cache.get_messages(chat_log, "options")
+    chat_log.content[0] = _Content("system", "At 10:01")
+    chat_log.content.append(_Content("user", "Again"))
+    assert cache.get_messages(chat_log, "options") == _messages(chat_log)
+    assert len(convert.converted) == 4
+
+
+def test_history_is_rebuilt_when_options_or_content_change() -> None:
+    """New options or a rewritten chat log convert everything again."""
+    convert = _Converter()
+    cache = MessageHistoryCache(convert)
+    chat_log = _ChatLog("id", [_Content("system", "Prompt"), _Content("user", "Hi")])
+    cache.get_messages(chat_log, "options")
+    assert cache.get_messages(chat_log, "new options") == _messages(chat_log)
+    assert len(convert.converted) == 4
+
+    chat_log.content[1] = _Content("user", "Edited")
+    assert cache.get_messages(chat_log, "new options") == _messages(chat_log)
+    assert convert.converted[-1] is chat_log.content[1]
@@ -0,0 +1,117 @@
+"""Tests for the API key pool."""
+
+# Modified by Louis Rokitta
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from mistral_conversation.key_pool import (
+    EJECT_AFTER_FAILURES,
+    EJECT_BASE_DELAY,
+    KeyPool,
+    PooledKey,
+    get_pooled_key,
+)
+from mistral_conversation.rate_limit import Priority, RateLimiter
+
+
+def test_pool_needs_a_key() -> None:
+    """An empty pool is refused."""
+    with pytest.raises(ValueError):
+        KeyPool([])
+
+
+def test_least_outstanding_key_is_chosen() -> None:
+    """Requests go to the key with the fewest outstanding requests."""
+    first, second = PooledKey("key-first"), PooledKey("key-second")
+    pool = KeyPool([first, second])
+    assert pool.acquire() is first
+    assert pool.acquire() is second
+    pool.release(first)
+    assert pool.acquire() is first
+    assert (first.outstanding, second.outstanding) == (1, 1)
+
+
+def test_pinned_requests_use_the_primary_key() -> None:
+    """Pinned requests stay on the key of the config entry."""
+    first, second = PooledKey("key-first"), PooledKey("key-second")
+    pool = KeyPool([first, second])
+    pool.acquire()
+    assert pool.acquire(pinned=True) is first
+
+
+def test_key_is_ejected_after_consecutive_failures() -> None:
+    """Failures eject a key, a success in between resets the count."""
+    key = PooledKey("key-failing")
+    for _ in range(EJECT_AFTER_FAILURES - 1):
+        key.failed()
+    key.succeeded()
+    for _ in range(EJECT_AFTER_FAILURES - 1):
+        key.failed()
+    assert key.ejections == 0
+    key.failed()
+    assert key.ejections == 1
+    assert not KeyPool([key]).has_available_key()
+
+
+def test_ejections_grow_while_a_key_keeps_failing() -> None:
+    """One failure after an ejection ejects the key for twice as long."""
+    key = PooledKey("key-flapping")
+    key.rejected()
+    first = key.ejected_until
+    key.ejected_until = 0.0
+    key.failed()
+    assert key.ejections == 2
+    assert key.ejected_until - first == pytest.approx(EJECT_BASE_DELAY, abs=1)
+
+
+def test_ejected_keys_get_no_traffic() -> None:
+    """Ejected keys are skipped until every key is ejected."""
+    first, second = PooledKey("key-first"), PooledKey("key-second")
+    pool = KeyPool([first, second])
+    first.throttle(60)
+    assert [pool.acquire() for _ in range(3)] == [second] * 3
+    second.throttle(30)
+    # The key that returns first is used anyway.
+    assert pool.acquire() is second
+
+
+async def test_queued_request_leaves_an_ejected_key() -> None:
+    """A request waiting on a key that gets ejected moves to another key."""
+    limiter = RateLimiter(requests_per_second=100, tokens_per_minute=600)
+    await limiter.acquire(600, Priority.INTERACTIVE)
+    throttled, healthy = PooledKey("key-throttled", limiter), PooledKey("key-healthy")
+    pool = KeyPool([throttled, healthy])
+    waiting = asyncio.create_task(
+        pool.wait_for_slot(throttled, 100, Priority.INTERACTIVE)
+    )
+    await asyncio.sleep(0.01)
+    assert pool.queued == 1
+    throttled.throttle(30)
+    assert await waiting is False
+    # The abandoned wait does not keep a place in the limiter queue.
+    assert pool.queued == 0
+
+
+async def test_queued_request_stays_when_no_key_is_left() -> None:
+    """With every key ejected the request keeps waiting for its slot."""
+    limiter = RateLimiter(requests_per_second=100, tokens_per_minute=6_000)
+    await limiter.acquire(6_000, Priority.INTERACTIVE)
+    first, second = PooledKey("key-first", limiter), PooledKey("key-second")
+    second.throttle(30)
+    pool = KeyPool([first, second])
+    waiting = asyncio.create_task(pool.wait_for_slot(first, 10, Priority.INTERACTIVE))
+    await asyncio.sleep(0.01)
+    first.throttle(30)
+    assert await asyncio.wait_for(waiting, 1) is True
+
+
+def test_pooled_key_is_shared_per_api_key() -> None:
+    """Every client using an API key gets the same pooled key."""
+    first = get_pooled_key("test-pooled-key", 5, 60_000)
+    assert get_pooled_key("test-pooled-key", 5, 60_000) is first
+    assert first.rate_limiter is not None
+    assert first.label == "…-key"
@@ -0,0 +1,257 @@
+"""Tests for the Mistral API client."""
+
+# Modified by Louis Rokitta
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import json
+import time
+from typing import Any
+
+import httpx
+import pytest
+
+from mistral_conversation.key_pool import KeyPool, PooledKey
+from mistral_conversation.mistral_client import (
+    ATTACHMENT_TOKENS,
+    EncodedMessages,
+    MistralClient,
+    RetryPolicy,
+    _estimate_cost,
+    encode_payload,
+)
+from mistral_conversation.rate_limit import Priority
+
+PAYLOAD = {
+    "model": "mistral-small-latest",
+    "messages": [{"role": "user", "content": "Hello"}],
+    "max_tokens": 100,
+}
+COMPLETION = {
+    "choices": [{"message": {"role": "assistant", "content": "Hi"}}],
+    "usage": {"prompt_tokens": 5, "completion_tokens": 1},
+}
+
+Handler = Callable[[httpx.Request], Awaitable[httpx.Response]]
+
+
+def _client(
+    handler: Handler, api_key: str = "test-key", **kwargs: Any
+) -> MistralClient:
+    return MistralClient(
+        api_key,
+        httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        retry_policy=RetryPolicy(attempts=3, base_delay=0, max_delay=0),
+        **kwargs,
+    )
+
+
+def test_encode_payload_matches_plain_json() -> None:
+    """Pre-encoded messages give the same body as encoding it whole."""
+    messages = EncodedMessages(PAYLOAD["messages"])
+    messages.append({"role": "assistant", "content": "Grüß dich"})
+    payload = {**PAYLOAD, "messages": messages}
+    assert json.loads(encode_payload(payload)) == {
+        **PAYLOAD,
+        "messages": list(messages),
+    }
+    assert json.loads(encode_payload({"messages": EncodedMessages()})) == {
+        "messages": []
+    }
+
+
+def test_attachments_are_costed_flat() -> None:
+    """A base64 attachment counts as a flat token cost, not by its size."""
+    small = {
+        "messages": [
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": "What is this?"},
+                    {"type": "image_url", "image_url": {"url": "data:,a"}},
+                ],
+            }
+        ]
+    }
+    large = json.loads(json.dumps(small))
+    large["messages"][0]["content"][1]["image_url"]["url"] = "data:," + "a" * 400_000
+    small_cost = _estimate_cost(encode_payload(small), small)
+    large_cost = _estimate_cost(encode_payload(large), large)
+    assert small_cost == large_cost
+    assert ATTACHMENT_TOKENS <= small_cost < ATTACHMENT_TOKENS + 100
+
+
+async def test_identical_calls_share_one_request() -> None:
+    """Concurrent identical chat calls send one upstream request."""
+    release = asyncio.Event()
+    calls = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return httpx.Response(200, json=COMPLETION)
+
+    client = _client(handler)
+    tasks = [asyncio.create_task(client.chat(PAYLOAD)) for _ in range(3)]
+    await asyncio.sleep(0.01)
+    release.set()
+    results = await asyncio.gather(*tasks)
+    assert calls == 1
+    assert results[0] == COMPLETION
+    assert all(result is results[0] for result in results)
+    # A later call is a new request.
+    await client.chat(PAYLOAD)
+    assert calls == 2
+
+
+async def test_callers_only_share_requests_of_their_priority_and_timeout() -> None:
+    """An interactive caller never waits on a queued background request."""
+    release = asyncio.Event()
+    calls = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return httpx.Response(200, json=COMPLETION)
+
+    client = _client(handler)
+    tasks = [
+        asyncio.create_task(client.chat(PAYLOAD)),
+        asyncio.create_task(client.chat(PAYLOAD, priority=Priority.INTERACTIVE)),
+        asyncio.create_task(client.chat(PAYLOAD, timeout=5)),
+    ]
+    await asyncio.sleep(0.01)
+    release.set()
+    await asyncio.gather(*tasks)
+    assert calls == 3
+
+
+async def test_cancelled_caller_does_not_cancel_shared_request() -> None:
+    """The shared request goes on while another caller still waits."""
+    release = asyncio.Event()
+    calls = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return httpx.Response(200, json=COMPLETION)
+
+    client = _client(handler)
+    cancelled = asyncio.create_task(client.chat(PAYLOAD))
+    waiting = asyncio.create_task(client.chat(PAYLOAD))
+    await asyncio.sleep(0.01)
+    cancelled.cancel()
+    await asyncio.sleep(0.01)
+    release.set()
+    assert await waiting == COMPLETION
+    assert cancelled.cancelled()
+    assert calls == 1
+
+
+async def test_request_is_cancelled_with_its_last_caller() -> None:
+    """Nobody waiting for the shared request anymore cancels it."""
+    started = asyncio.Event()
+    upstream_cancelled = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            upstream_cancelled.set()
+            raise
+        return httpx.Response(200, json=COMPLETION)
+
+    client = _client(handler)
+    callers = [asyncio.create_task(client.chat(PAYLOAD)) for _ in range(2)]
+    await started.wait()
+    for caller in callers:
+        caller.cancel()
+    await asyncio.wait_for(upstream_cancelled.wait(), 1)
+    await asyncio.sleep(0)
+    assert not client._inflight  # noqa: SLF001
+
+
+async def test_server_errors_are_retried() -> None:
+    """A 503 is retried and the retry is counted."""
+    statuses = [503, 200]
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(statuses.pop(0), json=COMPLETION)
+
+    client = _client(handler)
+    assert await client.chat(PAYLOAD) == COMPLETION
+    assert client.retries == 1
+
+
+async def test_client_errors_are_not_retried() -> None:
+    """A 400 is raised right away."""
+    calls = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        return httpx.Response(400, json={"message": "bad request"})
+
+    client = _client(handler)
+    with pytest.raises(httpx.HTTPStatusError):
+        await client.chat(PAYLOAD)
+    assert calls == 1
+
+
+async def test_uploads_are_not_retried_after_server_errors() -> None:
+    """A file upload the server may have stored is not sent twice."""
+    calls = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        return httpx.Response(500)
+
+    client = _client(handler)
+    with pytest.raises(httpx.HTTPStatusError):
+        await client.upload_file(b"{}", "batch.jsonl")
+    assert calls == 1
+
+
+async def test_job_creation_is_retried_after_429() -> None:
+    """A refused job creation is safe to send again."""
+    statuses = [429, 200]
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            statuses.pop(0), headers={"retry-after": "0"}, json={"id": "job"}
+        )
+
+    client = _client(handler)
+    assert await client.create_batch_job("file", "mistral-small-latest") == {
+        "id": "job"
+    }
+    assert not statuses
+
+
+async def test_refused_key_is_ejected_and_request_moves_on() -> None:
+    """A 401 on one pooled key ejects it and the retry uses another key."""
+    used: list[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        key = request.headers["authorization"].removeprefix("Bearer ")
+        used.append(key)
+        if key == "key-revoked":
+            return httpx.Response(401)
+        return httpx.Response(200, json=COMPLETION)
+
+    revoked, valid = PooledKey("key-revoked"), PooledKey("key-valid")
+    client = _client(handler, "key-revoked", key_pool=KeyPool([revoked, valid]))
+    assert await client.chat(PAYLOAD) == COMPLETION
+    assert used == ["key-revoked", "key-valid"]
+    assert revoked.ejections == 1
+    assert not revoked.available(time.monotonic())
+    # Later requests skip the ejected key.
+    await client.chat({**PAYLOAD, "max_tokens": 50})
+    assert used[-1] == "key-valid"
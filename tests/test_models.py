@@ -0,0 +1,84 @@
+"""Tests for the model catalog."""
+
+# Modified by Louis Rokitta
+
+from __future__ import annotations
+
+from typing import Any
+
+from mistral_conversation.const import RECOMMENDED_CONTEXT_BUDGET
+from mistral_conversation.models import (
+    ModelInfo,
+    async_get_models,
+    chat_model_ids,
+    context_budget,
+    get_cached_models,
+    parse_models,
+)
+
+LISTING = [
+    {
+        "id": "mistral-small-2503",
+        "aliases": ["mistral-small-latest"],
+        "max_context_length": 128_000,
+        "capabilities": {"completion_chat": True, "function_calling": True},
+    },
+    {
+        "id": "mistral-embed",
+        "max_context_length": 8_192,
+        "capabilities": {"completion_chat": False},
+    },
+    {"id": "open-mistral-7b", "deprecation": "2025-03-30T12:00:00Z"},
+    {"object": "model"},
+]
+
+
+class _Client:
+    """Client that lists the same models every time and counts the calls."""
+
+    def __init__(self, api_key: str) -> None:
+        self.api_key = api_key
+        self.calls = 0
+
+    async def list_models(self, timeout: float) -> list[dict[str, Any]]:
+        self.calls += 1
+        return LISTING
+
+
+def test_models_are_indexed_by_id_and_alias() -> None:
+    """Aliases share the info of their model, entries without id are skipped."""
+    models = parse_models(LISTING)
+    assert models["mistral-small-latest"] is models["mistral-small-2503"]
+    assert models["mistral-small-2503"].function_calling
+    assert models["open-mistral-7b"].deprecated
+    assert chat_model_ids(models) == ["mistral-small-2503", "mistral-small-latest"]
+
+
+def test_context_budget() -> None:
+    """The budget defaults to a share of the window and never exceeds it."""
+    info = ModelInfo("model", max_context_length=32_000)
+    assert context_budget(None, info, 500) == 8_000
+    assert context_budget(4_000, info, 500) == 4_000
+    assert context_budget(100_000, info, 500) == 31_500
+    assert context_budget(None, None, 500) == RECOMMENDED_CONTEXT_BUDGET
+    assert context_budget(None, ModelInfo("unknown"), 500) == (
+        RECOMMENDED_CONTEXT_BUDGET
+    )
+
+
+async def test_catalog_is_cached_per_api_key() -> None:
+    """The listing is fetched once per key until the cache expires."""
+    client = _Client("test-catalog-key")
+    assert get_cached_models(client.api_key) is None
+    models = await async_get_models(client)
+    assert await async_get_models(client) is models
+    assert client.calls == 1
+    assert get_cached_models(client.api_key) is models
+
+    other = _Client("test-catalog-other-key")
+    await async_get_models(other)
+    assert other.calls == 1
+
+    # An expired catalog is fetched again.
+    assert await async_get_models(client, ttl=0) is not models
+    assert client.calls == 2
@@ -0,0 +1,148 @@
+"""Tests for the client-side rate limiter."""
+
+# Modified by Louis Rokitta
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+from mistral_conversation.rate_limit import (
+    MIN_REQUESTS_PER_SECOND,
+    Priority,
+    RateLimiter,
+    get_rate_limiter,
+)
+
+
+async def test_burst_within_budget_is_not_delayed() -> None:
+    """Requests within the bucket are admitted right away."""
+    limiter = RateLimiter(requests_per_second=5, tokens_per_minute=60_000)
+    start = time.monotonic()
+    for _ in range(5):
+        await limiter.acquire(10, Priority.INTERACTIVE)
+    assert time.monotonic() - start < 0.05
+
+
+async def test_token_budget_delays_requests() -> None:
+    """A request waits until the token bucket holds its cost again."""
+    limiter = RateLimiter(requests_per_second=100, tokens_per_minute=6_000)
+    await limiter.acquire(6_000, Priority.INTERACTIVE)
+    start = time.monotonic()
+    await limiter.acquire(10, Priority.INTERACTIVE)
+    # 100 tokens per second refill, so 10 tokens take about 0.1 seconds.
+    assert 0.05 < time.monotonic() - start < 0.5
+
+
+async def test_interactive_requests_go_first() -> None:
+    """Queued interactive requests are granted before background ones."""
+    limiter = RateLimiter(requests_per_second=100, tokens_per_minute=6_000)
+    await limiter.acquire(6_000, Priority.INTERACTIVE)
+    order: list[str] = []
+
+    async def request(name: str, priority: Priority) -> None:
+        await limiter.acquire(5, priority)
+        order.append(name)
+
+    background = asyncio.create_task(request("background", Priority.BACKGROUND))
+    await asyncio.sleep(0)
+    interactive = asyncio.create_task(request("interactive", Priority.INTERACTIVE))
+    await asyncio.sleep(0)
+    assert limiter.queued == 2
+    await asyncio.gather(background, interactive)
+    assert order == ["interactive", "background"]
+
+
+async def test_cancelled_waiter_gives_up_its_place() -> None:
+    """A cancelled request leaves the queue without taking a slot."""
+    limiter = RateLimiter(requests_per_second=100, tokens_per_minute=6_000)
+    await limiter.acquire(6_000, Priority.INTERACTIVE)
+    first = asyncio.create_task(limiter.acquire(10, Priority.INTERACTIVE))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    assert limiter.queued == 0
+    start = time.monotonic()
+    await limiter.acquire(10, Priority.INTERACTIVE)
+    assert time.monotonic() - start < 0.5
+
+
+async def test_cancelled_head_lets_the_next_request_through() -> None:
+    """Requests behind a cancelled one do not wait for its refill."""
+    limiter = RateLimiter(requests_per_second=100, tokens_per_minute=6_000)
+    await limiter.acquire(6_000, Priority.INTERACTIVE)
+    large = asyncio.create_task(limiter.acquire(6_000, Priority.INTERACTIVE))
+    await asyncio.sleep(0)
+    small = asyncio.create_task(limiter.acquire(10, Priority.BACKGROUND))
+    await asyncio.sleep(0)
+    large.cancel()
+    await asyncio.wait_for(small, 1)
+
+
+async def test_cost_is_capped_at_the_token_limit() -> None:
+    """A request larger than the whole budget still gets through."""
+    limiter = RateLimiter(requests_per_second=5, tokens_per_minute=1_000)
+    await asyncio.wait_for(limiter.acquire(50_000, Priority.BACKGROUND), 0.5)
+
+
+async def test_queued_cost_is_capped_at_a_lowered_token_limit() -> None:
+    """A queued request still gets through when the limit drops below it."""
+    limiter = RateLimiter(requests_per_second=100, tokens_per_minute=60_000)
+    await limiter.acquire(30_000, Priority.INTERACTIVE)
+    large = asyncio.create_task(limiter.acquire(50_000, Priority.BACKGROUND))
+    await asyncio.sleep(0)
+    assert limiter.queued == 1
+    # A 429 reports a limit below the cost of the queued request.
+    limiter.on_response(
+        429, {"retry-after": "0", "x-ratelimit-limit-tokens-minute": "1200"}
+    )
+    await asyncio.wait_for(large, 0.5)
+
+
+async def test_429_pauses_and_halves_the_request_rate() -> None:
+    """A 429 blocks the queue for Retry-After and halves the rate."""
+    limiter = RateLimiter(requests_per_second=4, tokens_per_minute=60_000)
+    assert limiter.on_response(429, {"retry-after": "0.2"}) == 0.2
+    assert limiter.throttled == 1
+    assert limiter.requests_per_second == 2
+    start = time.monotonic()
+    await limiter.acquire(1, Priority.INTERACTIVE)
+    assert time.monotonic() - start >= 0.15
+
+
+async def test_request_rate_recovers_and_has_a_floor() -> None:
+    """The rate never drops below the minimum and recovers on success."""
+    limiter = RateLimiter(requests_per_second=1, tokens_per_minute=60_000)
+    for _ in range(10):
+        limiter.on_response(429, {"retry-after": "0"})
+    assert limiter.requests_per_second == MIN_REQUESTS_PER_SECOND
+    for _ in range(40):
+        assert limiter.on_response(200, {}) is None
+    assert limiter.requests_per_second == 1
+
+
+async def test_budget_headers_are_applied() -> None:
+    """Limits reported by the API replace the configured ones."""
+    limiter = RateLimiter(requests_per_second=5, tokens_per_minute=60_000)
+    limiter.on_response(
+        200,
+        {
+            "x-ratelimit-limit-tokens-minute": "1200",
+            "x-ratelimit-remaining-tokens-minute": "0",
+        },
+    )
+    assert limiter.tokens_per_minute == 1200
+    start = time.monotonic()
+    # 20 tokens per second refill.
+    await limiter.acquire(4, Priority.INTERACTIVE)
+    assert time.monotonic() - start >= 0.1
+
+
+def test_limiter_is_shared_per_api_key() -> None:
+    """Clients of the same key share a limiter, with the latest limits."""
+    first = get_rate_limiter("test-shared-key", 5, 60_000)
+    second = get_rate_limiter("test-shared-key", 2, 30_000)
+    assert first is second
+    assert second.configured_rps == 2
+    assert second.tokens_per_minute == 30_000
+    assert get_rate_limiter("test-other-key", 5, 60_000) is not first
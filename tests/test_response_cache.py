@@ -0,0 +1,71 @@
+"""Tests for the response cache."""
+
+# Modified by Louis Rokitta
+
+from __future__ import annotations
+
+from mistral_conversation.response_cache import (
+    ResponseCache,
+    payload_cache_key,
+    semantic_scope,
+)
+
+
+def test_payload_key_ignores_key_order() -> None:
+    """Equal payloads get the same key whatever their key order."""
+    assert payload_cache_key({"a": 1, "b": [1, 2]}) == payload_cache_key(
+        {"b": [1, 2], "a": 1}
+    )
+    assert payload_cache_key({"a": 1}) != payload_cache_key({"a": 2})
+
+
+def test_semantic_scope_includes_numbers() -> None:
+    """Prompts that differ in a number never share an answer."""
+    assert semantic_scope("Set it to 21 degrees", model="m") != semantic_scope(
+        "Set it to 22 degrees", model="m"
+    )
+    assert semantic_scope("Set it to 21 degrees", model="m") == semantic_scope(
+        "Please set it to 21 degrees", model="m"
+    )
+
+
+def test_least_recently_used_entry_is_evicted() -> None:
+    """The entry limit evicts the entry that was used longest ago."""
+    cache = ResponseCache(max_entries=2, ttl=60, max_bytes=1024)
+    cache.set("a", "first")
+    cache.set("b", "second")
+    assert cache.get("a") == "first"
+    cache.set("c", "third")
+    assert cache.get("b") is None
+    assert cache.get("a") == "first"
+    assert cache.get("c") == "third"
+    assert cache.stats["evictions"] == 1
+
+
+def test_memory_limit_evicts_entries() -> None:
+    """Entries are evicted to stay within the memory limit."""
+    cache = ResponseCache(max_entries=10, ttl=60, max_bytes=100)
+    cache.set("a", "x" * 40)
+    cache.set("b", "y" * 40)
+    assert cache.stats["bytes"] == 84
+    cache.set("c", "z" * 40)
+    assert cache.get("a") is None
+    # A value larger than the whole cache is not stored.
+    cache.set("d", "w" * 200)
+    assert cache.get("d") is None
+    assert cache.stats["entries"] == 2
+
+
+def test_expired_entries_are_misses() -> None:
+    """Entries past their time to live are dropped on lookup."""
+    cache = ResponseCache(max_entries=10, ttl=0, max_bytes=1024)
+    cache.set("a", "value")
+    assert cache.get("a") is None
+    assert cache.stats == {
+        "hits": 0,
+        "misses": 1,
+        "hit_rate": 0.0,
+        "evictions": 0,
+        "entries": 0,
+        "bytes": 0,
+    }
@@ -0,0 +1,161 @@
+"""Tests for the model router."""
+
+# Modified by Louis Rokitta
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Iterable
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+pytest.importorskip("homeassistant.components.conversation")
+
+from homeassistant.components import conversation  # noqa: E402
+from homeassistant.helpers import llm  # noqa: E402
+
+from mistral_conversation.metrics import (  # noqa: E402
+    SITE_CONVERSATION,
+    CallTiming,
+    MetricsRecorder,
+)
+from mistral_conversation.router import (  # noqa: E402
+    LATENCY_MIN_SAMPLES,
+    ROUTE_EMPTY,
+    ROUTE_LATENCY,
+    ROUTE_LONG,
+    ROUTE_MULTI_STEP,
+    ROUTE_SHORT,
+    ROUTE_TOOL_ERROR,
+    ModelRouter,
+    Route,
+    TooManyToolCalls,
+)
+
+MODEL = "mistral-large-latest"
+FAST_MODEL = "mistral-small-latest"
+
+
+def _router(metrics: MetricsRecorder | None = None) -> ModelRouter:
+    return ModelRouter(
+        MODEL, FAST_MODEL, max_words=8, max_tool_calls=2, metrics=metrics
+    )
+
+
+def _chat_log(text: str) -> Any:
+    return SimpleNamespace(
+        content=[
+            conversation.SystemContent("Prompt"),
+            conversation.UserContent(text),
+        ]
+    )
+
+
+def _tool_call(index: int) -> llm.ToolInput:
+    return llm.ToolInput(tool_name="HassTurnOn", tool_args={}, id=f"call{index}")
+
+
+async def _stream(items: Iterable[dict[str, Any]]) -> AsyncIterator[dict[str, Any]]:
+    for item in items:
+        yield item
+
+
+def test_short_requests_go_to_the_fast_model() -> None:
+    """A single short sentence is answered by the fast model."""
+    metrics = MetricsRecorder()
+    route = _router(metrics).route(_chat_log("Turn on the kitchen light"))
+    assert route == Route(FAST_MODEL, ROUTE_SHORT, fast=True)
+    assert metrics.snapshot()["routes"] == {f"{FAST_MODEL}/{ROUTE_SHORT}": 1}
+
+
+@pytest.mark.parametrize(
+    ("text", "reason"),
+    [
+        ("Please turn on every light in the kitchen and the hallway", ROUTE_LONG),
+        ("Turn on the light. Then lock the door", ROUTE_MULTI_STEP),
+    ],
+)
+def test_long_and_multi_step_requests_go_to_the_main_model(
+    text: str, reason: str
+) -> None:
+    """Long requests and several sentences are answered by the main model."""
+    assert _router().route(_chat_log(text)) == Route(MODEL, reason, fast=False)
+
+
+def test_slower_fast_model_is_not_used() -> None:
+    """The fast model is skipped while its first tokens come later."""
+    metrics = MetricsRecorder()
+    for model, first_token in ((FAST_MODEL, 0.5), (MODEL, 0.3)):
+        for _ in range(LATENCY_MIN_SAMPLES):
+            metrics.record(
+                CallTiming(model, SITE_CONVERSATION, first_token=first_token)
+            )
+    route = _router(metrics).route(_chat_log("Turn on the light"))
+    assert route == Route(MODEL, ROUTE_LATENCY, fast=False)
+
+
+def test_escalate_switches_to_the_main_model() -> None:
+    """An escalation is recorded with its reason."""
+    metrics = MetricsRecorder()
+    assert _router(metrics).escalate(ROUTE_EMPTY) == Route(
+        MODEL, ROUTE_EMPTY, fast=False
+    )
+    assert metrics.snapshot()["routes"] == {f"{MODEL}/{ROUTE_EMPTY}": 1}
+
+
+def test_check_escalates_empty_answers_and_tool_errors() -> None:
+    """Nothing said or a failed tool call escalates, an answer does not."""
+    router = _router()
+    answer = conversation.AssistantContent(agent_id="agent", content="Done.")
+    assert router.check([answer]) is None
+    assert router.check([]) == ROUTE_EMPTY
+    assert (
+        router.check(
+            [
+                conversation.AssistantContent(
+                    agent_id="agent", tool_calls=[_tool_call(1)]
+                ),
+                conversation.ToolResultContent(
+                    agent_id="agent",
+                    tool_call_id="call1",
+                    tool_name="HassTurnOn",
+                    tool_result={"error": "Unknown entity"},
+                ),
+            ]
+        )
+        == ROUTE_TOOL_ERROR
+    )
+
+
+async def test_tool_calls_are_held_until_the_response_ends() -> None:
+    """Calls within the limit are handed on together after the text."""
+    deltas = [
+        delta
+        async for delta in _router().limit_tool_calls(
+            _stream(
+                [
+                    {"role": "assistant"},
+                    {"tool_calls": [_tool_call(1)]},
+                    {"content": "On it."},
+                    {"tool_calls": [_tool_call(2)]},
+                ]
+            )
+        )
+    ]
+    assert deltas == [
+        {"role": "assistant"},
+        {"content": "On it."},
+        {"tool_calls": [_tool_call(1), _tool_call(2)]},
+    ]
+
+
+async def test_too_many_tool_calls_are_never_handed_on() -> None:
+    """A response over the limit fails before any of its calls is passed."""
+    received: list[dict[str, Any]] = []
+    with pytest.raises(TooManyToolCalls):
+        async for delta in _router().limit_tool_calls(
+            _stream([{"tool_calls": [_tool_call(index)]} for index in range(3)])
+        ):
+            received.append(delta)
+    assert not received
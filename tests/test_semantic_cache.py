@@ -0,0 +1,101 @@
+"""Tests for the semantic response cache."""
+
+# Modified by Louis Rokitta
+
+from __future__ import annotations
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from mistral_conversation.semantic_cache import (  # noqa: E402
+    SemanticCache,
+    find_entity_ids,
+)
+
+ENTITIES = {"light.kitchen", "cover.garage_door"}
+
+
+def _cache(max_entries: int = 8, ttl: float = 60.0) -> SemanticCache:
+    return SemanticCache(
+        max_entries=max_entries,
+        ttl=ttl,
+        max_bytes=64 * 1024,
+        threshold=0.9,
+        is_entity=ENTITIES.__contains__,
+    )
+
+
+def test_find_entity_ids() -> None:
+    """Only ids of existing entities are found."""
+    assert find_entity_ids(
+        ["Is light.kitchen on?", "light.hallway is not known, see e.g. this"],
+        ENTITIES.__contains__,
+    ) == {"light.kitchen"}
+
+
+def test_similar_prompt_hits() -> None:
+    """A prompt close enough to a cached one gets its answer."""
+    cache = _cache()
+    cache.set([1.0, 0.0, 0.0], "scope", "It is sunny.")
+    assert cache.get([0.99, 0.05, 0.0], "scope") == "It is sunny."
+    assert cache.get([0.5, 0.5, 0.5], "scope") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_other_scopes_do_not_match() -> None:
+    """The same prompt in another scope is a miss."""
+    cache = _cache()
+    cache.set([1.0, 0.0], "model a", "Answer a")
+    cache.set([1.0, 0.0], "model b", "Answer b")
+    assert cache.get([1.0, 0.0], "model b") == "Answer b"
+    assert cache.get([1.0, 0.0], "model c") is None
+
+
+def test_entity_change_invalidates_answers() -> None:
+    """Answers mentioning an entity are dropped when it changes."""
+    cache = _cache()
+    cache.set(
+        [1.0, 0.0],
+        "scope",
+        "The garage door is open.",
+        mentions=("Is cover.garage_door open?", "The garage door is open."),
+    )
+    cache.set([0.0, 1.0], "scope", "Hello!", mentions=("Hi", "Hello!"))
+    assert cache.references("cover.garage_door")
+    cache.invalidate_entity("cover.garage_door")
+    assert not cache.references("cover.garage_door")
+    assert cache.get([1.0, 0.0], "scope") is None
+    assert cache.get([0.0, 1.0], "scope") == "Hello!"
+    assert cache.invalidations == 1
+
+
+def test_least_recently_used_answer_is_evicted() -> None:
+    """The entry limit evicts the answer used longest ago."""
+    cache = _cache(max_entries=2)
+    cache.set([1.0, 0.0, 0.0], "scope", "first")
+    cache.set([0.0, 1.0, 0.0], "scope", "second")
+    assert cache.get([1.0, 0.0, 0.0], "scope") == "first"
+    cache.set([0.0, 0.0, 1.0], "scope", "third")
+    assert cache.get([0.0, 1.0, 0.0], "scope") is None
+    assert cache.get([1.0, 0.0, 0.0], "scope") == "first"
+    assert cache.evictions == 1
+    assert cache.stats["entries"] == 2
+
+
+def test_new_embedding_model_clears_the_cache() -> None:
+    """Vectors of another size replace everything cached before."""
+    cache = _cache()
+    cache.set([1.0, 0.0], "scope", "old")
+    cache.set([1.0, 0.0, 0.0], "scope", "new")
+    assert cache.get([1.0, 0.0], "scope") is None
+    assert cache.get([1.0, 0.0, 0.0], "scope") == "new"
+    assert cache.stats["entries"] == 1
+
+
+def test_expired_answers_are_misses() -> None:
+    """Answers past their time to live are not returned."""
+    cache = _cache(ttl=0.0)
+    cache.set([1.0, 0.0], "scope", "stale")
+    assert cache.get([1.0, 0.0], "scope") is None
+    assert cache.stats["entries"] == 0
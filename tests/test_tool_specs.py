@@ -0,0 +1,121 @@
+"""Tests for the tool spec cache."""
+
+# Modified by Louis Rokitta
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+pytest.importorskip("pytest_homeassistant_custom_component")
+
+from homeassistant.components import conversation  # noqa: E402
+from homeassistant.components.homeassistant.exposed_entities import (  # noqa: E402
+    async_expose_entity,
+)
+from homeassistant.const import (  # noqa: E402
+    EVENT_SERVICE_REGISTERED,
+    EVENT_SERVICE_REMOVED,
+)
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.helpers import entity_registry as er  # noqa: E402
+from homeassistant.setup import async_setup_component  # noqa: E402
+
+from mistral_conversation.tool_specs import (  # noqa: E402
+    MAX_CACHED_TOOL_SETS,
+    ToolSpecCache,
+)
+
+
+class _Formatter:
+    """Convert tools to specs and count the conversions."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def __call__(
+        self, tool: Any, custom_serializer: Callable[[Any], Any] | None
+    ) -> dict[str, Any]:
+        self.calls += 1
+        return {"type": "function", "function": {"name": tool.name}}
+
+
+def _llm_api(*tools: tuple[str, str], language: str = "en") -> Any:
+    return SimpleNamespace(
+        api=SimpleNamespace(id="assist"),
+        llm_context=SimpleNamespace(assistant=conversation.DOMAIN, language=language),
+        tools=[
+            SimpleNamespace(name=name, description=description)
+            for name, description in tools
+        ],
+        custom_serializer=None,
+    )
+
+
+TOOLS = (("HassTurnOn", "Turns on a device"), ("HassTurnOff", "Turns off a device"))
+
+
+async def test_specs_are_reused_for_the_same_tools(hass: HomeAssistant) -> None:
+    """Only new tools, descriptions or languages are converted again."""
+    format_tool = _Formatter()
+    cache = ToolSpecCache(hass, format_tool)
+    specs = cache.get(_llm_api(*TOOLS))
+    assert [spec["function"]["name"] for spec in specs.specs] == [
+        "HassTurnOn",
+        "HassTurnOff",
+    ]
+    assert specs.tokens > 0
+    assert cache.get(_llm_api(*TOOLS)) is specs
+    assert (cache.hits, cache.misses, format_tool.calls) == (1, 1, 2)
+
+    cache.get(_llm_api(TOOLS[0], ("HassTurnOff", "Turns off a light")))
+    cache.get(_llm_api(*TOOLS, language="de"))
+    assert cache.misses == 3
+
+    for index in range(MAX_CACHED_TOOL_SETS):
+        cache.get(_llm_api((f"script_{index}", "A script")))
+    assert cache.get(_llm_api(*TOOLS)) is not specs
+
+
+async def test_specs_are_dropped_when_tools_may_change(hass: HomeAssistant) -> None:
+    """Registry, exposure and script changes drop the cached specs."""
+    assert await async_setup_component(hass, "homeassistant", {})
+    cache = ToolSpecCache(hass, _Formatter())
+    remove = cache.async_setup()
+
+    async def async_cached_after(event_type: str, data: dict[str, Any]) -> bool:
+        cache.get(_llm_api(*TOOLS))
+        hass.bus.async_fire(event_type, data)
+        await hass.async_block_till_done()
+        misses = cache.misses
+        cache.get(_llm_api(*TOOLS))
+        return cache.misses == misses
+
+    assert await async_cached_after(
+        EVENT_SERVICE_REGISTERED, {"domain": "light", "service": "turn_on"}
+    )
+    assert not await async_cached_after(
+        EVENT_SERVICE_REGISTERED, {"domain": "script", "service": "good_night"}
+    )
+    assert not await async_cached_after(
+        EVENT_SERVICE_REMOVED, {"domain": "script", "service": "good_night"}
+    )
+    assert not await async_cached_after(
+        er.EVENT_ENTITY_REGISTRY_UPDATED,
+        {"action": "update", "entity_id": "light.kitchen", "changes": {}},
+    )
+
+    cache.get(_llm_api(*TOOLS))
+    async_expose_entity(hass, conversation.DOMAIN, "light.kitchen", False)
+    await hass.async_block_till_done()
+    misses = cache.misses
+    cache.get(_llm_api(*TOOLS))
+    assert cache.misses == misses + 1
+
+    remove()
+    assert await async_cached_after(
+        EVENT_SERVICE_REGISTERED, {"domain": "script", "service": "good_night"}
+    )